@@ -33,8 +33,6 @@ if os.path.isfile(dotenv_file):
 SECRET_KEY = os.environ.get('SECRET_KEY', '')
 
 # SECURITY WARNING: don't run with debug turned on in production!
-print("DEBUG vars ->")
-
 DEBUG = True
 # DEBUG = False
 
@@ -63,12 +61,16 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'labs.middleware.RequestLogContextMiddleware',
+    # Early, so its numbers include the other middleware's queries
+    'labs.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    'labs.middleware.RoleMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     
@@ -119,6 +121,99 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# Cached part max scores are kept here; their version counters are in the
+# database, so the per-process local-memory default stays correct with several
+# gunicorn workers. A shared cache (e.g.
+# django.core.cache.backends.redis.RedisCache, via CACHE_BACKEND and
+# CACHE_LOCATION) saves each worker from computing them again.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'esd-grading'),
+    }
+}
+
+
+# Background exports (labs.jobs)
+# Finished export files are written to EXPORT_ROOT.  Jobs run in a thread of
+# the web process unless EXPORT_JOB_THREADS is off, in which case
+# `python manage.py run_export_worker` picks them up.
+
+EXPORT_ROOT = os.environ.get('EXPORT_ROOT', os.path.join(BASE_DIR, 'export_artifacts'))
+EXPORT_JOB_THREADS = os.environ.get('EXPORT_JOB_THREADS', 'True') == 'True'
+# A running job that hasn't reported progress for this many seconds (its
+# worker restarted or died) is queued again, and a job left queued this long
+# is started again or, without threads, failed
+EXPORT_JOB_TIMEOUT = int(os.environ.get('EXPORT_JOB_TIMEOUT', '600'))
+
+
+# Request metrics (labs.middleware)
+# Requests that run more than QUERY_BUDGET SQL queries are logged as
+# warnings; 0 turns the check off.  Per-view numbers are at /api/metrics/.
+
+QUERY_BUDGET = int(os.environ.get('QUERY_BUDGET', '100'))
+
+
+# Dashboard quick stats (labs.stats)
+# The cached figures are served for QUICK_STATS_TTL seconds before the
+# students changed since are recomputed.
+
+QUICK_STATS_TTL = int(os.environ.get('QUICK_STATS_TTL', '30'))
+
+
+# Logging
+# https://docs.djangoproject.com/en/5.1/topics/logging/
+# The labs.* loggers log at LABS_LOG_LEVEL: everything in development,
+# warnings and errors only in production.  Each record carries the request's
+# user, view and signoff id (labs.logcontext).
+
+LABS_LOG_LEVEL = os.environ.get('LABS_LOG_LEVEL', 'DEBUG' if DEBUG else 'WARNING')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'filters': {
+        'request_context': {
+            '()': 'labs.logcontext.ContextFilter',
+        },
+    },
+    'formatters': {
+        'labs': {
+            'format': '%(asctime)s %(levelname)s %(name)s [user=%(user)s view=%(view)s '
+                      'signoff=%(signoff_id)s] %(message)s',
+        },
+    },
+    'handlers': {
+        'labs_console': {
+            'class': 'logging.StreamHandler',
+            'filters': ['request_context'],
+            'formatter': 'labs',
+        },
+    },
+    'loggers': {
+        'labs': {
+            'handlers': ['labs_console'],
+            'level': LABS_LOG_LEVEL,
+            'propagate': False,
+        },
+    },
+}
+
+
+
+# Authentication
+# https://docs.djangoproject.com/en/5.1/topics/auth/customizing/#specifying-authentication-backends
+# RoleBackend (labs.roles) loads each request's user together with their
+# role.  ModelBackend stays listed for sessions that were started with it.
+
+AUTHENTICATION_BACKENDS = [
+    'labs.roles.RoleBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
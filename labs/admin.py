@@ -1,12 +1,30 @@
 from django.contrib import admin
 from labs.models import * 
+from labs.scores import deferred_refresh
 
-class EvaluationRubricAdmin(admin.ModelAdmin):
+class CourseStructureAdmin(admin.ModelAdmin):
+    """
+    Admin for the course structure models, whose changes refresh every
+    student's scores: each page (inlines, bulk deletes) refreshes them once.
+    """
+    def changeform_view(self, *args, **kwargs):
+        with deferred_refresh():
+            return super().changeform_view(*args, **kwargs)
+    
+    def changelist_view(self, *args, **kwargs):
+        with deferred_refresh():
+            return super().changelist_view(*args, **kwargs)
+    
+    def delete_view(self, *args, **kwargs):
+        with deferred_refresh():
+            return super().delete_view(*args, **kwargs)
+
+class EvaluationRubricAdmin(CourseStructureAdmin):
     list_display = ('name', 'is_default', 'get_total_max_marks')
     list_filter = ('is_default',)
     search_fields = ('name', 'description')
 
-class GradeScaleAdmin(admin.ModelAdmin):
+class GradeScaleAdmin(CourseStructureAdmin):
     list_display = ('name', 'is_default', 'a_threshold', 'b_threshold', 'c_threshold', 'd_threshold')
     list_filter = ('is_default',)
     search_fields = ('name', 'description')
@@ -32,18 +50,18 @@ class GradeScaleAdmin(admin.ModelAdmin):
         }),
     )
 
-class LabAdmin(admin.ModelAdmin):
+class LabAdmin(CourseStructureAdmin):
     list_display = ('name', 'due_date', 'total_points', 'grade_scale')
     list_filter = ('due_date',)
     search_fields = ('name', 'description')
     raw_id_fields = ('grade_scale',)
 
-class PartAdmin(admin.ModelAdmin):
+class PartAdmin(CourseStructureAdmin):
     list_display = ('name', 'lab', 'order', 'is_required', 'has_challenges')
     list_filter = ('lab', 'is_required', 'has_challenges')
     search_fields = ('name', 'description')
     
-class ChallengeAdmin(admin.ModelAdmin):
+class ChallengeAdmin(CourseStructureAdmin):
     list_display = ('name', 'part', 'max_points', 'difficulty', 'order')
     list_filter = ('part__lab', 'difficulty')
     search_fields = ('name', 'description')
@@ -59,7 +77,7 @@ admin.site.register(UserRole)
 admin.site.register(Part, PartAdmin)
 admin.site.register(Challenge, ChallengeAdmin)
 admin.site.register(ChallengeScore, ChallengeScoreAdmin)
-admin.site.register(QualityCriteria)
+admin.site.register(QualityCriteria, CourseStructureAdmin)
 admin.site.register(Student)
 admin.site.register(Signoff)
 admin.site.register(QualityScore)
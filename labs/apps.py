@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class LabsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'labs'
+
+    def ready(self):
+        # Keep the materialized score tables in sync with signoff writes
+        from . import signals  # noqa: F401
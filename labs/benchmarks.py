@@ -0,0 +1,175 @@
+"""
+Benchmarks of the report, export and API views.
+
+``run_benchmarks`` requests each view in ``SCENARIOS`` through the Django
+test client as an instructor and records the median wall time, the number of
+queries and the peak Python memory (tracemalloc) of a request, including
+reading the whole response.  ``python manage.py run_benchmarks`` runs them on
+a synthetic course (see ``labs.synthetic``) in a scratch database and writes
+the results to a JSON file, so runs on different commits can be compared.
+"""
+import statistics
+import subprocess
+import time
+import tracemalloc
+from contextlib import contextmanager
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from .models import UserRole, Lab, Part, Student, Signoff
+
+# (name, URL name, URL kwargs, query string); '{lab}', '{part}' and
+# '{student}' are filled with ids from the benchmark data
+SCENARIOS = [
+    # Reports
+    ('reports', 'labs:reports', {}, {}),
+    ('lab_report', 'labs:lab_report', {'lab_id': '{lab}'}, {}),
+    ('student_progress_report', 'labs:student_progress_report', {}, {}),
+    ('ta_report', 'labs:ta_report', {}, {}),
+    ('student_grade_report', 'labs:student_grade_report', {}, {}),
+    ('student_grade_report_student', 'labs:student_grade_report', {'student_id': '{student}'}, {}),
+    # Pages
+    ('lab_detail', 'labs:lab_detail', {'lab_id': '{lab}'}, {}),
+    ('part_detail', 'labs:part_detail', {'part_id': '{part}'}, {}),
+    ('student_detail', 'labs:student_detail', {'student_id': '{student}'}, {}),
+    ('student_list', 'labs:student_list', {}, {}),
+    ('signoff_list', 'labs:signoff_list', {}, {}),
+    ('signoff_list_pending', 'labs:signoff_list', {}, {'status': 'pending'}),
+    # Exports
+    ('export_lab_csv', 'labs:export_lab_csv', {'lab_id': '{lab}'}, {}),
+    ('export_lab_xlsx', 'labs:export_lab_csv', {'lab_id': '{lab}'}, {'format': 'xlsx'}),
+    ('export_part_csv', 'labs:export_part_csv', {'part_id': '{part}'}, {}),
+    ('export_all_data_csv', 'labs:export_all_data', {}, {}),
+    ('export_all_data_xlsx', 'labs:export_all_data', {}, {'format': 'xlsx'}),
+    ('export_student_grades_csv', 'labs:export_student_grades', {}, {}),
+    ('export_gradebook_parquet', 'labs:export_gradebook_parquet', {}, {}),
+    # API
+    ('quick_stats', 'labs:quick_stats', {}, {}),
+    ('student_name_search', 'labs:student_name_search', {}, {'query': 'Student 001'}),
+    ('get_parts', 'labs:get_parts', {}, {'lab_id': '{lab}'}),
+    ('get_criteria', 'labs:get_criteria', {}, {'part_id': '{part}'}),
+    ('get_existing_signoff', 'labs:get_existing_signoff', {}, {'student_id': '{student}', 'lab_id': '{lab}'}),
+    ('get_signoff_details', 'labs:get_signoff_details', {}, {'student_id': '{student}', 'part_id': '{part}'}),
+]
+
+
+@contextmanager
+def scratch_database():
+    """
+    Point the default connection at a throwaway test database for the block.
+
+    The schema is created from the current models rather than by replaying
+    the migrations.
+    """
+    old_name = connection.settings_dict['NAME']
+    connection.settings_dict['TEST']['MIGRATE'] = False
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def benchmark_ids():
+    """Ids to request: the middle lab and part, and a student with a signoff on that part."""
+    labs = list(Lab.objects.order_by('due_date').values_list('id', flat=True))
+    lab = labs[len(labs) // 2]
+    parts = list(Part.objects.filter(lab_id=lab).order_by('order').values_list('id', flat=True))
+    part = parts[len(parts) // 2]
+    signoff = Signoff.objects.filter(part_id=part, student__active=True).order_by('student__name').first()
+    student = signoff.student_id if signoff else Student.objects.order_by('name').first().id
+    return {'lab': lab, 'part': part, 'student': student}
+
+
+def scenario_url(scenario, ids):
+    name, url_name, kwargs, query = scenario
+    url = reverse(url_name, kwargs={key: int(value.format(**ids)) for key, value in kwargs.items()})
+    if query:
+        url += '?' + urlencode({key: value.format(**ids) for key, value in query.items()})
+    return url
+
+
+def read_response(response):
+    """Read the whole body (streamed or not) and return its size in bytes."""
+    try:
+        if response.streaming:
+            return sum(len(chunk) for chunk in response.streaming_content)
+        return len(response.content)
+    finally:
+        response.close()
+
+
+def measure(client, url, repeat):
+    """Median/min wall time over ``repeat`` requests, then queries and peak memory of one more."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        read_response(client.get(url))
+        timings.append((time.perf_counter() - start) * 1000)
+
+    tracemalloc.start()
+    try:
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+            size = read_response(response)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'url': url,
+        'status': response.status_code,
+        'bytes': size,
+        'wall_ms': round(statistics.median(timings), 3),
+        'wall_ms_min': round(min(timings), 3),
+        'queries': len(queries),
+        'peak_memory_kb': round(peak / 1024, 1),
+    }
+
+
+def benchmark_user():
+    user, created = User.objects.get_or_create(username='benchmark_instructor')
+    if created:
+        UserRole.objects.create(user=user, role='instructor')
+    return user
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(repeat=5, names=None, progress=None):
+    """
+    Benchmark the ``SCENARIOS`` (or those named in ``names``) against the
+    current database and return one result dict per scenario.
+    """
+    setup_test_environment()
+    try:
+        client = Client()
+        client.force_login(benchmark_user())
+        ids = benchmark_ids()
+
+        results = []
+        for scenario in SCENARIOS:
+            if names and scenario[0] not in names:
+                continue
+            result = {'name': scenario[0]}
+            result.update(measure(client, scenario_url(scenario, ids), repeat))
+            results.append(result)
+            if progress:
+                progress(result)
+        return results
+    finally:
+        teardown_test_environment()
@@ -0,0 +1,109 @@
+"""
+Caches for derived course figures.
+
+Part max scores are cached in process and in Django's cache framework, keyed
+by part id plus two version counters: one for the part and one shared by all
+parts.  ``labs.signals`` bumps a part's version when its criteria,
+challenges, settings or evaluation sheets change, and the shared version when
+a rubric changes.  The counters are ``CacheVersion`` rows, so every worker
+sees a bump once it commits, whatever the cache backend; with a shared cache
+backend a max score is also computed only once per part per change.
+"""
+import time
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+
+PART_MAX_VERSION_KEY = 'labs:part_max:version'
+PART_MAX_TIMEOUT = 60 * 60 * 24
+
+# part id -> (versions, max score)
+_part_max = {}
+
+
+def _part_version_key(part_id):
+    return f'{PART_MAX_VERSION_KEY}:{part_id}'
+
+
+def get_versions(keys):
+    """Current values of the version counters ``keys``, as a tuple."""
+    from .models import CacheVersion
+
+    versions = dict(CacheVersion.objects.filter(key__in=keys).values_list('key', 'value'))
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        # Start new counters from the current time so that an in-process entry
+        # left by a rolled back counter can never match them
+        CacheVersion.objects.bulk_create(
+            [CacheVersion(key=key, value=time.time_ns()) for key in missing], ignore_conflicts=True
+        )
+        versions.update(CacheVersion.objects.filter(key__in=missing).values_list('key', 'value'))
+    return tuple(versions.get(key) for key in keys)
+
+
+def bump_version(key):
+    """Move a version counter forward; other workers see it when the transaction commits."""
+    from .models import CacheVersion
+
+    # Jump to the current time rather than adding one, so a value is not
+    # reused after a rollback
+    bump = Greatest(F('value') + 1, Value(time.time_ns()))
+    if not CacheVersion.objects.filter(key=key).update(value=bump):
+        get_versions([key])
+        CacheVersion.objects.filter(key=key).update(value=bump)
+
+
+def get_part_max_score(part_id, compute):
+    """
+    Return the cached max score of a part.
+
+    ``compute`` is called to calculate the value when the cached one is
+    missing or out of date.
+    """
+    return get_part_max_scores([part_id], lambda part_ids: {part_id: compute()})[part_id]
+
+
+def get_part_max_scores(part_ids, compute):
+    """
+    Return the cached max scores of several parts as a dict.
+
+    ``compute(part_ids)`` is called once with the parts whose cached value is
+    missing or out of date and returns their max scores as a dict.
+    """
+    part_ids = list(part_ids)
+    keys = [PART_MAX_VERSION_KEY] + [_part_version_key(part_id) for part_id in part_ids]
+    shared, *own = get_versions(keys)
+    versions = {part_id: (shared, version) for part_id, version in zip(part_ids, own)}
+
+    values = {}
+    stale = {}
+    for part_id in part_ids:
+        cached = _part_max.get(part_id)
+        if cached is not None and cached[0] == versions[part_id]:
+            values[part_id] = cached[1]
+        else:
+            stale[f'labs:part_max:{part_id}:{versions[part_id][0]}:{versions[part_id][1]}'] = part_id
+
+    if stale:
+        found = cache.get_many(list(stale))
+        missing = [part_id for key, part_id in stale.items() if key not in found]
+        computed = compute(missing) if missing else {}
+        cache.set_many({key: str(computed[part_id]) for key, part_id in stale.items() if part_id in computed},
+                       PART_MAX_TIMEOUT)
+        for key, part_id in stale.items():
+            value = computed[part_id] if part_id in computed else Decimal(found[key])
+            _part_max[part_id] = (versions[part_id], value)
+            values[part_id] = value
+    return values
+
+
+def invalidate_part_max(part_id):
+    """Mark one part's max score as out of date."""
+    bump_version(_part_version_key(part_id))
+
+
+def invalidate_all_part_max():
+    """Mark every part's max score as out of date."""
+    bump_version(PART_MAX_VERSION_KEY)
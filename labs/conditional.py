@@ -0,0 +1,32 @@
+"""
+Conditional GET for the read-only JSON APIs.
+
+``versioned(fingerprint)`` wraps a view in Django's ``condition``: the ETag
+is a hash of the request path and whatever ``fingerprint(request, ...)``
+returns.  The fingerprint should be cheap (version stamps from
+``labs.cache``, a max ``updated_at``) and change whenever the response would,
+so a client that sends the ETag back in ``If-None-Match`` gets a 304 without
+the view running.  Responses are marked ``private, no-cache`` so browsers
+revalidate them instead of reusing them blindly.
+"""
+import hashlib
+
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+
+
+def etag_for(request, version):
+    """Strong ETag of ``request``'s path and query at ``version``."""
+    key = f'{request.get_full_path()}|{version!r}'
+    return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+
+
+def versioned(fingerprint):
+    """Answer requests whose ``If-None-Match`` matches ``fingerprint``'s version with 304."""
+    def etag_func(request, *args, **kwargs):
+        return etag_for(request, fingerprint(request, *args, **kwargs))
+
+    def decorator(view):
+        return cache_control(private=True, no_cache=True)(condition(etag_func=etag_func)(view))
+
+    return decorator
@@ -0,0 +1,101 @@
+"""
+Process-wide registry of the default rubric and default grade scale.
+
+``EvaluationRubric.get_default_rubric()`` and ``GradeScale.get_default_scale()``
+are called from the innermost scoring loops.  The registry loads each default
+once and keeps it in memory together with the figures derived from it (the
+rubric's total max marks and its 'MR' evaluations), so those loops no longer
+query the database.
+
+``labs.signals`` calls ``invalidate_defaults()`` whenever a rubric or grade
+scale is saved or deleted, which clears this process's registry at once.
+Other workers notice from the database: the registry is versioned by the
+row count and latest ``updated_at`` of both tables, which each process
+checks once per request and at most every ``VERSION_CHECK_INTERVAL`` seconds
+outside requests (commands, export jobs).
+
+The registry instances are shared: treat them as read-only.
+"""
+import time
+
+from django.db.models import Count, Max
+
+VERSION_CHECK_INTERVAL = 1.0
+
+_registry = {}
+_state = {'version': None, 'checked_at': None}
+
+
+def _version():
+    from .models import EvaluationRubric, GradeScale
+
+    rubrics = EvaluationRubric.objects.aggregate(count=Count('id'), updated_at=Max('updated_at'))
+    scales = GradeScale.objects.aggregate(count=Count('id'), updated_at=Max('updated_at'))
+    return tuple(rubrics.values()) + tuple(scales.values())
+
+
+def _sync():
+    """Drop the registry if another process changed a default."""
+    now = time.monotonic()
+    if _state['checked_at'] is not None and now - _state['checked_at'] < VERSION_CHECK_INTERVAL:
+        return
+    version = _version()
+    if version != _state['version']:
+        _registry.clear()
+        _state['version'] = version
+    _state['checked_at'] = now
+
+
+def _get(name, load):
+    _sync()
+    if name not in _registry:
+        _registry[name] = load()
+    return _registry[name]
+
+
+def _load_rubric():
+    from .models import EvaluationRubric
+
+    rubric = EvaluationRubric.load_default_rubric()
+    return {
+        'rubric': rubric,
+        'total_max_marks': rubric.get_total_max_marks(),
+        'criteria_keys': tuple(rubric.criteria_data.keys()),
+    }
+
+
+def _load_scale():
+    from .models import GradeScale
+
+    return GradeScale.load_default_scale()
+
+
+def get_default_rubric():
+    """The default ``EvaluationRubric``, created if missing."""
+    return _get('rubric', _load_rubric)['rubric']
+
+
+def get_default_rubric_max_marks():
+    """Total max marks of the default rubric."""
+    return _get('rubric', _load_rubric)['total_max_marks']
+
+
+def get_default_evaluations():
+    """A new evaluations dict with every default rubric criterion at 'MR'."""
+    return {key: 'MR' for key in _get('rubric', _load_rubric)['criteria_keys']}
+
+
+def get_default_scale():
+    """The default ``GradeScale``, created if missing."""
+    return _get('scale', _load_scale)
+
+
+def check_on_next_use():
+    """Compare the registry with the database the next time it is read."""
+    _state['checked_at'] = None
+
+
+def invalidate_defaults():
+    """Forget this process's cached defaults; other processes follow on their next check."""
+    _registry.clear()
+    _state['checked_at'] = None
@@ -0,0 +1,613 @@
+"""
+Streaming CSV exports.
+
+Each export is a generator pipeline: header generators yield the metadata and
+grade-scale blocks, a row producer yields one CSV row per student, and
+trailer generators yield the closing grade-scale block.  ``stream_csv`` feeds
+the rows through ``csv.writer`` into a ``StreamingHttpResponse``, so the
+first bytes go out immediately and the body is never held in memory.
+
+Student data is loaded ``EXPORT_CHUNK_SIZE`` students at a time through
+``Gradebook.with_students``; the course structure is loaded once.
+"""
+import csv
+from decimal import Decimal
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from .gradebook import Gradebook, criterion_earned_marks, earned_marks
+from .models import Student, EvaluationSheet
+
+EXPORT_CHUNK_SIZE = 200
+
+
+class Echo:
+    """File-like object whose ``write`` returns the value instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(rows, filename):
+    """Stream an iterable of CSV rows as a file download."""
+    writer = csv.writer(Echo())
+    response = StreamingHttpResponse(
+        (writer.writerow(row) for row in rows),
+        content_type='text/csv'
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def student_chunks(gradebook, students, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield gradebooks for consecutive chunks of ``students``."""
+    for start in range(0, len(students), chunk_size):
+        yield gradebook.with_students(students[start:start + chunk_size])
+
+
+def active_students():
+    return list(Student.objects.filter(active=True).order_by('name'))
+
+
+def submission_details(signoff, due_date):
+    """Return (submission, signoff date, days late) CSV cells for a signoff."""
+    if not signoff:
+        return "N/A", "N/A", "N/A"
+
+    signoff_date = signoff.date_updated.strftime('%Y-%m-%d %H:%M')
+
+    if due_date and signoff.date_updated > due_date:
+        submission_info = "Late"
+        # Calculate days late
+        delta = signoff.date_updated - due_date
+        days_late = str(delta.days)
+        if delta.seconds > 0 and delta.days == 0:
+            days_late = "<1"  # Less than a day late
+    else:
+        submission_info = "On Time" if due_date else "No Due Date"
+        days_late = "0" if due_date else "N/A"
+
+    return submission_info, signoff_date, days_late
+
+
+def grade_scale_rows(grade_scale):
+    """CSV rows listing the thresholds of a grade scale."""
+    yield ['Grade', 'Threshold (%)']
+    yield ['A+', f">= {grade_scale.a_plus_threshold}"]
+    yield ['A', f">= {grade_scale.a_threshold}"]
+    yield ['A-', f">= {grade_scale.a_minus_threshold}"]
+    yield ['B+', f">= {grade_scale.b_plus_threshold}"]
+    yield ['B', f">= {grade_scale.b_threshold}"]
+    yield ['B-', f">= {grade_scale.b_minus_threshold}"]
+    yield ['C+', f">= {grade_scale.c_plus_threshold}"]
+    yield ['C', f">= {grade_scale.c_threshold}"]
+    yield ['C-', f">= {grade_scale.c_minus_threshold}"]
+    yield ['D+', f">= {grade_scale.d_plus_threshold}"]
+    yield ['D', f">= {grade_scale.d_threshold}"]
+    yield ['D-', f">= {grade_scale.d_minus_threshold}"]
+    yield ['F', f"< {grade_scale.d_minus_threshold}"]
+
+
+def grade_scale_header(grade_scale, title='Grading Scale Information', description_label='Scale Description'):
+    """Grade-scale block written above the student rows."""
+    yield []  # Empty row as separator
+    yield [title]
+    yield ['Scale Name', grade_scale.name]
+    yield [description_label, grade_scale.description]
+    yield from grade_scale_rows(grade_scale)
+    yield []  # Empty row as separator
+
+
+def grade_scale_trailer(grade_scale, title='Grading Scale Information', spacer=False):
+    """Grade-scale block written below the student rows."""
+    yield []  # Separator row
+    yield [title]
+    yield ['Scale Name', grade_scale.name]
+    yield ['Description', grade_scale.description]
+    if spacer:
+        yield []
+    yield from grade_scale_rows(grade_scale)
+
+
+# Lab export
+
+def lab_header(gradebook, lab, grade_scale):
+    yield ['Lab', lab.name]
+    yield ['Description', lab.description]
+    yield ['Due Date', lab.due_date.strftime('%Y-%m-%d %H:%M')]
+    yield ['Max Points (Calculated)', str(gradebook.lab_max_score(lab))]
+    yield ['Total Points (Configured)', str(lab.total_points)]
+    yield ['Grade Scale', grade_scale.name]
+
+    # Add detailed grade scale information
+    yield []  # Empty row as separator
+    yield ['Grade Scale Details', grade_scale.name]
+    yield ['Description', grade_scale.description]
+    yield from grade_scale_rows(grade_scale)
+    yield []  # Empty row as separator
+
+
+def lab_criteria_columns(gradebook, parts):
+    """Sorted "<part>_Quality_<name>" / "<part>_Eval_<name>" column keys."""
+    all_criteria = set()
+    for part in parts:
+        # Get quality criteria for each part
+        for criteria in gradebook.criteria(part):
+            all_criteria.add(f"{part.name}_Quality_{criteria.name}")
+
+        # For each part, add the criteria of every rubric used by its evaluation sheets
+        for rubric in gradebook.part_rubrics(part):
+            for criterion in rubric.criteria_data.values():
+                all_criteria.add(f"{part.name}_Eval_{criterion['name']}")
+    return sorted(all_criteria)
+
+
+def lab_student_row(gradebook, lab, student, parts, criteria_columns):
+    row = [
+        student.student_id,
+        student.name,
+        student.email,
+        student.batch.strftime('%Y-%m-%d')
+    ]
+
+    # Add part status and late submission info
+    for part in parts:
+        signoff = gradebook.signoff(student, part)
+        row.append(signoff.status if signoff else 'not_started')
+        row.extend(submission_details(signoff, part.due_date))
+
+    # Add criteria scores
+    criteria_dict = {}
+    for part in parts:
+        # Get the student's signoff for this part
+        signoff = gradebook.signoff(student, part)
+        if not signoff:
+            continue
+
+        # Add quality criteria scores
+        for criteria in gradebook.criteria(part):
+            score = gradebook.quality_score(signoff, criteria)
+            if score:
+                criteria_key = f"{part.name}_Quality_{criteria.name}"
+                criteria_dict[criteria_key] = f"{score.score}/{criteria.max_points}"
+
+        # Add evaluation rubric scores if available
+        eval_sheet = gradebook.evaluation_sheet(signoff)
+        if eval_sheet and eval_sheet.rubric:
+            criteria_data = eval_sheet.rubric.criteria_data
+            for criterion_key, criterion in criteria_data.items():
+                key = f"{part.name}_Eval_{criterion['name']}"
+                earned = criterion_earned_marks(criteria_data, eval_sheet.evaluations, criterion_key)
+                max_marks = Decimal(str(criterion['max_marks']))
+                criteria_dict[key] = f"{earned}/{max_marks}"
+
+    # Add criteria data in the correct order
+    for criteria_key in criteria_columns:
+        row.append(criteria_dict.get(criteria_key, "N/A"))
+
+    # Add total scores
+    student_score = gradebook.lab_student_score(lab, student)
+    percentage = gradebook.lab_student_percentage(lab, student)
+    row.append(f"{student_score}/{gradebook.lab_max_score(lab)}")
+    row.append(f"{percentage:.2f}%")
+    row.append(gradebook.lab_grade_letter(lab, student))
+    return row
+
+
+def lab_rows(lab_id):
+    """Rows of the per-lab export for all active students."""
+    gradebook = Gradebook(students=[])
+    lab = gradebook.lab_by_id[lab_id]
+    grade_scale = gradebook.grade_scale(lab)
+    parts = gradebook.parts(lab)
+
+    yield from lab_header(gradebook, lab, grade_scale)
+
+    criteria_columns = lab_criteria_columns(gradebook, parts)
+
+    # Create header row
+    header = ['Student ID', 'Student Name', 'Email', 'Batch']
+
+    # Add each part's status and late submission info
+    for part in parts:
+        header.append(f"{part.name} Status")
+        header.append(f"{part.name} Submission")
+        header.append(f"{part.name} Signoff Date")
+        header.append(f"{part.name} Days Late")
+
+    # Add each criteria
+    header.extend(criteria_columns)
+
+    # Add total scores
+    header.extend(['Total Score', 'Percentage', f'Letter Grade ({grade_scale.name})'])
+    yield header
+
+    # Write data for each student (only active students)
+    for chunk in student_chunks(gradebook, active_students()):
+        for student in chunk.students:
+            yield lab_student_row(chunk, lab, student, parts, criteria_columns)
+
+    yield from grade_scale_trailer(grade_scale, title='Grade Scale Information', spacer=True)
+
+
+# Part export
+
+def part_header(part):
+    yield ['Part', part.name]
+    yield ['Lab', part.lab.name]
+    yield ['Description', part.description]
+    if part.due_date:
+        yield ['Due Date', part.due_date.strftime('%Y-%m-%d %H:%M')]
+    else:
+        yield ['Due Date', 'Not set']
+    yield []  # Empty row as separator
+
+
+def part_student_row(gradebook, part, student, quality_criteria, rubric_criteria):
+    signoff = gradebook.signoff(student, part)
+    status = signoff.status if signoff else 'not_started'
+
+    row = [
+        student.student_id,
+        student.name,
+        student.email,
+        student.batch.strftime('%Y-%m-%d'),
+        status
+    ]
+    row.extend(submission_details(signoff, part.due_date))
+
+    if not signoff:
+        # If no signoff exists, add N/A for all criteria and the four total columns
+        row.extend(["N/A"] * (len(quality_criteria) + len(rubric_criteria) + 4))
+        return row
+
+    # Add quality criteria scores
+    quality_scores_dict = {}
+    quality_total = Decimal('0')
+    quality_max = Decimal('0')
+    for criteria in quality_criteria:
+        score = gradebook.quality_score(signoff, criteria)
+        if score:
+            quality_scores_dict[criteria.name] = f"{score.score}/{criteria.max_points}"
+            quality_total += Decimal(str(score.score))
+        quality_max += Decimal(str(criteria.max_points))
+
+    # Add evaluation rubric scores if available
+    rubric_scores_dict = {}
+    eval_total = Decimal('0')
+    eval_max = Decimal('0')
+    eval_sheet = gradebook.evaluation_sheet(signoff)
+    if eval_sheet and eval_sheet.rubric:
+        criteria_data = eval_sheet.rubric.criteria_data
+        for criterion_key, criterion in criteria_data.items():
+            earned = criterion_earned_marks(criteria_data, eval_sheet.evaluations, criterion_key)
+            max_marks = Decimal(str(criterion['max_marks']))
+            rubric_scores_dict[criterion['name']] = f"{earned}/{max_marks}"
+            eval_max += max_marks
+        eval_total = earned_marks(criteria_data, eval_sheet.evaluations)
+
+    # Add quality criteria data in the correct order
+    for criteria in quality_criteria:
+        row.append(quality_scores_dict.get(criteria.name, "N/A"))
+
+    # Add rubric criteria data in the correct order
+    for criteria_name in rubric_criteria:
+        row.append(rubric_scores_dict.get(criteria_name, "N/A"))
+
+    # Add totals to row
+    student_score = gradebook.part_student_score(part, student)
+    row.append(f"{quality_total}/{quality_max}")
+    row.append(f"{eval_total}/{eval_max}")
+    row.append(f"{student_score}/{gradebook.part_max_score(part)}")
+    row.append(f"{gradebook.part_student_percentage(part, student):.2f}%")
+    return row
+
+
+def part_rows(part_id):
+    """Rows of the per-part export for all active students."""
+    gradebook = Gradebook(students=[])
+    part = gradebook.part_by_id[part_id]
+
+    yield from part_header(part)
+
+    # Get quality criteria for this part
+    quality_criteria = gradebook.criteria(part)
+
+    # Collect evaluation criteria from rubrics
+    rubric_criteria = set()
+    for rubric in gradebook.part_rubrics(part):
+        for criterion in rubric.criteria_data.values():
+            rubric_criteria.add(criterion['name'])
+    rubric_criteria = sorted(rubric_criteria)
+
+    # Create header row
+    header = ['Student ID', 'Student Name', 'Email', 'Batch', 'Status', 'Submission', 'Signoff Date', 'Days Late']
+
+    # Add quality criteria columns
+    for criteria in quality_criteria:
+        header.append(f"Quality: {criteria.name}")
+
+    # Add rubric criteria columns
+    for criteria_name in rubric_criteria:
+        header.append(f"Rubric: {criteria_name}")
+
+    # Add total scores
+    header.extend(['Quality Total', 'Evaluation Total', 'Combined Total', 'Percentage'])
+    yield header
+
+    # Write data for each student
+    for chunk in student_chunks(gradebook, active_students()):
+        for student in chunk.students:
+            yield part_student_row(chunk, part, student, quality_criteria, rubric_criteria)
+
+
+# Student grade export
+
+def student_grade_columns(gradebook):
+    """(quality criteria, challenges, rubric criteria) column descriptors, sorted."""
+    all_quality_criteria = []
+    all_rubric_criteria = set()
+    all_challenges = []
+
+    for lab in gradebook.labs:
+        for part in gradebook.parts(lab):
+            # Get quality criteria
+            for criteria in gradebook.criteria(part):
+                all_quality_criteria.append((lab.name, part.name, criteria.name, criteria, part))
+
+            # Get challenges if the part has them
+            if part.has_challenges:
+                for challenge in gradebook.challenges(part):
+                    all_challenges.append((lab.name, part.name, challenge.name, challenge, part))
+
+            # Get rubric criteria
+            for rubric in gradebook.part_rubrics(part):
+                for criterion_key, criterion in rubric.criteria_data.items():
+                    all_rubric_criteria.add((lab.name, part.name, criterion['name'], criterion_key, part.id))
+
+    # Sort criteria lists
+    all_quality_criteria.sort(key=lambda c: c[:3] + (c[3].id,))
+    all_challenges.sort(key=lambda c: c[:3] + (c[3].id,))
+    return all_quality_criteria, all_challenges, sorted(all_rubric_criteria)
+
+
+def student_grade_row(gradebook, student, columns, grade_scale):
+    quality_columns, challenge_columns, rubric_columns = columns
+    status_names = dict(EvaluationSheet.STATUS_CHOICES)
+    row = [
+        student.student_id,
+        student.name,
+        student.email,
+        student.batch.strftime('%Y-%m-%d')
+    ]
+
+    # Calculate student's overall points
+    earned_points, total_points = gradebook.student_points(student)
+
+    # Add lab grades and part status to row
+    for lab in gradebook.labs:
+        percentage = gradebook.lab_student_percentage(lab, student)
+        row.append(gradebook.lab_grade_letter(lab, student))
+        row.append(f"{percentage:.2f}%")
+
+        # Add part status and submission info
+        for part in gradebook.parts(lab):
+            signoff = gradebook.signoff(student, part)
+            row.append(signoff.status if signoff else 'not_started')
+            row.extend(submission_details(signoff, part.due_date))
+
+    # Add quality criteria scores
+    for _, _, _, criteria, part in quality_columns:
+        signoff = gradebook.signoff(student, part)
+        score = gradebook.quality_score(signoff, criteria) if signoff else None
+        row.append(f"{score.score}/{criteria.max_points}" if score else "N/A")
+
+    # Add challenge scores
+    for _, _, _, challenge, part in challenge_columns:
+        signoff = gradebook.signoff(student, part)
+        score = gradebook.challenge_score(signoff, challenge) if signoff else None
+        row.append(f"{score.score}/{challenge.max_points}" if score else "N/A")
+
+    # Add rubric criteria scores
+    for _, _, _, criterion_key, part_id in rubric_columns:
+        signoff = gradebook.signoff(student, gradebook.part_by_id[part_id])
+        eval_sheet = gradebook.evaluation_sheet(signoff) if signoff else None
+        if eval_sheet and eval_sheet.rubric and criterion_key in eval_sheet.rubric.criteria_data:
+            criteria_data = eval_sheet.rubric.criteria_data
+            status = eval_sheet.evaluations.get(criterion_key, 'ND')
+            earned = criterion_earned_marks(criteria_data, eval_sheet.evaluations, criterion_key)
+            max_marks = Decimal(str(criteria_data[criterion_key]['max_marks']))
+            row.append(f"{earned}/{max_marks} ({status_names.get(status, 'ND')})")
+        else:
+            row.append("N/A")
+
+    # Add overall scores
+    overall_grade = gradebook.overall_grade(student)
+    letter_grade = gradebook.course_letter_grade(student)
+
+    # Note in the CSV which grade scale was used
+    row.append(f"{earned_points}/{total_points}")  # Raw points
+    row.append(f"{overall_grade:.2f}%")  # Percentage
+    row.append(f"{letter_grade} (Using {grade_scale.name})")  # Letter grade with scale info
+    return row
+
+
+def student_grade_rows(students, progress=None):
+    """
+    Rows of the student grade export for ``students``.
+
+    ``progress(done, total)`` is called after each chunk of students.
+    """
+    gradebook = Gradebook(students=[])
+    labs = gradebook.labs
+
+    # Write metadata header
+    yield ['Student Grade Report']
+    yield ['Generated on', timezone.now().strftime('%Y-%m-%d %H:%M')]
+    yield ['Total Students', str(len(students))]
+    yield ['Total Labs', str(len(labs))]
+
+    # Use the first lab's grade scale if available, otherwise the default
+    grade_scale = gradebook.course_grade_scale()
+    yield from grade_scale_header(grade_scale)
+
+    columns = student_grade_columns(gradebook)
+    quality_columns, challenge_columns, rubric_columns = columns
+
+    # Create header row
+    header = ['Student ID', 'Student Name', 'Email', 'Batch']
+
+    # Add lab and part status columns
+    for lab in labs:
+        header.append(f"{lab.name} - Grade ({gradebook.grade_scale(lab).name})")
+        header.append(f"{lab.name} - Percentage")
+
+        for part in gradebook.parts(lab):
+            header.append(f"{lab.name} - {part.name} - Status")
+            header.append(f"{lab.name} - {part.name} - Submission")
+            header.append(f"{lab.name} - {part.name} - Signoff Date")
+            header.append(f"{lab.name} - {part.name} - Days Late")
+
+    # Add quality criteria, challenge and rubric criteria columns
+    for lab_name, part_name, criteria_name, _, _ in quality_columns:
+        header.append(f"{lab_name} - {part_name} - Quality: {criteria_name}")
+    for lab_name, part_name, challenge_name, _, _ in challenge_columns:
+        header.append(f"{lab_name} - {part_name} - Challenge: {challenge_name}")
+    for lab_name, part_name, criteria_name, _, _ in rubric_columns:
+        header.append(f"{lab_name} - {part_name} - Rubric: {criteria_name}")
+
+    # Add overall score
+    header.extend(['Overall Score', 'Overall Percentage', 'Overall Grade (with scale)'])
+    yield header
+
+    # Write data for each student
+    done = 0
+    for chunk in student_chunks(gradebook, students):
+        for student in chunk.students:
+            yield student_grade_row(chunk, student, columns, grade_scale)
+        done += len(chunk.students)
+        if progress:
+            progress(done, len(students))
+
+
+# Complete export
+
+def all_data_student_row(gradebook, student):
+    row = [
+        student.student_id,
+        student.name,
+        student.email,
+        student.batch.strftime("%Y-%m-%d"),
+        "Active" if student.active else "Inactive"
+    ]
+
+    # Add overall grade
+    overall_grade = gradebook.overall_grade(student)
+    row.append(f"{overall_grade:.2f}%")
+    row.append(gradebook.course_letter_grade(student))
+
+    # Add lab grades
+    for lab in gradebook.labs:
+        percentage = gradebook.lab_student_percentage(lab, student)
+        row.append(f"{percentage:.2f}%")
+        row.append(gradebook.lab_grade_letter(lab, student))
+
+    # Add part statuses and scores
+    for lab in gradebook.labs:
+        for part in gradebook.parts(lab):
+            signoff = gradebook.signoff(student, part)
+            status = signoff.status if signoff else "not_started"
+            score = "-"
+            quality_score = "N/A"
+            eval_score = "N/A"
+
+            if signoff:
+                # Calculate quality criteria total
+                quality_total = Decimal('0')
+                quality_max = Decimal('0')
+                for criteria in gradebook.criteria(part):
+                    quality_max += Decimal(str(criteria.max_points))
+                    criteria_score = gradebook.quality_score(signoff, criteria)
+                    if criteria_score:
+                        quality_total += Decimal(str(criteria_score.score))
+
+                # Calculate evaluation total
+                eval_total = Decimal('0')
+                eval_max = Decimal('0')
+                eval_sheet = gradebook.evaluation_sheet(signoff)
+                if eval_sheet and eval_sheet.rubric:
+                    criteria_data = eval_sheet.rubric.criteria_data
+                    eval_total = earned_marks(criteria_data, eval_sheet.evaluations)
+                    for criterion in criteria_data.values():
+                        eval_max += Decimal(str(criterion['max_marks']))
+
+                quality_score = f"{quality_total}/{quality_max}"
+                eval_score = f"{eval_total}/{eval_max}"
+
+                if status == "approved":
+                    score = f"{gradebook.part_student_score(part, student)} / {gradebook.part_max_score(part)}"
+
+            row.append(status)
+            row.extend(submission_details(signoff, part.due_date))
+            row.append(quality_score)
+            row.append(eval_score)
+            row.append(score)
+    return row
+
+
+def all_data_rows(progress=None):
+    """
+    Rows of the complete export for all active students.
+
+    ``progress(done, total)`` is called after each chunk of students.
+    """
+    gradebook = Gradebook(students=[])
+    labs = gradebook.labs
+    students = active_students()
+
+    # Write metadata header rows
+    yield ["Complete Lab Report"]
+    yield ["Generated on", timezone.now().strftime("%Y-%m-%d %H:%M")]
+    yield ["Total Students", str(len(students))]
+    yield ["Total Labs", str(len(labs))]
+    yield []  # Empty row as separator
+
+    # Use the first lab's grade scale if available, otherwise the default
+    grade_scale = gradebook.course_grade_scale()
+
+    # Create header row
+    header = ["Student ID", "Student Name", "Email", "Batch", "Status"]
+
+    # Add overall grade columns
+    header.append("Overall Grade (out of 100%)")
+    header.append(f"Letter Grade ({grade_scale.name})")
+
+    # Add lab grade columns
+    for lab in labs:
+        lab_grade_scale = lab.grade_scale.name if lab.grade_scale else grade_scale.name
+        header.append(f"{lab.name} - Grade (%)")
+        header.append(f"{lab.name} - Letter ({lab_grade_scale})")
+
+    # Add part status columns
+    for lab in labs:
+        for part in gradebook.parts(lab):
+            header.append(f"{lab.name} - {part.name} - Status")
+            header.append(f"{lab.name} - {part.name} - Submission")
+            header.append(f"{lab.name} - {part.name} - Signoff Date")
+            header.append(f"{lab.name} - {part.name} - Days Late")
+            header.append(f"{lab.name} - {part.name} - Quality Score")
+            header.append(f"{lab.name} - {part.name} - Evaluation Score")
+            header.append(f"{lab.name} - {part.name} - Total Score")
+    yield header
+
+    # Write data for each student
+    done = 0
+    for chunk in student_chunks(gradebook, students):
+        for student in chunk.students:
+            yield all_data_student_row(chunk, student)
+        done += len(chunk.students)
+        if progress:
+            progress(done, len(students))
+
+    yield from grade_scale_trailer(grade_scale)
@@ -0,0 +1,404 @@
+"""
+Set-based gradebook engine.
+
+The score methods on the models (``Lab.get_student_score``,
+``Part.get_student_score``, ``Signoff.get_total_quality_score`` ...) work on one
+student and one part at a time and issue their own queries on every call.  The
+reports and exports call them inside student x lab x part loops, which adds up
+to tens of thousands of queries for a full course.
+
+``Gradebook`` loads the signoffs, quality scores, challenge scores, evaluation
+sheets and rubrics for a set of students in a fixed number of queries and
+computes the same numbers in memory.
+"""
+import copy
+from collections import defaultdict
+from decimal import Decimal
+
+from .cache import get_part_max_scores
+from .defaults import get_default_rubric_max_marks
+from .models import (
+    Lab, Part, QualityCriteria, Challenge, Student, Signoff, QualityScore,
+    ChallengeScore, EvaluationSheet, EvaluationRubric, GradeScale,
+)
+
+
+def rubric_max_marks(criteria_data):
+    """Total max marks of a rubric, mirroring ``EvaluationSheet.get_total_max_marks``."""
+    total = Decimal('0')
+    for criteria in criteria_data.values():
+        if isinstance(criteria, dict) and 'max_marks' in criteria:
+            try:
+                total += Decimal(str(criteria['max_marks']))
+            except (ValueError, TypeError, ArithmeticError):
+                total += Decimal('5.0')
+    return total
+
+
+def criterion_earned_marks(criteria_data, evaluations, key):
+    """Earned marks for one rubric criterion, mirroring ``EvaluationSheet.get_criterion_earned_marks``."""
+    criteria = criteria_data.get(key)
+    if key not in evaluations or not isinstance(criteria, dict) or 'max_marks' not in criteria:
+        return Decimal('0')
+    try:
+        max_marks = Decimal(str(criteria['max_marks']))
+    except (ValueError, TypeError, ArithmeticError):
+        return Decimal('0')
+    status = evaluations.get(key, 'ND')
+    return max_marks * Decimal(str(EvaluationSheet.STATUS_TO_SCORE.get(status, 0)))
+
+
+def earned_marks(criteria_data, evaluations):
+    """Total earned marks of an evaluation, mirroring ``EvaluationSheet.get_earned_marks``."""
+    total = Decimal('0')
+    for key in evaluations:
+        if key in criteria_data:
+            total += criterion_earned_marks(criteria_data, evaluations, key)
+    return total
+
+
+def default_quality_score(criterion):
+    """Score a missing ``QualityScore`` row contributes (``QualityCriteria.get_default_score``)."""
+    return Decimal(str(criterion.get_default_score()))
+
+
+class Gradebook:
+    """
+    In-memory student x part score matrix.
+
+    All labs and parts are loaded so that course-wide figures (overall grade,
+    completion) match the model methods.  Signoffs and their scores are loaded
+    for ``students`` (all students by default).
+    """
+
+    def __init__(self, students=None):
+        self._load_structure()
+        if students is None:
+            students = Student.objects.all()
+        self._load_students(students)
+
+    def with_students(self, students):
+        """
+        A gradebook for other students that reuses this one's course structure.
+
+        Exports use it to load student data in chunks.
+        """
+        gradebook = copy.copy(self)
+        gradebook._load_students(students)
+        return gradebook
+
+    def _load_structure(self):
+        # Course structure
+        self.labs = list(Lab.objects.select_related('grade_scale').order_by('name'))
+        self.lab_by_id = {lab.id: lab for lab in self.labs}
+        self.parts_by_lab = defaultdict(list)
+        self.part_by_id = {}
+        for part in Part.objects.order_by('lab', 'order', 'id'):
+            part.lab = self.lab_by_id[part.lab_id]
+            self.parts_by_lab[part.lab_id].append(part)
+            self.part_by_id[part.id] = part
+
+        self.criteria_by_part = defaultdict(list)
+        for criterion in QualityCriteria.objects.order_by('part', 'name', 'id'):
+            self.criteria_by_part[criterion.part_id].append(criterion)
+
+        self.challenges_by_part = defaultdict(list)
+        for challenge in Challenge.objects.order_by('part', 'order', 'id'):
+            self.challenges_by_part[challenge.part_id].append(challenge)
+
+        self.rubrics = {rubric.id: rubric for rubric in EvaluationRubric.objects.all()}
+        self.default_rubric = EvaluationRubric.get_default_rubric()
+        self.rubrics.setdefault(self.default_rubric.id, self.default_rubric)
+        self.default_scale = GradeScale.get_default_scale()
+
+        # Rubrics used by any evaluation sheet of each part (all students),
+        # loaded on first use; shared with the with_students() copies
+        self._part_rubric_ids = {}
+        self._part_max = get_part_max_scores(self.part_by_id, self._compute_part_max_scores)
+
+    def _load_students(self, students):
+        self.students = list(students)
+        student_ids = [s.id for s in self.students]
+        self._letter_grades = {}
+
+        # Student data
+        self.signoffs = {}
+        self.signoff_by_id = {}
+        signoffs = Signoff.objects.filter(student_id__in=student_ids).select_related('instructor')
+        for signoff in signoffs:
+            signoff.part = self.part_by_id[signoff.part_id]
+            self.signoffs[(signoff.student_id, signoff.part_id)] = signoff
+            self.signoff_by_id[signoff.id] = signoff
+
+        self.quality_scores = defaultdict(dict)
+        for score in QualityScore.objects.filter(signoff__student_id__in=student_ids):
+            self.quality_scores[score.signoff_id][score.criteria_id] = score
+
+        self.challenge_scores = defaultdict(dict)
+        for score in ChallengeScore.objects.filter(signoff__student_id__in=student_ids):
+            self.challenge_scores[score.signoff_id][score.challenge_id] = score
+
+        # Signoff.evaluation_sheet.first() is the sheet with the lowest pk
+        self.evaluation_sheets = {}
+        sheets = EvaluationSheet.objects.filter(signoff__student_id__in=student_ids).order_by('id')
+        for sheet in sheets:
+            if sheet.signoff_id not in self.evaluation_sheets:
+                sheet.rubric = self.rubrics.get(sheet.rubric_id)
+                self.evaluation_sheets[sheet.signoff_id] = sheet
+
+    def _compute_part_max_scores(self, part_ids):
+        """Compute ``Part.get_max_score`` for the parts ``part_ids``."""
+        # Part.get_max_score uses the rubric of the most recently updated signoff
+        # whose first evaluation sheet has one, across all students.
+        part_rubric = {}
+        seen_signoffs = set()
+        sheets = EvaluationSheet.objects.filter(signoff__part_id__in=part_ids).order_by(
+            '-signoff__date_updated', 'signoff_id', 'id'
+        ).values_list('signoff__part_id', 'signoff_id', 'rubric_id')
+        for part_id, signoff_id, rubric_id in sheets.iterator():
+            if signoff_id in seen_signoffs:
+                continue
+            seen_signoffs.add(signoff_id)
+            if rubric_id is not None and part_id not in part_rubric:
+                part_rubric[part_id] = rubric_id
+                if len(part_rubric) == len(part_ids):
+                    break
+
+        try:
+            default_max = get_default_rubric_max_marks()
+        except Exception:
+            default_max = Decimal('60.0')
+
+        max_scores = {}
+        for part_id in part_ids:
+            part = self.part_by_id[part_id]
+            total = self.criteria_max_score(part) + self.challenge_max_score(part)
+            rubric = self.rubrics.get(part_rubric.get(part.id))
+            if rubric is not None:
+                total += rubric_max_marks(rubric.criteria_data)
+            else:
+                total += default_max
+            max_scores[part.id] = total
+        return max_scores
+
+    # Structure
+
+    def parts(self, lab):
+        """Parts of a lab in display order."""
+        return self.parts_by_lab[lab.id]
+
+    def criteria(self, part):
+        return self.criteria_by_part[part.id]
+
+    def challenges(self, part):
+        return self.challenges_by_part[part.id]
+
+    def part_rubrics(self, part):
+        """Rubrics used by any evaluation sheet of a part, across all students."""
+        if not self._part_rubric_ids:
+            sheets = EvaluationSheet.objects.filter(rubric__isnull=False).values_list('signoff__part_id', 'rubric_id')
+            for part_id, rubric_id in sheets.order_by().distinct():
+                self._part_rubric_ids.setdefault(part_id, set()).add(rubric_id)
+            # Loaded, even when no sheet has a rubric
+            self._part_rubric_ids.setdefault(None, set())
+        return [self.rubrics[rubric_id] for rubric_id in sorted(self._part_rubric_ids.get(part.id, ()))]
+
+    def grade_scale(self, lab):
+        """The lab's grade scale, or the default scale."""
+        return lab.grade_scale if lab.grade_scale_id else self.default_scale
+
+    def course_grade_scale(self):
+        """Grade scale used for course grades (first lab with a scale, else default)."""
+        for lab in sorted(self.labs, key=lambda l: l.id):
+            if lab.grade_scale_id:
+                return lab.grade_scale
+        return self.default_scale
+
+    # Signoff data
+
+    def signoff(self, student, part):
+        return self.signoffs.get((student.id, part.id))
+
+    def part_status(self, student, part):
+        signoff = self.signoff(student, part)
+        return signoff.status if signoff else 'not_started'
+
+    def quality_score(self, signoff, criterion):
+        """The stored ``QualityScore`` row, or None."""
+        return self.quality_scores[signoff.id].get(criterion.id)
+
+    def challenge_score(self, signoff, challenge):
+        """The stored ``ChallengeScore`` row, or None."""
+        return self.challenge_scores[signoff.id].get(challenge.id)
+
+    def evaluation_sheet(self, signoff):
+        """The signoff's evaluation sheet, or None."""
+        return self.evaluation_sheets.get(signoff.id)
+
+    def evaluation_earned_marks(self, signoff):
+        """Earned rubric marks; a missing sheet counts as 'MR' on the default rubric."""
+        sheet = self.evaluation_sheet(signoff)
+        if sheet is None:
+            criteria_data = self.default_rubric.criteria_data
+            return earned_marks(criteria_data, {key: 'MR' for key in criteria_data})
+        if not sheet.rubric:
+            return Decimal('0')
+        return earned_marks(sheet.rubric.criteria_data, sheet.evaluations)
+
+    def evaluation_max_marks(self, signoff):
+        """Max rubric marks of the signoff's sheet (default rubric when missing)."""
+        sheet = self.evaluation_sheet(signoff)
+        if sheet is None:
+            return rubric_max_marks(self.default_rubric.criteria_data)
+        if not sheet.rubric:
+            return Decimal('0')
+        return rubric_max_marks(sheet.rubric.criteria_data)
+
+    def signoff_criteria_score(self, signoff):
+        """Quality criteria points of a signoff, without the evaluation sheet."""
+        total = Decimal('0')
+        scores = self.quality_scores[signoff.id]
+        for criterion in self.criteria_by_part[signoff.part_id]:
+            score = scores.get(criterion.id)
+            if score is not None:
+                total += Decimal(str(score.score))
+            else:
+                total += default_quality_score(criterion)
+        return total
+
+    def signoff_quality_score(self, signoff):
+        """Same as ``Signoff.get_total_quality_score``."""
+        return self.signoff_criteria_score(signoff) + self.evaluation_earned_marks(signoff)
+
+    def criteria_max_score(self, part):
+        """Sum of the max points of a part's quality criteria."""
+        return sum((Decimal(str(c.max_points)) for c in self.criteria_by_part[part.id]), Decimal('0'))
+
+    def challenge_max_score(self, part):
+        """Sum of the max points of a part's challenges (0 without challenges)."""
+        if not part.has_challenges:
+            return Decimal('0')
+        return sum((Decimal(str(c.max_points)) for c in self.challenges_by_part[part.id]), Decimal('0'))
+
+    def signoff_challenge_score(self, signoff):
+        """Sum of stored challenge scores (as ``Part.get_student_score`` adds them)."""
+        if not self.part_by_id[signoff.part_id].has_challenges:
+            return Decimal('0')
+        total = Decimal('0')
+        for score in self.challenge_scores[signoff.id].values():
+            total += Decimal(str(score.score))
+        return total
+
+    # Scores
+
+    def part_max_score(self, part):
+        """Same as ``Part.get_max_score``."""
+        return self._part_max[part.id]
+
+    def part_student_score(self, part, student):
+        """Same as ``Part.get_student_score``."""
+        signoff = self.signoff(student, part)
+        if signoff is None or signoff.status != 'approved':
+            return Decimal('0')
+        return self.signoff_quality_score(signoff) + self.signoff_challenge_score(signoff)
+
+    def part_student_percentage(self, part, student):
+        max_score = self.part_max_score(part)
+        if max_score == 0:
+            return 0
+        return (self.part_student_score(part, student) / max_score) * 100
+
+    def part_contribution_to_lab(self, part):
+        """Same as ``Part.get_contribution_to_lab``."""
+        lab = self.lab_by_id[part.lab_id]
+        lab_parts = self.parts_by_lab[lab.id]
+        total_max_score = sum(self.part_max_score(p) for p in lab_parts)
+        if total_max_score == 0:
+            if not lab_parts:
+                return 0
+            return lab.total_points / len(lab_parts)
+        return (self.part_max_score(part) / total_max_score) * lab.total_points
+
+    def lab_max_score(self, lab):
+        """Same as ``Lab.get_max_score``."""
+        total = Decimal('0')
+        for part in self.parts_by_lab[lab.id]:
+            total += self.part_max_score(part)
+        return total
+
+    def lab_student_score(self, lab, student):
+        """Same as ``Lab.get_student_score``."""
+        total = Decimal('0')
+        for part in self.parts_by_lab[lab.id]:
+            total += self.part_student_score(part, student)
+        return total
+
+    def lab_student_percentage(self, lab, student):
+        """Same as ``Lab.get_student_percentage``."""
+        max_score = self.lab_max_score(lab)
+        if max_score == 0:
+            return Decimal('0')
+        return (self.lab_student_score(lab, student) / max_score) * Decimal('100')
+
+    def lab_letter_grades(self, lab):
+        """Letter grade of every student for a lab, graded in one batch."""
+        key = ('lab', lab.id)
+        if key not in self._letter_grades:
+            percentages = [self.lab_student_percentage(lab, student) for student in self.students]
+            letters = self.grade_scale(lab).get_letter_grades(percentages)
+            self._letter_grades[key] = dict(zip((student.id for student in self.students), letters))
+        return self._letter_grades[key]
+
+    def lab_grade_letter(self, lab, student):
+        """Same as ``Lab.get_grade_letter``."""
+        letters = self.lab_letter_grades(lab)
+        if student.id in letters:
+            return letters[student.id]
+        return self.grade_scale(lab).get_letter_grade(self.lab_student_percentage(lab, student))
+
+    def student_points(self, student):
+        """(earned, max) points across all labs."""
+        earned = Decimal('0')
+        total = Decimal('0')
+        for lab in self.labs:
+            earned += self.lab_student_score(lab, student)
+            total += self.lab_max_score(lab)
+        return earned, total
+
+    def overall_grade(self, student):
+        """Same as ``Student.get_overall_grade``."""
+        if not self.labs:
+            return Decimal('0')
+        earned, total = self.student_points(student)
+        if total == 0:
+            return Decimal('0')
+        return (earned / total) * Decimal('100')
+
+    def course_letter_grades(self):
+        """Course letter grade of every student, graded in one batch."""
+        if 'course' not in self._letter_grades:
+            percentages = [self.overall_grade(student) for student in self.students]
+            letters = self.course_grade_scale().get_letter_grades(percentages)
+            self._letter_grades['course'] = dict(zip((student.id for student in self.students), letters))
+        return self._letter_grades['course']
+
+    def course_letter_grade(self, student):
+        """Same as ``Student.get_course_letter_grade``."""
+        letters = self.course_letter_grades()
+        if student.id in letters:
+            return letters[student.id]
+        return self.course_grade_scale().get_letter_grade(self.overall_grade(student))
+
+    def completion_status(self, student):
+        """Same as ``Student.get_completion_status``."""
+        required = [part for part in self.part_by_id.values() if part.is_required]
+        if not required:
+            return 0
+        completed = sum(1 for part in required if self.part_status(student, part) == 'approved')
+        return (completed / len(required)) * 100
+
+    def required_part_counts(self, student):
+        """(completed, total) required parts for a student."""
+        required = [part for part in self.part_by_id.values() if part.is_required]
+        completed = sum(1 for part in required if self.part_status(student, part) == 'approved')
+        return completed, len(required)
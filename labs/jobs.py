@@ -0,0 +1,240 @@
+"""
+Background export jobs.
+
+Whole-course exports take long enough to tie up a web worker, so the
+``api/exports/`` endpoints only enqueue an ``ExportJob`` and return its id.
+The job is run by a daemon thread started in the web process (when
+``settings.EXPORT_JOB_THREADS`` is on) or by ``python manage.py
+run_export_worker``.  Either way the runner claims the job with a conditional
+update, so a job is never run twice.
+
+Rows are written to a file under ``settings.EXPORT_ROOT`` and the job's
+progress and heartbeat are updated after every chunk of students.  Each job
+stores a fingerprint of the data it was built from; a request for an export
+whose fingerprint matches a finished job reuses that job's file.
+
+Jobs whose runner died (a restarted or timed out web worker takes its
+threads with it) stop sending heartbeats.  After ``settings.EXPORT_JOB_TIMEOUT``
+seconds ``recover_stale_jobs`` queues them again, up to ``MAX_ATTEMPTS``
+runs, and jobs nobody picked up are started again (or failed when no worker
+seems to be running).  Requests for an export and the worker both call it
+first.
+
+Course-wide exports are shared: any user with the role the synchronous
+export requires (``EXPORT_ROLES``) may join, poll and download any job of
+that kind, whoever queued it.
+"""
+import csv
+import datetime
+import hashlib
+import logging
+import os
+import threading
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, F, Max, Q
+from django.utils import timezone
+
+from . import exports
+from .models import (
+    ExportJob, Signoff, Student, StudentPartScore, StudentLabScore, StudentCourseScore,
+)
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FILENAMES = {
+    'all_data': 'complete_lab_report.csv',
+    'student_grades': 'student_grades.csv',
+}
+# Roles allowed to use each kind, as for export_all_data_csv and
+# export_student_grade_csv
+EXPORT_ROLES = {
+    'all_data': ('ta', 'instructor'),
+    'student_grades': ('ta', 'instructor'),
+}
+# Runs of a job before a stale one is failed instead of queued again
+MAX_ATTEMPTS = 3
+
+
+def export_root():
+    return getattr(settings, 'EXPORT_ROOT', os.path.join(settings.BASE_DIR, 'export_artifacts'))
+
+
+def job_timeout():
+    return datetime.timedelta(seconds=getattr(settings, 'EXPORT_JOB_TIMEOUT', 600))
+
+
+def use_threads():
+    return getattr(settings, 'EXPORT_JOB_THREADS', True)
+
+
+def export_rows(kind, progress=None):
+    """Row producer of an export kind."""
+    if kind == 'all_data':
+        return exports.all_data_rows(progress=progress)
+    return exports.student_grade_rows(exports.active_students(), progress=progress)
+
+
+def data_fingerprint(kind):
+    """
+    Hash of everything a whole-course export is built from.
+
+    Any signoff, score or structure change refreshes the materialized score
+    rows (see ``labs.signals``), which moves their ``updated_at``; roster
+    edits are hashed directly.
+    """
+    parts = [kind]
+    for model in (StudentPartScore, StudentLabScore, StudentCourseScore):
+        parts.append(model.objects.aggregate(count=Count('id'), latest=Max('updated_at')))
+    parts.append(Signoff.objects.aggregate(count=Count('id'), latest=Max('date_updated'), last_id=Max('id')))
+    parts.append(list(
+        Student.objects.order_by('id').values_list('id', 'student_id', 'name', 'email', 'batch', 'active')
+    ))
+    return hashlib.sha256(repr(parts).encode()).hexdigest()
+
+
+def cached_job(kind, fingerprint):
+    """A finished job for the same data whose artifact still exists."""
+    jobs = ExportJob.objects.filter(kind=kind, fingerprint=fingerprint, status='done')
+    for job in jobs:
+        if job.artifact_path and os.path.exists(job.artifact_path):
+            return job
+    return None
+
+
+def enqueue_export(kind, user=None):
+    """
+    Return a job for an export of ``kind``.
+
+    Returns ``(job, cached)``: an existing finished job when the data hasn't
+    changed since it ran, otherwise a new queued job.
+    """
+    fingerprint = data_fingerprint(kind)
+    job = cached_job(kind, fingerprint)
+    if job:
+        return job, True
+
+    # Join a job for the same data that is already waiting or running
+    recover_stale_jobs()
+    job = ExportJob.objects.filter(
+        kind=kind, fingerprint=fingerprint, status__in=['queued', 'running']
+    ).first()
+    if job:
+        return job, False
+
+    job = ExportJob.objects.create(kind=kind, fingerprint=fingerprint, requested_by=user)
+    if use_threads():
+        transaction.on_commit(lambda: start_job_thread(job.id))
+    return job, False
+
+
+def recover_stale_jobs(worker=False):
+    """
+    Deal with jobs whose runner is gone; returns how many were touched.
+
+    Running jobs without a heartbeat for ``EXPORT_JOB_TIMEOUT`` are queued
+    again (failed after ``MAX_ATTEMPTS`` runs).  With threads, jobs queued
+    that long are given a new thread.  Without them, they are failed when no
+    job is running either, i.e. no worker seems to be there; ``worker`` is
+    set when the worker itself calls this, before running them.
+    """
+    now = timezone.now()
+    cutoff = now - job_timeout()
+    stale = ExportJob.objects.filter(status='running', heartbeat_at__lt=cutoff)
+    count = stale.filter(attempts__gte=MAX_ATTEMPTS).update(
+        status='failed', error='The export stopped responding', finished_at=now
+    )
+    requeued = list(stale.values_list('id', flat=True))
+    if requeued:
+        logger.warning("Export jobs %s stopped responding, queuing them again", requeued)
+        count += ExportJob.objects.filter(pk__in=requeued, status='running', heartbeat_at__lt=cutoff).update(
+            status='queued', progress=0, started_at=None, heartbeat_at=now
+        )
+
+    # Queued jobs are stamped when they are handed to a runner
+    waiting = ExportJob.objects.filter(status='queued').filter(
+        Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, created_at__lt=cutoff)
+    )
+    if use_threads():
+        job_ids = requeued + list(waiting.values_list('id', flat=True))
+        count += ExportJob.objects.filter(pk__in=job_ids, status='queued').update(heartbeat_at=now) - len(requeued)
+        for job_id in job_ids:
+            # claim_job() keeps a job from running twice
+            transaction.on_commit(lambda job_id=job_id: start_job_thread(job_id))
+    elif not worker and not ExportJob.objects.filter(status='running', heartbeat_at__gte=cutoff).exists():
+        count += waiting.update(
+            status='failed', error='No export worker picked the job up', finished_at=now
+        )
+    return count
+
+
+def start_job_thread(job_id):
+    thread = threading.Thread(target=run_job, args=(job_id,), daemon=True)
+    thread.start()
+    return thread
+
+
+def claim_job(job_id):
+    """Mark a queued job as running; False if another runner got it first."""
+    now = timezone.now()
+    return ExportJob.objects.filter(pk=job_id, status='queued').update(
+        status='running', started_at=now, heartbeat_at=now, attempts=F('attempts') + 1
+    ) == 1
+
+
+def run_job(job_id):
+    """
+    Build the artifact of a queued job.
+
+    Returns False if the job was already claimed.  Errors are stored on the
+    job rather than raised.
+    """
+    try:
+        if not claim_job(job_id):
+            return False
+        job = ExportJob.objects.get(pk=job_id)
+
+        def progress(done, total):
+            percent = int(done * 100 / total) if total else 100
+            ExportJob.objects.filter(pk=job_id).update(progress=min(percent, 99), heartbeat_at=timezone.now())
+
+        os.makedirs(export_root(), exist_ok=True)
+        path = os.path.join(export_root(), f'{job.id}_{EXPORT_FILENAMES[job.kind]}')
+        temp_path = f'{path}.tmp'
+        row_count = 0
+        try:
+            with open(temp_path, 'w', newline='') as f:
+                writer = csv.writer(f)
+                for row in export_rows(job.kind, progress=progress):
+                    writer.writerow(row)
+                    row_count += 1
+            os.replace(temp_path, path)
+        except Exception as e:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            ExportJob.objects.filter(pk=job_id).update(
+                status='failed', error=str(e), finished_at=timezone.now()
+            )
+            return True
+
+        ExportJob.objects.filter(pk=job_id).update(
+            status='done', progress=100, row_count=row_count,
+            artifact_path=path, finished_at=timezone.now()
+        )
+        return True
+    finally:
+        # Threads get their own connection; don't leave it open
+        if threading.current_thread() is not threading.main_thread():
+            connection.close()
+
+
+def run_queued_jobs():
+    """Run every queued job in this thread; returns how many ran."""
+    # Includes the jobs orphaned by a runner that died
+    recover_stale_jobs(worker=True)
+    count = 0
+    for job_id in ExportJob.objects.filter(status='queued').order_by('created_at').values_list('id', flat=True):
+        if run_job(job_id):
+            count += 1
+    return count
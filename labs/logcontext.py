@@ -0,0 +1,48 @@
+"""
+Request-scoped context for the ``labs`` loggers.
+
+``RequestLogContextMiddleware`` (see ``labs.middleware``) binds the user and
+view of each request and the lab/part/student/signoff ids in its URL; views
+can add more with ``bind(signoff_id=...)``.  ``ContextFilter`` copies the
+fields onto every record as attributes, so a formatter can print them
+(``%(user)s``) and a structured handler can send them as fields.
+"""
+import logging
+from contextvars import ContextVar
+
+# Always set on records (as '-' outside a request), so format strings can use them
+FIELDS = ('user', 'view', 'signoff_id')
+
+_context = ContextVar('labs_log_context', default=None)
+
+
+def start():
+    """Begin an empty context; returns the token for ``end``."""
+    return _context.set({})
+
+
+def end(token):
+    _context.reset(token)
+
+
+def bind(**fields):
+    """Add fields to the current context."""
+    _context.set({**(_context.get() or {}), **fields})
+
+
+def current():
+    return _context.get() or {}
+
+
+class ContextFilter(logging.Filter):
+    """Add the current context's fields to each record."""
+
+    def filter(self, record):
+        context = current()
+        for field in FIELDS:
+            if not hasattr(record, field):
+                setattr(record, field, context.get(field, '-'))
+        for field, value in context.items():
+            if not hasattr(record, field):
+                setattr(record, field, value)
+        return True
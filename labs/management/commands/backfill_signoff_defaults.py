@@ -0,0 +1,92 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from labs.cache import invalidate_all_part_max
+from labs.models import (
+    Signoff, QualityCriteria, Challenge, QualityScore, ChallengeScore,
+    EvaluationSheet, EvaluationRubric,
+)
+from labs.scores import refresh_scores
+
+class Command(BaseCommand):
+    help = ('Creates the default QualityScore, ChallengeScore and EvaluationSheet rows '
+            'that signoffs are missing, so stored rows match what the reports count')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only report how many rows would be created')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        # Load the structure and the existing rows once
+        criteria_by_part = defaultdict(list)
+        for criterion in QualityCriteria.objects.all():
+            criteria_by_part[criterion.part_id].append(criterion)
+
+        challenges_by_part = defaultdict(list)
+        for challenge in Challenge.objects.filter(part__has_challenges=True):
+            challenges_by_part[challenge.part_id].append(challenge)
+
+        existing_quality = set(QualityScore.objects.values_list('signoff_id', 'criteria_id'))
+        existing_challenges = set(ChallengeScore.objects.values_list('signoff_id', 'challenge_id'))
+        signoffs_with_sheets = set(EvaluationSheet.objects.values_list('signoff_id', flat=True))
+
+        rubric = EvaluationRubric.get_default_rubric()
+        default_evaluations = {key: 'MR' for key in rubric.criteria_data.keys()}
+
+        # Build the missing rows with the same defaults the score methods count
+        quality_scores = []
+        challenge_scores = []
+        evaluation_sheets = []
+        for signoff_id, part_id in Signoff.objects.values_list('id', 'part_id'):
+            for criterion in criteria_by_part[part_id]:
+                if (signoff_id, criterion.id) not in existing_quality:
+                    quality_scores.append(QualityScore(
+                        signoff_id=signoff_id,
+                        criteria=criterion,
+                        score=criterion.get_default_score()
+                    ))
+            for challenge in challenges_by_part[part_id]:
+                if (signoff_id, challenge.id) not in existing_challenges:
+                    challenge_scores.append(ChallengeScore(
+                        signoff_id=signoff_id,
+                        challenge=challenge,
+                        score=0
+                    ))
+            if signoff_id not in signoffs_with_sheets:
+                sheet = EvaluationSheet(
+                    signoff_id=signoff_id,
+                    rubric=rubric,
+                    evaluations=dict(default_evaluations)
+                )
+                # bulk_create skips save(), which fills the stored marks
+                sheet.update_marks()
+                evaluation_sheets.append(sheet)
+
+        self.stdout.write(f"Missing quality scores: {len(quality_scores)}")
+        self.stdout.write(f"Missing challenge scores: {len(challenge_scores)}")
+        self.stdout.write(f"Missing evaluation sheets: {len(evaluation_sheets)}")
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING("Dry run, nothing was written"))
+            return
+
+        with transaction.atomic():
+            QualityScore.objects.bulk_create(quality_scores, batch_size=batch_size, ignore_conflicts=True)
+            ChallengeScore.objects.bulk_create(challenge_scores, batch_size=batch_size, ignore_conflicts=True)
+            EvaluationSheet.objects.bulk_create(evaluation_sheets, batch_size=batch_size)
+
+            # bulk_create skips the signals; a new sheet can change which rubric
+            # sets a part's max score, so drop the cached max scores and
+            # refresh the materialized scores
+            if evaluation_sheets:
+                invalidate_all_part_max()
+            if quality_scores or challenge_scores or evaluation_sheets:
+                refresh_scores()
+
+        # Summary
+        total = len(quality_scores) + len(challenge_scores) + len(evaluation_sheets)
+        self.stdout.write(self.style.SUCCESS(f"Created {total} default rows"))
@@ -0,0 +1,107 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Count
+
+from labs.benchmarks import scratch_database
+from labs.models import Part, Signoff, Student
+from labs.synthetic import generate_synthetic_course
+
+
+def hot_queries(part, student, instructor, since):
+    """(label, queryset, evaluate) for the signoff and roster lookups the views run most."""
+    lab_signoffs = Signoff.objects.filter(part__lab_id=part.lab_id, student__active=True).order_by()
+    return [
+        ('lab_report status scan', lab_signoffs.values_list('student_id', 'part_id', 'status'), list),
+        ('lab_report status counts', lab_signoffs.values('status').annotate(count=Count('id')), list),
+        ('part signoffs, newest first', Signoff.objects.filter(part=part).values_list('id'), list),
+        ('instructor signoffs since', Signoff.objects.filter(instructor=instructor, date_updated__gte=since)
+            .values_list('id'), list),
+        ('instructor last signoff', Signoff.objects.filter(instructor=instructor)
+            .values_list('date_updated')[:1], list),
+        ('approved count', Signoff.objects.filter(status='approved').order_by(), lambda qs: qs.count()),
+        ('pending list, newest first', Signoff.objects.filter(status='pending').values_list('id')[:50], list),
+        ('signoff list, newest first', Signoff.objects.values_list('id')[:50], list),
+        ('student + part lookup', Signoff.objects.filter(student=student, part=part), list),
+        ('active roster by name', Student.objects.filter(active=True).order_by('name')
+            .values_list('id', 'name'), list),
+    ]
+
+
+class Command(BaseCommand):
+    help = ('Times the hot signoff and roster queries with and without their indexes on a synthetic '
+            'course in a scratch test database')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=500)
+        parser.add_argument('--labs', type=int, default=8)
+        parser.add_argument('--parts-per-lab', type=int, default=5)
+        parser.add_argument('--fill-ratio', type=float, default=0.7)
+        parser.add_argument('--repeat', type=int, default=20, help='Timed runs per query (median is reported)')
+        parser.add_argument('--plans', action='store_true', help='Print the query plans')
+
+    def handle(self, *args, **options):
+        # Never touch the real database
+        with scratch_database():
+            self.stdout.write("Generating synthetic course...")
+            counts = generate_synthetic_course(
+                students=options['students'],
+                labs=options['labs'],
+                parts_per_lab=options['parts_per_lab'],
+                fill_ratio=options['fill_ratio']
+            )
+            self.stdout.write(', '.join(f"{count} {name.replace('_', ' ')}" for name, count in counts.items()))
+
+            # Sample arguments from the middle of the data
+            part = Part.objects.order_by('lab_id', 'order')[counts['parts'] // 2]
+            student = Student.objects.filter(signoffs__part=part).first()
+            instructor = Signoff.objects.filter(part=part).first().instructor
+            since = Signoff.objects.order_by('date_updated').values_list('date_updated', flat=True)[
+                counts['signoffs'] // 2
+            ]
+            queries = hot_queries(part, student, instructor, since)
+
+            after = self.measure(queries, options['repeat'])
+            self.set_indexes(drop=True)
+            before = self.measure(queries, options['repeat'])
+            self.set_indexes(drop=False)
+
+        self.stdout.write("")
+        self.stdout.write(f"{'Query':<30} {'Before (ms)':>12} {'After (ms)':>12} {'Speedup':>8}")
+        for (label, _, _), (before_ms, before_plan), (after_ms, after_plan) in zip(queries, before, after):
+            speedup = before_ms / after_ms if after_ms else 0
+            self.stdout.write(f"{label:<30} {before_ms:>12.3f} {after_ms:>12.3f} {speedup:>7.1f}x")
+            if options['plans']:
+                self.stdout.write(f"  before: {' | '.join(before_plan.splitlines())}")
+                self.stdout.write(f"  after:  {' | '.join(after_plan.splitlines())}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Timed {len(queries)} queries, median of {options['repeat']} runs each"
+        ))
+
+    def set_indexes(self, drop):
+        """Drop (or re-create) the Meta.indexes of Signoff and Student, then refresh planner stats."""
+        with connection.schema_editor() as editor:
+            for model in (Signoff, Student):
+                for index in model._meta.indexes:
+                    if drop:
+                        editor.remove_index(model, index)
+                    else:
+                        editor.add_index(model, index)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def measure(self, queries, repeat):
+        """(median ms, plan) of each query."""
+        results = []
+        for label, queryset, evaluate in queries:
+            plan = queryset.explain()
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                evaluate(queryset.all())
+                timings.append((time.perf_counter() - start) * 1000)
+            results.append((statistics.median(timings), plan))
+        return results
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from labs.models import Student
+from labs.snapshots import write_snapshot
+
+class Command(BaseCommand):
+    help = 'Writes a long-format gradebook snapshot (student x part x criterion) to a Parquet file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Output .parquet file')
+        parser.add_argument('--all-students', action='store_true',
+                            help='Include inactive students')
+
+    def handle(self, *args, **options):
+        students = None
+        if options['all_students']:
+            students = list(Student.objects.order_by('name'))
+        
+        row_count = write_snapshot(options['path'], students=students)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {row_count} rows to {options['path']}"))
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from labs.synthetic import clear_synthetic_course, generate_synthetic_course
+
+class Command(BaseCommand):
+    help = 'Creates a synthetic course (students, labs, parts, criteria, challenges, rubrics and signoffs) for benchmarking'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=500)
+        parser.add_argument('--labs', type=int, default=8)
+        parser.add_argument('--parts-per-lab', type=int, default=5)
+        parser.add_argument('--criteria-per-part', type=int, default=3)
+        parser.add_argument('--challenges-per-part', type=int, default=2)
+        parser.add_argument('--rubrics', type=int, default=2)
+        parser.add_argument('--tas', type=int, default=5)
+        parser.add_argument('--fill-ratio', type=float, default=0.7,
+                            help='Share of student x part pairs with a signoff')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--clear', action='store_true',
+                            help='Delete the previously generated course first')
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            self.stdout.write("Deleting the previous synthetic course...")
+            clear_synthetic_course()
+
+        self.stdout.write("Generating synthetic course...")
+        counts = generate_synthetic_course(
+            students=options['students'],
+            labs=options['labs'],
+            parts_per_lab=options['parts_per_lab'],
+            criteria_per_part=options['criteria_per_part'],
+            challenges_per_part=options['challenges_per_part'],
+            rubrics=options['rubrics'],
+            tas=options['tas'],
+            fill_ratio=options['fill_ratio'],
+            seed=options['seed']
+        )
+
+        # Summary
+        self.stdout.write(self.style.SUCCESS(
+            "Created " + ', '.join(f"{count} {name.replace('_', ' ')}" for name, count in counts.items())
+        ))
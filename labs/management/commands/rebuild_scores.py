@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from labs.models import StudentPartScore, StudentLabScore, StudentCourseScore
+from labs.scores import rebuild_scores
+
+class Command(BaseCommand):
+    help = 'Rebuilds the materialized student part/lab/course score tables from scratch'
+
+    def handle(self, *args, **options):
+        self.stdout.write("Rebuilding materialized student scores...")
+        rebuild_scores()
+        
+        # Summary
+        self.stdout.write(self.style.SUCCESS(
+            f"Stored {StudentPartScore.objects.count()} part scores, "
+            f"{StudentLabScore.objects.count()} lab scores and "
+            f"{StudentCourseScore.objects.count()} course scores"
+        ))
@@ -0,0 +1,51 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from labs.benchmarks import SCENARIOS, git_commit, run_benchmarks, scratch_database
+from labs.synthetic import generate_synthetic_course
+
+class Command(BaseCommand):
+    help = ('Benchmarks the report, export and API views on a synthetic course in a scratch database '
+            'and writes wall time, query count and peak memory to a JSON file')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default='benchmark_results.json')
+        parser.add_argument('--students', type=int, default=500)
+        parser.add_argument('--labs', type=int, default=8)
+        parser.add_argument('--parts-per-lab', type=int, default=5)
+        parser.add_argument('--fill-ratio', type=float, default=0.7)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--repeat', type=int, default=5, help='Timed requests per view (median is reported)')
+        parser.add_argument('--only', nargs='+', metavar='NAME', choices=[scenario[0] for scenario in SCENARIOS],
+                            help='Benchmark only these views')
+
+    def handle(self, *args, **options):
+        def report(result):
+            self.stdout.write(
+                f"{result['name']:<30} {result['status']:>4} {result['wall_ms']:>10.1f} ms "
+                f"{result['queries']:>6} queries {result['peak_memory_kb']:>10.1f} KB"
+            )
+
+        with scratch_database():
+            self.stdout.write("Generating synthetic course...")
+            counts = generate_synthetic_course(
+                students=options['students'],
+                labs=options['labs'],
+                parts_per_lab=options['parts_per_lab'],
+                fill_ratio=options['fill_ratio'],
+                seed=options['seed']
+            )
+            results = run_benchmarks(repeat=options['repeat'], names=options['only'], progress=report)
+
+        output = {
+            'commit': git_commit(),
+            'created_at': timezone.now().isoformat(),
+            'repeat': options['repeat'],
+            'dataset': counts,
+            'results': results,
+        }
+        with open(options['output'], 'w') as f:
+            json.dump(output, f, indent=2)
+
+        self.stdout.write(self.style.SUCCESS(f"Wrote {len(results)} results to {options['output']}"))
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+from labs.jobs import recover_stale_jobs, run_queued_jobs
+
+class Command(BaseCommand):
+    help = 'Runs queued export jobs (set EXPORT_JOB_THREADS=False to leave them to this worker)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Run the jobs that are queued now and exit')
+        parser.add_argument('--interval', type=float, default=2.0,
+                            help='Seconds between polls for new jobs')
+
+    def handle(self, *args, **options):
+        # Jobs left running by a worker that died are queued again once
+        # their heartbeat is older than EXPORT_JOB_TIMEOUT
+        count = recover_stale_jobs(worker=True)
+        if count:
+            self.stdout.write(self.style.WARNING(f"Recovered {count} stale export job(s)"))
+        self.stdout.write("Waiting for export jobs...")
+        while True:
+            count = run_queued_jobs()
+            if count:
+                self.stdout.write(self.style.SUCCESS(f"Ran {count} export job(s)"))
+            if options['once']:
+                return
+            time.sleep(options['interval'])
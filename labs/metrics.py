@@ -0,0 +1,118 @@
+"""
+Per-view request metrics.
+
+``RequestMetricsMiddleware`` (see ``labs.middleware``) hands every request's
+numbers to ``record``: wall time, SQL query count, time spent in the database,
+the rest as Python time, and the response size.  They are aggregated per view
+in memory, so each worker process keeps its own totals since it started;
+``/api/metrics/`` shows the ones of the process that serves it.
+"""
+import threading
+import time
+from bisect import bisect_left
+
+# Upper bounds of the histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS_MS = [10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+QUERY_BUCKETS = [1, 5, 10, 25, 50, 100, 250, 500, 1000]
+
+_lock = threading.Lock()
+_views = {}
+_started_at = time.time()
+
+
+class QueryTimer:
+    """Execute wrapper that counts queries and times them."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+def _bucket_labels(bounds):
+    return [f'<={bound}' for bound in bounds] + [f'>{bounds[-1]}']
+
+
+class ViewStats:
+    """Totals, maxima and histograms of one view's requests."""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.db_ms = 0.0
+        self.python_ms = 0.0
+        self.queries = 0
+        self.max_queries = 0
+        self.bytes = 0
+        self.over_budget = 0
+        self.latency_histogram = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.query_histogram = [0] * (len(QUERY_BUCKETS) + 1)
+
+    def add(self, status, total_ms, db_ms, queries, size, over_budget):
+        self.requests += 1
+        if status >= 500:
+            self.errors += 1
+        self.total_ms += total_ms
+        self.max_ms = max(self.max_ms, total_ms)
+        self.db_ms += db_ms
+        self.python_ms += total_ms - db_ms
+        self.queries += queries
+        self.max_queries = max(self.max_queries, queries)
+        self.bytes += size
+        if over_budget:
+            self.over_budget += 1
+        self.latency_histogram[bisect_left(LATENCY_BUCKETS_MS, total_ms)] += 1
+        self.query_histogram[bisect_left(QUERY_BUCKETS, queries)] += 1
+
+    def as_dict(self):
+        requests = self.requests or 1
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'over_query_budget': self.over_budget,
+            'mean_ms': round(self.total_ms / requests, 3),
+            'max_ms': round(self.max_ms, 3),
+            'mean_db_ms': round(self.db_ms / requests, 3),
+            'mean_python_ms': round(self.python_ms / requests, 3),
+            'mean_queries': round(self.queries / requests, 2),
+            'max_queries': self.max_queries,
+            'mean_bytes': round(self.bytes / requests),
+            'latency_ms': dict(zip(_bucket_labels(LATENCY_BUCKETS_MS), self.latency_histogram)),
+            'queries': dict(zip(_bucket_labels(QUERY_BUCKETS), self.query_histogram)),
+        }
+
+
+def record(view, status, total_ms, db_ms, queries, size, over_budget=False):
+    """Add one request of ``view`` to the aggregates."""
+    with _lock:
+        stats = _views.get(view)
+        if stats is None:
+            stats = _views[view] = ViewStats()
+        stats.add(status, total_ms, db_ms, queries, size, over_budget)
+
+
+def snapshot():
+    """The aggregates of every view, slowest mean first."""
+    with _lock:
+        views = {view: stats.as_dict() for view, stats in _views.items()}
+    return dict(sorted(views.items(), key=lambda item: item[1]['mean_ms'], reverse=True))
+
+
+def started_at():
+    return _started_at
+
+
+def reset():
+    global _started_at
+    with _lock:
+        _views.clear()
+        _started_at = time.time()
@@ -0,0 +1,134 @@
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from . import logcontext, metrics, roles
+
+logger = logging.getLogger(__name__)
+
+# URL arguments copied into the log context
+LOG_CONTEXT_KWARGS = ('lab_id', 'part_id', 'student_id', 'signoff_id', 'job_id')
+
+
+class RequestLogContextMiddleware:
+    """
+    Give each request its own log context (see ``labs.logcontext``) holding
+    the user, the view name and the ids in the URL.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = logcontext.start()
+        try:
+            return self.get_response(request)
+        finally:
+            logcontext.end(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        user = getattr(request, 'user', None)
+        fields = {
+            'user': user.get_username() if user is not None and user.is_authenticated else 'anonymous',
+            'view': request.resolver_match.view_name,
+        }
+        for name in LOG_CONTEXT_KWARGS:
+            if name in view_kwargs:
+                fields[name] = view_kwargs[name]
+        logcontext.bind(**fields)
+
+
+class RequestMetricsMiddleware:
+    """
+    Measure each request's queries, database time, Python time and response
+    size, add them to the response as a ``Server-Timing`` header and record
+    them in ``labs.metrics``.
+
+    Requests that run more than ``settings.QUERY_BUDGET`` queries (0 turns the
+    check off) are logged as warnings.  Streamed responses (the exports) run
+    most of their queries while the body is sent, after the headers have gone
+    out, so their header only covers the view itself; the recorded metrics
+    cover the whole response.  File responses (downloads, static files) keep
+    their file so the server can send it with ``wsgi.file_wrapper``; they are
+    recorded when the response is closed, with their ``Content-Length`` as
+    the size.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = metrics.QueryTimer()
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(timer))
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            stack.close()
+            raise
+
+        self.add_server_timing(response, timer, start)
+        if getattr(response, 'file_to_stream', None) is not None:
+            # Re-wrapping the body would drop the file.  Sending a file runs
+            # no queries, so only the timing waits for the response to close.
+            stack.close()
+            size = int(response.get('Content-Length') or 0)
+            response._resource_closers.append(lambda: self.finish(request, response, timer, start, size))
+        elif response.streaming and not response.is_async:
+            content = response.streaming_content
+            response.streaming_content = self.stream(content, request, response, timer, start, stack)
+        else:
+            stack.close()
+            self.finish(request, response, timer, start, len(response.content))
+        return response
+
+    def stream(self, content, request, response, timer, start, stack):
+        """Pass the body through, counting its queries and bytes."""
+        size = 0
+        try:
+            for chunk in content:
+                size += len(chunk)
+                yield chunk
+        finally:
+            stack.close()
+            self.finish(request, response, timer, start, size)
+
+    def add_server_timing(self, response, timer, start):
+        total_ms = (time.perf_counter() - start) * 1000
+        db_ms = timer.duration * 1000
+        response['Server-Timing'] = (
+            f'db;dur={db_ms:.1f};desc="{timer.count} queries", '
+            f'app;dur={total_ms - db_ms:.1f}, '
+            f'total;dur={total_ms:.1f}'
+        )
+
+    def finish(self, request, response, timer, start, size):
+        total_ms = (time.perf_counter() - start) * 1000
+        db_ms = timer.duration * 1000
+        match = request.resolver_match
+        view = match.view_name if match else 'unresolved'
+
+        budget = getattr(settings, 'QUERY_BUDGET', 0)
+        over_budget = bool(budget) and timer.count > budget
+        if over_budget:
+            logger.warning(
+                "%s ran %d queries (budget %d) in %.1f ms: %s",
+                view, timer.count, budget, total_ms, request.get_full_path()
+            )
+        metrics.record(view, response.status_code, total_ms, db_ms, timer.count, size, over_budget)
+
+
+class RoleMiddleware:
+    """Resolve the user's role once per request into ``request.role`` (see ``labs.roles``)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.role = roles.resolve_role(request)
+        return self.get_response(request)
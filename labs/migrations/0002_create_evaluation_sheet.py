@@ -10,28 +10,35 @@ class Migration(migrations.Migration):
         ('labs', '0001_initial'),
     ]
 
+    # 0001_initial already creates this table; only the migration state is
+    # repeated here, so fresh databases don't try to create it twice
     operations = [
-        migrations.CreateModel(
-            name='EvaluationSheet',
-            fields=[
-                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
-                ('cleanliness', models.CharField(choices=[('ER', 'Exceeds Requirements'), ('MR', 'Meets Requirements'), ('MM', 'Minimally Meets'), ('IR', 'Improvement Required'), ('ND', 'Not Demonstrated')], max_length=2)),
-                ('cleanliness_max_marks', models.DecimalField(decimal_places=2, default=5.0, max_digits=5)),
-                ('hardware', models.CharField(choices=[('ER', 'Exceeds Requirements'), ('MR', 'Meets Requirements'), ('MM', 'Minimally Meets'), ('IR', 'Improvement Required'), ('ND', 'Not Demonstrated')], max_length=2)),
-                ('hardware_max_marks', models.DecimalField(decimal_places=2, default=10.0, max_digits=5)),
-                ('timeliness', models.CharField(choices=[('ER', 'Exceeds Requirements'), ('MR', 'Meets Requirements'), ('MM', 'Minimally Meets'), ('IR', 'Improvement Required'), ('ND', 'Not Demonstrated')], max_length=2)),
-                ('timeliness_max_marks', models.DecimalField(decimal_places=2, default=5.0, max_digits=5)),
-                ('student_preparation', models.CharField(choices=[('ER', 'Exceeds Requirements'), ('MR', 'Meets Requirements'), ('MM', 'Minimally Meets'), ('IR', 'Improvement Required'), ('ND', 'Not Demonstrated')], max_length=2)),
-                ('student_preparation_max_marks', models.DecimalField(decimal_places=2, default=10.0, max_digits=5)),
-                ('code_implementation', models.CharField(choices=[('ER', 'Exceeds Requirements'), ('MR', 'Meets Requirements'), ('MM', 'Minimally Meets'), ('IR', 'Improvement Required'), ('ND', 'Not Demonstrated')], max_length=2)),
-                ('code_implementation_max_marks', models.DecimalField(decimal_places=2, default=15.0, max_digits=5)),
-                ('commenting', models.CharField(choices=[('ER', 'Exceeds Requirements'), ('MR', 'Meets Requirements'), ('MM', 'Minimally Meets'), ('IR', 'Improvement Required'), ('ND', 'Not Demonstrated')], max_length=2)),
-                ('commenting_max_marks', models.DecimalField(decimal_places=2, default=5.0, max_digits=5)),
-                ('schematic', models.CharField(choices=[('ER', 'Exceeds Requirements'), ('MR', 'Meets Requirements'), ('MM', 'Minimally Meets'), ('IR', 'Improvement Required'), ('ND', 'Not Demonstrated')], max_length=2)),
-                ('schematic_max_marks', models.DecimalField(decimal_places=2, default=10.0, max_digits=5)),
-                ('course_participation', models.CharField(choices=[('ER', 'Exceeds Requirements'), ('MR', 'Meets Requirements'), ('MM', 'Minimally Meets'), ('IR', 'Improvement Required'), ('ND', 'Not Demonstrated')], max_length=2)),
-                ('course_participation_max_marks', models.DecimalField(decimal_places=2, default=5.0, max_digits=5)),
-                ('signoff', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='evaluation_sheet', to='labs.signoff')),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='EvaluationSheet',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('cleanliness', models.CharField(choices=[('ER', 'Exceeds Requirements'), ('MR', 'Meets Requirements'), ('MM', 'Minimally Meets'), ('IR', 'Improvement Required'), ('ND', 'Not Demonstrated')], max_length=2)),
+                        ('cleanliness_max_marks', models.DecimalField(decimal_places=2, default=5.0, max_digits=5)),
+                        ('hardware', models.CharField(choices=[('ER', 'Exceeds Requirements'), ('MR', 'Meets Requirements'), ('MM', 'Minimally Meets'), ('IR', 'Improvement Required'), ('ND', 'Not Demonstrated')], max_length=2)),
+                        ('hardware_max_marks', models.DecimalField(decimal_places=2, default=10.0, max_digits=5)),
+                        ('timeliness', models.CharField(choices=[('ER', 'Exceeds Requirements'), ('MR', 'Meets Requirements'), ('MM', 'Minimally Meets'), ('IR', 'Improvement Required'), ('ND', 'Not Demonstrated')], max_length=2)),
+                        ('timeliness_max_marks', models.DecimalField(decimal_places=2, default=5.0, max_digits=5)),
+                        ('student_preparation', models.CharField(choices=[('ER', 'Exceeds Requirements'), ('MR', 'Meets Requirements'), ('MM', 'Minimally Meets'), ('IR', 'Improvement Required'), ('ND', 'Not Demonstrated')], max_length=2)),
+                        ('student_preparation_max_marks', models.DecimalField(decimal_places=2, default=10.0, max_digits=5)),
+                        ('code_implementation', models.CharField(choices=[('ER', 'Exceeds Requirements'), ('MR', 'Meets Requirements'), ('MM', 'Minimally Meets'), ('IR', 'Improvement Required'), ('ND', 'Not Demonstrated')], max_length=2)),
+                        ('code_implementation_max_marks', models.DecimalField(decimal_places=2, default=15.0, max_digits=5)),
+                        ('commenting', models.CharField(choices=[('ER', 'Exceeds Requirements'), ('MR', 'Meets Requirements'), ('MM', 'Minimally Meets'), ('IR', 'Improvement Required'), ('ND', 'Not Demonstrated')], max_length=2)),
+                        ('commenting_max_marks', models.DecimalField(decimal_places=2, default=5.0, max_digits=5)),
+                        ('schematic', models.CharField(choices=[('ER', 'Exceeds Requirements'), ('MR', 'Meets Requirements'), ('MM', 'Minimally Meets'), ('IR', 'Improvement Required'), ('ND', 'Not Demonstrated')], max_length=2)),
+                        ('schematic_max_marks', models.DecimalField(decimal_places=2, default=10.0, max_digits=5)),
+                        ('course_participation', models.CharField(choices=[('ER', 'Exceeds Requirements'), ('MR', 'Meets Requirements'), ('MM', 'Minimally Meets'), ('IR', 'Improvement Required'), ('ND', 'Not Demonstrated')], max_length=2)),
+                        ('course_participation_max_marks', models.DecimalField(decimal_places=2, default=5.0, max_digits=5)),
+                        ('signoff', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='evaluation_sheet', to='labs.signoff')),
+                    ],
+                ),
             ],
+            database_operations=[],
         ),
     ]
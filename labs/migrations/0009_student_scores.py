@@ -0,0 +1,69 @@
+# Generated by Django 5.1.6 on 2026-10-18 11:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('labs', '0008_part_due_date'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentCourseScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('earned_score', models.DecimalField(decimal_places=3, default=0, max_digits=10)),
+                ('max_score', models.DecimalField(decimal_places=3, default=0, max_digits=10)),
+                ('overall_grade', models.DecimalField(decimal_places=3, default=0, max_digits=7)),
+                ('letter_grade', models.CharField(default='F', max_length=2)),
+                ('completion', models.DecimalField(decimal_places=3, default=0, help_text='Percentage of required parts approved', max_digits=7)),
+                ('completed_parts', models.PositiveIntegerField(default=0)),
+                ('required_parts', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('student', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='course_score', to='labs.student')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StudentLabScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('earned_score', models.DecimalField(decimal_places=3, default=0, max_digits=10)),
+                ('max_score', models.DecimalField(decimal_places=3, default=0, max_digits=10)),
+                ('percentage', models.DecimalField(decimal_places=3, default=0, max_digits=7)),
+                ('letter_grade', models.CharField(default='F', max_length=2)),
+                ('completed_parts', models.PositiveIntegerField(default=0)),
+                ('total_parts', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('lab', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='student_scores', to='labs.lab')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lab_scores', to='labs.student')),
+            ],
+            options={
+                'unique_together': {('student', 'lab')},
+            },
+        ),
+        migrations.CreateModel(
+            name='StudentPartScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(default='not_started', max_length=20)),
+                ('is_late', models.BooleanField(default=False)),
+                ('quality_earned', models.DecimalField(decimal_places=3, default=0, max_digits=10)),
+                ('quality_max', models.DecimalField(decimal_places=3, default=0, max_digits=10)),
+                ('evaluation_earned', models.DecimalField(decimal_places=3, default=0, max_digits=10)),
+                ('evaluation_max', models.DecimalField(decimal_places=3, default=0, max_digits=10)),
+                ('challenge_earned', models.DecimalField(decimal_places=3, default=0, max_digits=10)),
+                ('challenge_max', models.DecimalField(decimal_places=3, default=0, max_digits=10)),
+                ('earned_score', models.DecimalField(decimal_places=3, default=0, help_text='Score counted towards the lab (approved signoffs only)', max_digits=10)),
+                ('max_score', models.DecimalField(decimal_places=3, default=0, max_digits=10)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('part', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='student_scores', to='labs.part')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='part_scores', to='labs.student')),
+            ],
+            options={
+                'unique_together': {('student', 'part')},
+            },
+        ),
+    ]
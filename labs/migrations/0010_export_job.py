@@ -0,0 +1,37 @@
+# Generated by Django 5.1.6 on 2026-10-18 12:04
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('labs', '0009_student_scores'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('all_data', 'Complete Lab Report'), ('student_grades', 'Student Grade Report')], max_length=20)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='queued', max_length=20)),
+                ('progress', models.PositiveIntegerField(default=0, help_text='Percentage of students written')),
+                ('row_count', models.PositiveIntegerField(default=0)),
+                ('artifact_path', models.CharField(blank=True, max_length=500)),
+                ('fingerprint', models.CharField(blank=True, help_text='Hash of the data the artifact was built from', max_length=64)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='export_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['kind', 'fingerprint', 'status'], name='labs_export_kind_eea30a_idx')],
+            },
+        ),
+    ]
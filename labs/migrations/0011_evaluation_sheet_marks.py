@@ -0,0 +1,75 @@
+# Generated by Django 5.1.6 on 2026-10-18 12:13
+
+from decimal import Decimal
+from django.db import migrations, models
+
+# Same mapping and fallbacks as EvaluationSheet.get_earned_marks() and
+# get_total_max_marks(); historical models don't have the methods
+STATUS_TO_SCORE = {'ER': 1.0, 'MR': 0.75, 'MM': 0.50, 'IR': 0.25, 'ND': 0.0}
+
+
+def sheet_marks(criteria_data, evaluations):
+    if criteria_data is None:
+        return Decimal('0'), Decimal('60.0')
+    
+    try:
+        max_marks = Decimal('0')
+        for criteria in criteria_data.values():
+            if isinstance(criteria, dict) and 'max_marks' in criteria:
+                try:
+                    max_marks += Decimal(str(criteria['max_marks']))
+                except (ValueError, TypeError):
+                    max_marks += Decimal('5.0')
+    except Exception:
+        max_marks = Decimal('60.0')
+    
+    try:
+        earned = Decimal('0')
+        for field, status in evaluations.items():
+            criteria = criteria_data.get(field)
+            if isinstance(criteria, dict) and 'max_marks' in criteria:
+                try:
+                    earned += Decimal(str(criteria['max_marks'])) * Decimal(str(STATUS_TO_SCORE.get(status, 0)))
+                except (ValueError, TypeError, KeyError):
+                    continue
+    except Exception:
+        earned = Decimal('0')
+    return earned, max_marks
+
+
+def fill_sheet_marks(apps, schema_editor):
+    """Store the marks of the existing evaluation sheets."""
+    EvaluationRubric = apps.get_model('labs', 'EvaluationRubric')
+    EvaluationSheet = apps.get_model('labs', 'EvaluationSheet')
+    
+    rubrics = dict(EvaluationRubric.objects.values_list('id', 'criteria_data'))
+    batch = []
+    for sheet in EvaluationSheet.objects.only('id', 'rubric_id', 'evaluations').iterator(chunk_size=1000):
+        sheet.earned_marks, sheet.max_marks = sheet_marks(rubrics.get(sheet.rubric_id), sheet.evaluations or {})
+        batch.append(sheet)
+        if len(batch) >= 1000:
+            EvaluationSheet.objects.bulk_update(batch, ['earned_marks', 'max_marks'])
+            batch = []
+    if batch:
+        EvaluationSheet.objects.bulk_update(batch, ['earned_marks', 'max_marks'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('labs', '0010_export_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='evaluationsheet',
+            name='earned_marks',
+            field=models.DecimalField(db_index=True, decimal_places=6, default=Decimal('0'), max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='evaluationsheet',
+            name='max_marks',
+            field=models.DecimalField(db_index=True, decimal_places=6, default=Decimal('0'), max_digits=12),
+        ),
+        migrations.RunPython(fill_sheet_marks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.6 on 2026-10-18 12:19
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('labs', '0011_evaluation_sheet_marks'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='signoff',
+            index=models.Index(fields=['part', '-date_updated'], name='labs_signof_part_id_380c5f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='signoff',
+            index=models.Index(fields=['instructor', '-date_updated'], name='labs_signof_instruc_683380_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='signoff',
+            index=models.Index(fields=['status', '-date_updated'], name='labs_signof_status_dbe761_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='signoff',
+            index=models.Index(fields=['-date_updated'], name='labs_signof_date_up_4d9d28_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(condition=models.Q(('active', True)), fields=['name'], name='labs_student_active_name_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.1.6 on 2026-10-18 14:02
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('labs', '0015_lab_content_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gradescale',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
@@ -3,7 +3,15 @@ from django.contrib.auth.models import User, Group, Permission
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.contrib.contenttypes.models import ContentType
 from decimal import Decimal
+import copy
 import json
+import logging
+import numpy as np
+
+from . import defaults
+from .cache import get_part_max_score
+
+logger = logging.getLogger(__name__)
 
 class UserRole(models.Model):
     """Model representing user roles in the system."""
@@ -52,6 +60,15 @@ class GradeScale(models.Model):
     name = models.CharField(max_length=100)
     description = models.TextField(blank=True)
     is_default = models.BooleanField(default=False)
+    # Versions the default rubric and grade scale registry (see labs.defaults)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    GRADE_LETTERS = ('A+', 'A', 'A-', 'B+', 'B', 'B-', 'C+', 'C', 'C-', 'D+', 'D', 'D-', 'F')
+    THRESHOLD_FIELDS = (
+        'a_plus_threshold', 'a_threshold', 'a_minus_threshold', 'b_plus_threshold', 'b_threshold',
+        'b_minus_threshold', 'c_plus_threshold', 'c_threshold', 'c_minus_threshold', 'd_plus_threshold',
+        'd_threshold', 'd_minus_threshold',
+    )
     
     # Grade thresholds (percentage values)
     a_plus_threshold = models.DecimalField(max_digits=5, decimal_places=2, default=Decimal('97.0'))
@@ -82,7 +99,12 @@ class GradeScale(models.Model):
     
     @classmethod
     def get_default_scale(cls):
-        """Returns the default grade scale or creates one if none exists."""
+        """Returns the default grade scale (cached in labs.defaults)."""
+        return defaults.get_default_scale()
+    
+    @classmethod
+    def load_default_scale(cls):
+        """Loads the default grade scale or creates one if none exists."""
         default_scale = cls.objects.filter(is_default=True).first()
         if not default_scale:
             default_scale = cls.objects.create(
@@ -121,6 +143,37 @@ class GradeScale(models.Model):
         else:
             return 'F'
 
+    def threshold_vector(self):
+        """
+        Ascending thresholds and the letters for ``numpy.searchsorted``.
+
+        ``letters[i]`` is the grade of a percentage with ``i`` thresholds at or
+        below it.  Each threshold is capped by the ones above it so that
+        misordered scales grade exactly like ``get_letter_grade``, which
+        returns the first grade whose threshold is met.
+        """
+        thresholds = []
+        for field in self.THRESHOLD_FIELDS:
+            value = float(getattr(self, field))
+            thresholds.append(min(value, thresholds[-1]) if thresholds else value)
+        return np.array(thresholds[::-1]), np.array(self.GRADE_LETTERS[::-1])
+    
+    def get_letter_grades(self, percentages):
+        """Letter grades for a sequence of percentages, in one batch."""
+        percentages = list(percentages)
+        if not percentages:
+            return []
+        thresholds, letters = self.threshold_vector()
+        values = np.array([float(p) for p in percentages])
+        grades = letters[np.searchsorted(thresholds, values, side='right')]
+        
+        # Converting Decimals to float can only change the result right at a
+        # threshold; grade those few exactly
+        near = np.isclose(values[:, None], thresholds[None, :], rtol=0, atol=1e-9).any(axis=1)
+        for i in np.flatnonzero(near):
+            grades[i] = self.get_letter_grade(percentages[i])
+        return grades.tolist()
+
 
 class Lab(models.Model):
     name = models.CharField(max_length=200)
@@ -129,6 +182,8 @@ class Lab(models.Model):
     total_points = models.DecimalField(max_digits=5, decimal_places=2)
     grade_scale = models.ForeignKey(GradeScale, on_delete=models.SET_NULL, null=True, blank=True, 
                                     related_name='labs', help_text="Grade scale to use for this lab")
+    # Versions the signoff page's lab bundles (see views._lab_content)
+    updated_at = models.DateTimeField(auto_now=True)
     
     def get_max_score(self):
         """Calculate the total maximum score for this lab based on all parts."""
@@ -183,6 +238,8 @@ class Part(models.Model):
     is_required = models.BooleanField(default=True)
     has_challenges = models.BooleanField(default=False, help_text="Check if this part has challenge tasks")
     due_date = models.DateTimeField(null=True, blank=True, help_text="Due date for this part's signoff")
+    # Versions the signoff page's lab bundles (see views._lab_content)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['lab', 'order']
@@ -192,12 +249,16 @@ class Part(models.Model):
         
     def save(self, *args, **kwargs):
         """Override save to ensure each part has quality criteria."""
-        is_new = self.pk is None
-        super().save(*args, **kwargs)
+        from .scores import deferred_refresh
         
-        # After saving a new part, automatically create default criteria
-        if is_new:
-            self.create_default_criteria()
+        is_new = self.pk is None
+        # Refresh the materialized scores once, after the criteria exist
+        with deferred_refresh():
+            super().save(*args, **kwargs)
+            
+            # After saving a new part, automatically create default criteria
+            if is_new:
+                self.create_default_criteria()
             
     def create_default_criteria(self):
         """Create default quality criteria for this part if none exist."""
@@ -225,7 +286,13 @@ class Part(models.Model):
             )
         
     def get_max_score(self):
-        """Get the maximum possible score for this part."""
+        """Get the maximum possible score for this part (cached, see labs.cache)."""
+        if self.pk is None:
+            return self._compute_max_score()
+        return get_part_max_score(self.pk, self._compute_max_score)
+        
+    def _compute_max_score(self):
+        """Calculate the maximum possible score for this part."""
         try:
             total_score = Decimal('0')
             
@@ -236,7 +303,7 @@ class Part(models.Model):
                     try:
                         total_score += Decimal(str(c.max_points))
                     except Exception as e:
-                        print(f"Error adding quality criteria {c.id} max points: {e}")
+                        logger.warning("Error adding quality criteria %s max points: %s", c.id, e)
             
             # Add challenge points if this part has challenges
             if self.has_challenges:
@@ -246,7 +313,7 @@ class Part(models.Model):
                         try:
                             total_score += Decimal(str(c.max_points))
                         except Exception as e:
-                            print(f"Error adding challenge {c.id} max points: {e}")
+                            logger.warning("Error adding challenge %s max points: %s", c.id, e)
             
             # Check if any signoffs for this part have evaluation sheets
             found_eval_sheet = False
@@ -260,26 +327,23 @@ class Part(models.Model):
                         found_eval_sheet = True
                         break  # We just need one evaluation sheet to get the max marks
                 except Exception as e:
-                    print(f"Error getting evaluation sheet max marks for signoff {signoff.id}: {e}")
+                    logger.warning("Error getting evaluation sheet max marks for signoff %s: %s", signoff.id, e)
                     continue
                     
             # If no evaluation sheets found, use default rubric
             if not found_eval_sheet:
                 try:
                     # Get default rubric's max marks
-                    default_rubric = EvaluationRubric.get_default_rubric()
-                    if default_rubric:
-                        rubric_max_marks = default_rubric.get_total_max_marks()
-                        total_score += rubric_max_marks
+                    total_score += defaults.get_default_rubric_max_marks()
                 except Exception as e:
-                    print(f"Error getting default rubric max marks: {e}")
+                    logger.warning("Error getting default rubric max marks: %s", e)
                     # If we can't get a default rubric, add a reasonable default
                     total_score += Decimal('60.0')
                 
             return total_score
             
         except Exception as e:
-            print(f"Error calculating max score for part {self.id}: {e}")
+            logger.exception("Error calculating max score for part %s", self.id)
             # Return a reasonable default
             return Decimal('100.0')
         
@@ -289,20 +353,7 @@ class Part(models.Model):
         try:
             signoff = Signoff.objects.get(student=student, part=self, status='approved')
             
-            # Check if evaluation sheet exists, create one if not
-            eval_sheet = signoff.evaluation_sheet.first()
-            if not eval_sheet:
-                # Create a default evaluation sheet with default values
-                rubric = EvaluationRubric.get_default_rubric()
-                # Initialize with "Meets Requirements" (MR) for all criteria
-                default_evaluations = {key: 'MR' for key in rubric.criteria_data.keys()}
-                EvaluationSheet.objects.create(
-                    signoff=signoff,
-                    rubric=rubric,
-                    evaluations=default_evaluations
-                )
-            
-            # Get the quality scores
+            # Get the quality scores (missing rows count as their defaults)
             quality_score = signoff.get_total_quality_score()
             
             # Add challenge scores if this part has challenges
@@ -378,6 +429,8 @@ class Challenge(models.Model):
         ('expert', 'Expert')
     ], default='medium')
     order = models.PositiveIntegerField(default=0)
+    # Versions the signoff page's lab bundles (see views._lab_content)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         verbose_name_plural = "Challenges"
@@ -394,6 +447,8 @@ class QualityCriteria(models.Model):
     description = models.TextField(blank=True)
     max_points = models.PositiveIntegerField(default=10)
     weight = models.FloatField(default=1.0, validators=[MinValueValidator(0.0), MaxValueValidator(1.0)])
+    # Versions the signoff page's lab bundles (see views._lab_content)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         verbose_name_plural = "Quality Criteria"
@@ -402,6 +457,10 @@ class QualityCriteria(models.Model):
     def __str__(self):
         return f"{self.part} - {self.name}"
         
+    def get_default_score(self):
+        """Score counted when a signoff has no QualityScore for this criteria (50% of max points)."""
+        return int(Decimal(str(self.max_points)) * Decimal('0.5'))
+        
     def get_contribution_to_part(self, lab_total_points):
         """Calculate how many points this criteria contributes to the overall lab grade."""
         # Get the total weight of all criteria for this part
@@ -425,6 +484,15 @@ class Student(models.Model):
     email = models.EmailField(blank=True)
     batch = models.DateField(auto_now=False, auto_now_add=False)
     active = models.BooleanField(default=True)
+    # Versions the autocomplete roster (see views.student_roster)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    
+    class Meta:
+        indexes = [
+            # Active roster in name order (student_list, reports, exports).
+            # Partial, because the boolean filter can't seek a composite index on SQLite
+            models.Index(fields=['name'], condition=models.Q(active=True), name='labs_student_active_name_idx'),
+        ]
     
     def __str__(self):
         return f"{self.name} ({self.student_id})"
@@ -506,6 +574,17 @@ class Signoff(models.Model):
     class Meta:
         unique_together = ('student', 'part')
         ordering = ['-date_updated']
+        # (student, part) lookups use the unique_together index
+        indexes = [
+            # A part's signoffs, newest first (part_detail)
+            models.Index(fields=['part', '-date_updated']),
+            # An instructor's signoffs by recency (ta_report)
+            models.Index(fields=['instructor', '-date_updated']),
+            # Status filters and counts, newest first (signoff_list, quick_stats)
+            models.Index(fields=['status', '-date_updated']),
+            # Default ordering of the unfiltered signoff list
+            models.Index(fields=['-date_updated']),
+        ]
     
     def __str__(self):
         return f"{self.student} - {self.part} - {self.status}"
@@ -522,36 +601,15 @@ class Signoff(models.Model):
         # Create a mapping of criteria ID to score for easy access
         score_map = {score.criteria_id: Decimal(str(score.score)) for score in scores}
         
-        # Sum up scores for all quality criteria - create default scores if missing
+        # Sum up scores for all quality criteria - missing scores count as the default
         for criterion in criteria:
             if criterion.id in score_map:
                 quality_score += score_map[criterion.id]
             else:
-                # Create a default score (50% of max points) for missing criteria
-                default_score = Decimal(str(criterion.max_points)) * Decimal('0.5')
-                quality_score += default_score
-                
-                # Create the missing score record
-                QualityScore.objects.create(
-                    signoff=self,
-                    criteria=criterion,
-                    score=int(default_score)
-                )
-        
-        # Check if there's an evaluation sheet, create if missing
-        evaluation = self.evaluation_sheet.first()
-        if not evaluation:
-            # Create default evaluation sheet
-            rubric = EvaluationRubric.get_default_rubric()
-            default_evaluations = {key: 'MR' for key in rubric.criteria_data.keys()}
-            evaluation = EvaluationSheet.objects.create(
-                signoff=self,
-                rubric=rubric,
-                evaluations=default_evaluations
-            )
+                quality_score += Decimal(str(criterion.get_default_score()))
         
         # Add evaluation sheet score to quality score
-        return quality_score + evaluation.get_earned_marks()
+        return quality_score + self.get_evaluation_sheet().get_earned_marks()
         
     def get_total_challenge_score(self):
         """Get the total score from all challenges."""
@@ -573,17 +631,10 @@ class Signoff(models.Model):
         # Create a mapping of challenge ID to score for easy access
         score_map = {score.challenge_id: Decimal(str(score.score)) for score in scores}
         
-        # Sum up scores for all challenges - create default scores of 0 if missing
+        # Sum up scores for all challenges - missing scores count as 0
         for challenge in challenges:
             if challenge.id in score_map:
                 challenge_score += score_map[challenge.id]
-            else:
-                # Create a score of 0 for missing challenges
-                ChallengeScore.objects.create(
-                    signoff=self,
-                    challenge=challenge,
-                    score=0
-                )
         
         return challenge_score
     
@@ -596,20 +647,21 @@ class Signoff(models.Model):
             # Sum up maximum points for all criteria
             max_quality_score = sum(Decimal(str(c.max_points)) for c in criteria)
         
-        # Check if there's an evaluation sheet, create if missing
+        # Add evaluation sheet max score
+        return max_quality_score + self.get_evaluation_sheet().get_total_max_marks()
+    
+    def get_evaluation_sheet(self):
+        """
+        Get the evaluation sheet for this signoff.
+        
+        A signoff without a sheet gets an unsaved default sheet, so reading
+        scores never writes to the database.  Run the backfill_signoff_defaults
+        command to store the missing sheets.
+        """
         evaluation = self.evaluation_sheet.first()
         if not evaluation:
-            # Create default evaluation sheet
-            rubric = EvaluationRubric.get_default_rubric()
-            default_evaluations = {key: 'MR' for key in rubric.criteria_data.keys()}
-            evaluation = EvaluationSheet.objects.create(
-                signoff=self,
-                rubric=rubric,
-                evaluations=default_evaluations
-            )
-        
-        # Add evaluation sheet max score
-        return max_quality_score + evaluation.get_total_max_marks()
+            evaluation = EvaluationSheet.build_default(self)
+        return evaluation
     
     def get_max_challenge_score(self):
         """Get the maximum possible score from all challenges."""
@@ -714,6 +766,9 @@ class EvaluationRubric(models.Model):
     
     # Store criteria as serialized JSON
     criteria_data = models.JSONField(default=dict)
+    # Versions the signoff page's lab bundles (see views._lab_content) and
+    # the default rubric and grade scale registry (see labs.defaults)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         verbose_name = "Evaluation Rubric"
@@ -722,15 +777,42 @@ class EvaluationRubric(models.Model):
     def __str__(self):
         return self.name
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored criteria so save() can tell when they change
+        if 'criteria_data' in field_names:
+            instance._saved_criteria_data = copy.deepcopy(instance.criteria_data)
+        return instance
+    
     def save(self, *args, **kwargs):
         # Ensure only one default rubric
         if self.is_default:
             EvaluationRubric.objects.filter(is_default=True).exclude(pk=self.pk).update(is_default=False)
+        criteria_changed = getattr(self, '_saved_criteria_data', None) != self.criteria_data
         super().save(*args, **kwargs)
+        
+        # Sheets store their marks, which depend on the criteria
+        if criteria_changed:
+            self.update_sheet_marks()
+            self._saved_criteria_data = copy.deepcopy(self.criteria_data)
+    
+    def update_sheet_marks(self):
+        """Recompute the stored marks of every evaluation sheet using this rubric."""
+        sheets = list(self.evaluation_sheets.only('id', 'rubric_id', 'evaluations'))
+        for sheet in sheets:
+            sheet.rubric = self
+            sheet.update_marks()
+        EvaluationSheet.objects.bulk_update(sheets, ['earned_marks', 'max_marks'], batch_size=500)
     
     @classmethod
     def get_default_rubric(cls):
-        """Returns the default rubric or creates one if none exists."""
+        """Returns the default rubric (cached in labs.defaults)."""
+        return defaults.get_default_rubric()
+    
+    @classmethod
+    def load_default_rubric(cls):
+        """Loads the default rubric or creates one if none exists."""
         default_rubric = cls.objects.filter(is_default=True).first()
         if not default_rubric:
             # Create a default rubric with standard criteria
@@ -787,30 +869,57 @@ class EvaluationSheet(models.Model):
     # Store evaluations as serialized JSON
     evaluations = models.JSONField(default=dict)
     
+    # get_earned_marks() and get_total_max_marks(), stored so reports can
+    # Sum() them in SQL; kept current by save() and EvaluationRubric.save()
+    earned_marks = models.DecimalField(max_digits=12, decimal_places=6, default=Decimal('0'), db_index=True)
+    max_marks = models.DecimalField(max_digits=12, decimal_places=6, default=Decimal('0'), db_index=True)
+    
     def __str__(self):
         return f"Evaluation for {self.signoff}"
     
+    def save(self, *args, **kwargs):
+        self.update_marks()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | {'earned_marks', 'max_marks'}
+        super().save(*args, **kwargs)
+    
+    def update_marks(self):
+        """Recompute the stored marks from the evaluations and rubric."""
+        self.earned_marks = self.get_earned_marks()
+        self.max_marks = self.get_total_max_marks()
+    
     @classmethod
-    def create_from_rubric(cls, signoff, rubric=None):
-        """Creates a new evaluation sheet from a rubric."""
+    def build_default(cls, signoff, rubric=None):
+        """Builds an unsaved evaluation sheet with every criterion at 'MR'."""
+        # Initialize evaluations with 'MR' (Meets Requirements) as default
         if not rubric:
             rubric = EvaluationRubric.get_default_rubric()
-            
-        # Initialize evaluations with 'MR' (Meets Requirements) as default
-        evaluations = {key: 'MR' for key in rubric.criteria_data.keys()}
+            evaluations = defaults.get_default_evaluations()
+        else:
+            evaluations = {key: 'MR' for key in rubric.criteria_data.keys()}
         
-        return cls.objects.create(
+        sheet = cls(
             signoff=signoff,
             rubric=rubric,
             evaluations=evaluations
         )
+        sheet.update_marks()
+        return sheet
+    
+    @classmethod
+    def create_from_rubric(cls, signoff, rubric=None):
+        """Creates a new evaluation sheet from a rubric."""
+        evaluation = cls.build_default(signoff, rubric)
+        evaluation.save()
+        return evaluation
     
     def get_total_max_marks(self):
         """Get total maximum possible marks for this evaluation sheet."""
         try:
             if not self.rubric or not hasattr(self.rubric, 'criteria_data'):
                 # If no rubric defined, use a fallback default
-                print(f"Warning: No valid rubric for evaluation sheet {self.id}, using fallback")
+                logger.warning("No valid rubric for evaluation sheet %s, using fallback", self.id)
                 return Decimal('60.0')  # Default sum of all standard criteria
                 
             # Sum up max marks from all criteria in the rubric
@@ -821,11 +930,11 @@ class EvaluationSheet(models.Model):
                         total += Decimal(str(criteria_data['max_marks']))
                     except (ValueError, TypeError) as e:
                         # If we can't convert to decimal, use a default value
-                        print(f"Warning: Invalid max_marks value for criteria {criteria_key}: {e}")
+                        logger.warning("Invalid max_marks value for criteria %s: %s", criteria_key, e)
                         total += Decimal('5.0')  # Default value
             return total
         except Exception as e:
-            print(f"Error calculating max marks for evaluation sheet {self.id}: {e}")
+            logger.exception("Error calculating max marks for evaluation sheet %s", self.id)
             return Decimal('60.0')  # Default fallback
     
     def get_earned_marks(self):
@@ -847,13 +956,13 @@ class EvaluationSheet(models.Model):
                             score_percentage = Decimal(str(self.STATUS_TO_SCORE.get(status, 0)))
                             total_earned += max_marks * score_percentage
                 except (ValueError, TypeError, KeyError) as e:
-                    print(f"Error calculating earned marks for field {field}: {e}")
+                    logger.warning("Error calculating earned marks for field %s: %s", field, e)
                     continue
                     
             return total_earned
             
         except Exception as e:
-            print(f"Error calculating total earned marks: {e}")
+            logger.exception("Error calculating total earned marks")
             return Decimal('0')
     
     def get_percentage(self):
@@ -878,11 +987,128 @@ class EvaluationSheet(models.Model):
                     return max_marks * Decimal(str(self.STATUS_TO_SCORE.get(status, 0)))
             return Decimal('0')
         except Exception as e:
-            print(f"Error calculating earned marks for criterion {criterion}: {e}")
+            logger.exception("Error calculating earned marks for criterion %s", criterion)
             return Decimal('0')
         
     def get_criterion_display(self, criterion):
         """Get display name for a criterion's status."""
         status = self.evaluations.get(criterion, 'ND')
         return dict(self.STATUS_CHOICES).get(status, 'Not Done')
-    
\ No newline at end of file
+    
+
+class StudentPartScore(models.Model):
+    """
+    Materialized score of a student on a part.
+
+    Rows are maintained by ``labs.scores`` whenever signoffs, scores or the
+    course structure change, so reports can read them instead of recomputing.
+    """
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='part_scores')
+    part = models.ForeignKey(Part, on_delete=models.CASCADE, related_name='student_scores')
+    status = models.CharField(max_length=20, default='not_started')
+    is_late = models.BooleanField(default=False)
+    quality_earned = models.DecimalField(max_digits=10, decimal_places=3, default=0)
+    quality_max = models.DecimalField(max_digits=10, decimal_places=3, default=0)
+    evaluation_earned = models.DecimalField(max_digits=10, decimal_places=3, default=0)
+    evaluation_max = models.DecimalField(max_digits=10, decimal_places=3, default=0)
+    challenge_earned = models.DecimalField(max_digits=10, decimal_places=3, default=0)
+    challenge_max = models.DecimalField(max_digits=10, decimal_places=3, default=0)
+    earned_score = models.DecimalField(max_digits=10, decimal_places=3, default=0,
+                                       help_text="Score counted towards the lab (approved signoffs only)")
+    max_score = models.DecimalField(max_digits=10, decimal_places=3, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('student', 'part')
+
+    def __str__(self):
+        return f"{self.student} - {self.part} - {self.earned_score}/{self.max_score}"
+
+
+class StudentLabScore(models.Model):
+    """Materialized roll-up of a student's part scores for one lab."""
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='lab_scores')
+    lab = models.ForeignKey(Lab, on_delete=models.CASCADE, related_name='student_scores')
+    earned_score = models.DecimalField(max_digits=10, decimal_places=3, default=0)
+    max_score = models.DecimalField(max_digits=10, decimal_places=3, default=0)
+    percentage = models.DecimalField(max_digits=7, decimal_places=3, default=0)
+    letter_grade = models.CharField(max_length=2, default='F')
+    completed_parts = models.PositiveIntegerField(default=0)
+    total_parts = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('student', 'lab')
+
+    def __str__(self):
+        return f"{self.student} - {self.lab} - {self.percentage}%"
+
+
+class StudentCourseScore(models.Model):
+    """Materialized roll-up of a student's scores across all labs."""
+    student = models.OneToOneField(Student, on_delete=models.CASCADE, related_name='course_score')
+    earned_score = models.DecimalField(max_digits=10, decimal_places=3, default=0)
+    max_score = models.DecimalField(max_digits=10, decimal_places=3, default=0)
+    overall_grade = models.DecimalField(max_digits=7, decimal_places=3, default=0)
+    letter_grade = models.CharField(max_length=2, default='F')
+    completion = models.DecimalField(max_digits=7, decimal_places=3, default=0,
+                                     help_text="Percentage of required parts approved")
+    completed_parts = models.PositiveIntegerField(default=0)
+    required_parts = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.student} - {self.overall_grade}%"
+
+
+class CacheVersion(models.Model):
+    """
+    Version counter of cached course figures (see ``labs.cache``).
+
+    Kept in the database so that every worker sees a bump.
+    """
+    key = models.CharField(max_length=100, unique=True)
+    value = models.BigIntegerField()
+
+    def __str__(self):
+        return f"{self.key} = {self.value}"
+
+
+class ExportJob(models.Model):
+    """A whole-course export generated in the background (see labs.jobs)."""
+    KIND_CHOICES = (
+        ('all_data', 'Complete Lab Report'),
+        ('student_grades', 'Student Grade Report'),
+    )
+    STATUS_CHOICES = (
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    )
+    
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    progress = models.PositiveIntegerField(default=0, help_text="Percentage of students written")
+    row_count = models.PositiveIntegerField(default=0)
+    artifact_path = models.CharField(max_length=500, blank=True)
+    fingerprint = models.CharField(max_length=64, blank=True,
+                                   help_text="Hash of the data the artifact was built from")
+    error = models.TextField(blank=True)
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True,
+                                     related_name='export_jobs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True,
+                                        help_text="Last sign of life from the runner")
+    attempts = models.PositiveIntegerField(default=0)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['kind', 'fingerprint', 'status']),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_kind_display()} - {self.status} ({self.progress}%)"
@@ -0,0 +1,63 @@
+"""
+Role resolution for the permission decorators and the ``has_role`` filter.
+
+``RoleMiddleware`` (see ``labs.middleware``) resolves the signed-in user's
+role once per request and stores it as ``request.role`` and on
+``request.user``.  ``RoleBackend`` loads the session's user together with
+their ``UserRole`` in the one query authentication already makes, so the
+role always comes from the database: a changed role applies from the
+user's next request in every worker, and checking permissions costs no
+query of its own.
+"""
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+from .models import UserRole
+
+_UNSET = object()
+
+
+class RoleBackend(ModelBackend):
+    """``ModelBackend`` that loads the user's ``UserRole`` with the user."""
+
+    def get_user(self, user_id):
+        UserModel = get_user_model()
+        try:
+            user = UserModel._default_manager.select_related('role').get(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
+
+
+def load_role(user):
+    """Role name of a user, or None (no query when ``RoleBackend`` loaded the user)."""
+    try:
+        return user.role.role
+    except UserRole.DoesNotExist:
+        return None
+
+
+def resolve_role(request):
+    """Role name of the request's user."""
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return None
+    user._labs_role = load_role(user)
+    return user._labs_role
+
+
+def user_role(user):
+    """Role name of ``user``: the one resolved for this request, else from the database."""
+    if not user.is_authenticated:
+        return None
+    role = getattr(user, '_labs_role', _UNSET)
+    if role is _UNSET:
+        user._labs_role = load_role(user)
+    return user._labs_role
+
+
+def request_role(request):
+    role = getattr(request, 'role', _UNSET)
+    if role is _UNSET:
+        role = user_role(request.user)
+    return role
@@ -0,0 +1,225 @@
+"""
+Materialized student scores.
+
+``StudentPartScore``, ``StudentLabScore`` and ``StudentCourseScore`` hold the
+numbers the reports need (part/lab/course scores, letter grades, completion)
+so that report pages read a few indexed tables instead of recomputing every
+student x lab x part score on each request.
+
+The rows are recomputed with the set-based ``Gradebook`` and written with
+upserts.  ``labs.signals`` refreshes the affected students whenever a
+signoff, score or evaluation sheet is saved or deleted, and the whole table
+when the course structure changes.  Writes that touch many rows at once can
+wrap themselves in ``deferred_refresh()`` so each student is only refreshed
+once, at the end of the block.
+
+``python manage.py rebuild_scores`` rebuilds the tables from scratch.
+"""
+import threading
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.db import transaction
+
+from .cache import invalidate_all_part_max
+from .gradebook import Gradebook, rubric_max_marks
+from .models import Student, StudentPartScore, StudentLabScore, StudentCourseScore
+
+PART_FIELDS = [
+    'status', 'is_late', 'quality_earned', 'quality_max', 'evaluation_earned',
+    'evaluation_max', 'challenge_earned', 'challenge_max', 'earned_score',
+    'max_score', 'updated_at',
+]
+LAB_FIELDS = [
+    'earned_score', 'max_score', 'percentage', 'letter_grade',
+    'completed_parts', 'total_parts', 'updated_at',
+]
+COURSE_FIELDS = [
+    'earned_score', 'max_score', 'overall_grade', 'letter_grade', 'completion',
+    'completed_parts', 'required_parts', 'updated_at',
+]
+
+BATCH_SIZE = 500
+
+_local = threading.local()
+
+
+def _quantize(value):
+    """Round to the precision the score columns store."""
+    return Decimal(str(value)).quantize(Decimal('0.001'))
+
+
+def _part_rows(gradebook, student):
+    for part in gradebook.part_by_id.values():
+        row = StudentPartScore(
+            student=student,
+            part=part,
+            quality_max=gradebook.criteria_max_score(part),
+            challenge_max=gradebook.challenge_max_score(part),
+            earned_score=gradebook.part_student_score(part, student),
+            max_score=gradebook.part_max_score(part),
+        )
+        signoff = gradebook.signoff(student, part)
+        if signoff:
+            row.status = signoff.status
+            row.is_late = part.is_signoff_late(signoff)
+            row.quality_earned = gradebook.signoff_criteria_score(signoff)
+            row.evaluation_earned = gradebook.evaluation_earned_marks(signoff)
+            row.evaluation_max = gradebook.evaluation_max_marks(signoff)
+            row.challenge_earned = gradebook.signoff_challenge_score(signoff)
+        else:
+            row.evaluation_max = rubric_max_marks(gradebook.default_rubric.criteria_data)
+        yield row
+
+
+def _lab_rows(gradebook, student):
+    for lab in gradebook.labs:
+        parts = gradebook.parts(lab)
+        percentage = gradebook.lab_student_percentage(lab, student)
+        yield StudentLabScore(
+            student=student,
+            lab=lab,
+            earned_score=gradebook.lab_student_score(lab, student),
+            max_score=gradebook.lab_max_score(lab),
+            percentage=_quantize(percentage),
+            letter_grade=gradebook.lab_grade_letter(lab, student),
+            completed_parts=sum(1 for part in parts if gradebook.part_status(student, part) == 'approved'),
+            total_parts=len(parts),
+        )
+
+
+def _course_row(gradebook, student):
+    earned, total = gradebook.student_points(student)
+    completed, required = gradebook.required_part_counts(student)
+    return StudentCourseScore(
+        student=student,
+        earned_score=earned,
+        max_score=total,
+        overall_grade=_quantize(gradebook.overall_grade(student)),
+        letter_grade=gradebook.course_letter_grade(student),
+        completion=_quantize(gradebook.completion_status(student)),
+        completed_parts=completed,
+        required_parts=required,
+    )
+
+
+def _write_rows(gradebook):
+    part_rows = []
+    lab_rows = []
+    course_rows = []
+    for student in gradebook.students:
+        part_rows.extend(_part_rows(gradebook, student))
+        lab_rows.extend(_lab_rows(gradebook, student))
+        course_rows.append(_course_row(gradebook, student))
+
+    StudentPartScore.objects.bulk_create(
+        part_rows, batch_size=BATCH_SIZE, update_conflicts=True,
+        unique_fields=['student', 'part'], update_fields=PART_FIELDS,
+    )
+    StudentLabScore.objects.bulk_create(
+        lab_rows, batch_size=BATCH_SIZE, update_conflicts=True,
+        unique_fields=['student', 'lab'], update_fields=LAB_FIELDS,
+    )
+    StudentCourseScore.objects.bulk_create(
+        course_rows, batch_size=BATCH_SIZE, update_conflicts=True,
+        unique_fields=['student'], update_fields=COURSE_FIELDS,
+    )
+
+
+def _max_scores_changed(gradebook, part_ids=None):
+    """
+    True if the stored max score of any of ``part_ids`` (every part when None)
+    differs from the freshly computed one.
+    """
+    if part_ids is None:
+        part_ids = gradebook.part_by_id
+    for part_id in part_ids:
+        part = gradebook.part_by_id.get(part_id)
+        if part is None:
+            continue
+        # Every row of a part is written with the same max score, so one will do
+        stored = list(StudentPartScore.objects.filter(part_id=part_id).order_by().values_list('max_score', flat=True)[:1])
+        if stored and stored[0] != _quantize(gradebook.part_max_score(part)):
+            return True
+    return False
+
+
+def refresh_scores(student_ids=None, part_ids=None):
+    """
+    Recompute the materialized scores of the given students.
+
+    With ``student_ids=None`` every student is refreshed.  ``part_ids`` are
+    the parts whose signoffs or scores changed; their max score may have moved
+    for every student.  None means any part may have.
+    """
+    with transaction.atomic():
+        students = Student.objects.all()
+        if student_ids is not None:
+            students = students.filter(id__in=list(student_ids))
+        gradebook = Gradebook(students=students)
+        if student_ids is not None and _max_scores_changed(gradebook, part_ids):
+            # A part's max score follows the rubric of its latest evaluation
+            # sheet, so one student's signoff can change it for everyone.
+            gradebook = Gradebook()
+        _write_rows(gradebook)
+
+
+def rebuild_scores():
+    """Drop and recompute every materialized score row."""
+    with transaction.atomic():
+        # Recompute the max scores too rather than trusting the cache
+        invalidate_all_part_max()
+        StudentPartScore.objects.all().delete()
+        StudentLabScore.objects.all().delete()
+        StudentCourseScore.objects.all().delete()
+        _write_rows(Gradebook())
+
+
+def request_refresh(student_ids=None, part_ids=None):
+    """
+    Refresh the given students (all students when None).
+
+    ``part_ids`` are the parts the change touched (see ``refresh_scores``).
+    Inside ``deferred_refresh()`` the request is queued and merged with the
+    others; outside it the refresh runs immediately.
+    """
+    pending = getattr(_local, 'pending', None)
+    if pending is None:
+        refresh_scores(student_ids, part_ids)
+    elif student_ids is None:
+        _local.refresh_all = True
+    else:
+        pending.update(student_ids)
+        if part_ids is None:
+            _local.pending_parts = None
+        elif _local.pending_parts is not None:
+            _local.pending_parts.update(part_ids)
+
+
+@contextmanager
+def deferred_refresh():
+    """
+    Collect refresh requests and run them once when the block exits.
+
+    Nested blocks are merged into the outermost one.  Nothing is refreshed if
+    the block raises.
+    """
+    if getattr(_local, 'pending', None) is not None:
+        yield
+        return
+
+    _local.pending = set()
+    _local.pending_parts = set()
+    _local.refresh_all = False
+    try:
+        yield
+        pending, pending_parts, refresh_all = _local.pending, _local.pending_parts, _local.refresh_all
+    finally:
+        _local.pending = None
+        _local.pending_parts = None
+        _local.refresh_all = False
+
+    if refresh_all:
+        refresh_scores()
+    elif pending:
+        refresh_scores(pending, pending_parts)
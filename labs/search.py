@@ -0,0 +1,147 @@
+"""
+Indexed student search for the autocomplete.
+
+Substring matching with ``icontains`` scans the whole student table on every
+keystroke.  Instead:
+
+* On SQLite, ``labs_student_search`` is an FTS5 table with the trigram
+  tokenizer over the students' IDs and names, kept in sync with
+  ``labs_student`` by triggers (so bulk writes and ``update()`` are covered
+  too).
+* On PostgreSQL, ``pg_trgm`` GIN indexes on the same columns serve the
+  ``ILIKE '%...%'`` filter.
+
+``ensure_search_index`` creates whatever is missing; ``labs.signals`` runs it
+after every ``migrate``, which also restores the SQLite triggers when a
+migration rebuilds the student table.  Queries shorter than a trigram, and
+databases without the index, fall back to ``icontains``.
+
+Matches are ranked student ID prefix first, then name prefix, then by name.
+"""
+import logging
+
+from django.db import DatabaseError, connection, connections, transaction
+from django.db.models import Case, IntegerField, Q, Value, When
+
+from .models import Student
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = 'labs_student_search'
+# Trigram indexes can't serve shorter queries
+MIN_INDEXED_LENGTH = 3
+
+SQLITE_INDEX_SQL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        student_id, name, content='labs_student', content_rowid='id', tokenize='trigram'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert AFTER INSERT ON labs_student BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, student_id, name) VALUES (new.id, new.student_id, new.name);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete AFTER DELETE ON labs_student BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, student_id, name)
+        VALUES ('delete', old.id, old.student_id, old.name);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update AFTER UPDATE OF student_id, name ON labs_student BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, student_id, name)
+        VALUES ('delete', old.id, old.student_id, old.name);
+        INSERT INTO {FTS_TABLE}(rowid, student_id, name) VALUES (new.id, new.student_id, new.name);
+    END""",
+    # Index the rows that were written while the triggers were missing
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+SQLITE_TRIGGERS = {f'{FTS_TABLE}_insert', f'{FTS_TABLE}_delete', f'{FTS_TABLE}_update'}
+
+POSTGRES_INDEX_SQL = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'CREATE INDEX IF NOT EXISTS labs_student_id_trgm_idx ON labs_student USING gin (student_id gin_trgm_ops)',
+    'CREATE INDEX IF NOT EXISTS labs_student_name_trgm_idx ON labs_student USING gin (name gin_trgm_ops)',
+]
+
+SQLITE_SEARCH_SQL = f"""
+    SELECT s.id, s.student_id, s.name, s.email, s.active
+    FROM {FTS_TABLE} f JOIN labs_student s ON s.id = f.rowid
+    WHERE {FTS_TABLE} MATCH %s {{active}}
+    ORDER BY s.student_id LIKE %s ESCAPE '\\' DESC, s.name LIKE %s ESCAPE '\\' DESC, s.name
+    LIMIT %s
+"""
+
+POSTGRES_SEARCH_SQL = """
+    SELECT id, student_id, name, email, active
+    FROM labs_student
+    WHERE (student_id ILIKE %s OR name ILIKE %s) {active}
+    ORDER BY student_id ILIKE %s DESC, name ILIKE %s DESC, name
+    LIMIT %s
+"""
+
+
+def _sqlite_index_exists(cursor):
+    cursor.execute(
+        "SELECT name FROM sqlite_master WHERE name = %s OR (type = 'trigger' AND tbl_name = 'labs_student')",
+        [FTS_TABLE]
+    )
+    names = {row[0] for row in cursor.fetchall()}
+    return FTS_TABLE in names and SQLITE_TRIGGERS <= names
+
+
+def ensure_search_index(using=None):
+    """Create the search index of the database ``using`` if it is missing."""
+    conn = connections[using] if using else connection
+    if conn.vendor == 'sqlite':
+        statements = SQLITE_INDEX_SQL
+    elif conn.vendor == 'postgresql':
+        statements = POSTGRES_INDEX_SQL
+    else:
+        return
+    try:
+        with transaction.atomic(using=conn.alias), conn.cursor() as cursor:
+            if conn.vendor == 'sqlite' and _sqlite_index_exists(cursor):
+                return
+            for sql in statements:
+                cursor.execute(sql)
+    except DatabaseError as e:
+        # e.g. SQLite without FTS5/trigram, or no right to create extensions;
+        # searches then fall back to icontains
+        logger.warning("Could not create the student search index: %s", e)
+
+
+def _like_escape(text):
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _fallback_search(query, limit, include_inactive):
+    students = Student.objects.all() if include_inactive else Student.objects.filter(active=True)
+    return list(
+        students.filter(Q(name__icontains=query) | Q(student_id__icontains=query))
+        .annotate(rank=Case(
+            When(student_id__istartswith=query, then=Value(0)),
+            When(name__istartswith=query, then=Value(1)),
+            default=Value(2),
+            output_field=IntegerField(),
+        ))
+        .order_by('rank', 'name')[:limit]
+    )
+
+
+def search_students(query, limit=10, include_inactive=False):
+    """Active (or all) students whose ID or name contains ``query``, best matches first."""
+    query = query.strip()
+    if not query:
+        return []
+    if len(query) < MIN_INDEXED_LENGTH:
+        return _fallback_search(query, limit, include_inactive)
+
+    prefix = _like_escape(query) + '%'
+    if connection.vendor == 'sqlite':
+        # A phrase matches as a substring with the trigram tokenizer
+        phrase = '"' + query.replace('"', '""') + '"'
+        sql = SQLITE_SEARCH_SQL.format(active='' if include_inactive else 'AND s.active')
+        try:
+            return list(Student.objects.raw(sql, [phrase, prefix, prefix, limit]))
+        except DatabaseError as e:
+            logger.warning("Student search index unavailable, using icontains: %s", e)
+    elif connection.vendor == 'postgresql':
+        contains = '%' + _like_escape(query) + '%'
+        sql = POSTGRES_SEARCH_SQL.format(active='' if include_inactive else 'AND active')
+        return list(Student.objects.raw(sql, [contains, contains, prefix, prefix, limit]))
+    return _fallback_search(query, limit, include_inactive)
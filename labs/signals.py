@@ -0,0 +1,190 @@
+"""
+Signal handlers keeping the materialized scores in ``labs.scores``, the
+caches in ``labs.cache`` and the defaults registry in ``labs.defaults`` current.
+
+Signoff, score and evaluation sheet changes refresh the student they belong
+to.  Changes to the course structure (labs, parts, criteria, challenges,
+rubrics, grade scales) can move every student's max score or letter grade,
+so they refresh all students, unless the save only changed fields the scores
+don't use (a name, a description).  Edits that save several of them wrap
+themselves in ``deferred_refresh()`` so everyone is refreshed once.
+
+Deletes that cascade from a larger delete are skipped: the rows vanish with
+a deleted student, a deleted signoff refreshes its student once, and a
+deleted lab or part refreshes everyone once from its own handler.
+"""
+from django.db import models
+from django.core.signals import request_started
+from django.db.models.signals import pre_save, post_save, post_delete, post_migrate
+from django.dispatch import receiver
+
+from .models import (
+    Lab, Part, QualityCriteria, Challenge, Student, Signoff, QualityScore,
+    ChallengeScore, EvaluationSheet, EvaluationRubric, GradeScale,
+)
+from .cache import invalidate_part_max, invalidate_all_part_max
+from .defaults import check_on_next_use, invalidate_defaults
+from .search import ensure_search_index
+from .scores import request_refresh
+
+STRUCTURE_MODELS = (Lab, Part, QualityCriteria, Challenge, EvaluationRubric, GradeScale)
+# Fields of the structure models the materialized scores depend on
+SCORE_FIELDS = {
+    Lab: ['total_points', 'grade_scale_id'],
+    Part: ['lab_id', 'is_required', 'has_challenges', 'due_date'],
+    QualityCriteria: ['part_id', 'max_points'],
+    Challenge: ['part_id', 'max_points'],
+    EvaluationRubric: ['is_default', 'criteria_data'],
+    GradeScale: ['is_default'] + [
+        f'{letter}{step}_threshold' for letter in 'abcd' for step in ('_plus', '', '_minus')
+    ],
+}
+SCORE_MODELS = (QualityScore, ChallengeScore, EvaluationSheet)
+
+# Receivers run in the order they are connected: the registry and caches are
+# invalidated before the materialized scores are recomputed from them.
+
+
+# Default rubric and grade scale registry
+
+@receiver(post_save, sender=EvaluationRubric)
+@receiver(post_delete, sender=EvaluationRubric)
+@receiver(post_save, sender=GradeScale)
+@receiver(post_delete, sender=GradeScale)
+def invalidate_default_registry(sender, instance, **kwargs):
+    invalidate_defaults()
+
+
+@receiver(request_started)
+def recheck_default_registry(sender, **kwargs):
+    # Each request sees defaults changed by other workers
+    check_on_next_use()
+
+
+# Part max score cache
+
+@receiver(post_save, sender=QualityCriteria)
+@receiver(post_delete, sender=QualityCriteria)
+@receiver(post_save, sender=Challenge)
+@receiver(post_delete, sender=Challenge)
+def invalidate_part_max_for_item(sender, instance, **kwargs):
+    invalidate_part_max(instance.part_id)
+
+
+@receiver(post_save, sender=Part)
+@receiver(post_delete, sender=Part)
+def invalidate_part_max_for_part(sender, instance, **kwargs):
+    # Covers has_challenges being switched on or off
+    invalidate_part_max(instance.id)
+
+
+@receiver(post_save, sender=Signoff)
+@receiver(post_delete, sender=Signoff)
+def invalidate_part_max_for_signoff(sender, instance, **kwargs):
+    # The max score uses the rubric of the part's most recently updated signoff
+    invalidate_part_max(instance.part_id)
+
+
+@receiver(post_save, sender=EvaluationSheet)
+@receiver(post_delete, sender=EvaluationSheet)
+def invalidate_part_max_for_sheet(sender, instance, **kwargs):
+    part_id = Signoff.objects.filter(pk=instance.signoff_id).values_list('part_id', flat=True).first()
+    if part_id is not None:
+        invalidate_part_max(part_id)
+
+
+@receiver(post_save, sender=EvaluationRubric)
+@receiver(post_delete, sender=EvaluationRubric)
+def invalidate_part_max_for_rubric(sender, instance, **kwargs):
+    invalidate_all_part_max()
+
+
+# Materialized scores
+
+def _origin_model(origin):
+    """Model class of the object or queryset a delete started from."""
+    if origin is None:
+        return None
+    if isinstance(origin, models.Model):
+        return type(origin)
+    return getattr(origin, 'model', None)
+
+
+def _covered_by_origin(sender, origin):
+    """True if the delete that removed ``sender`` rows refreshes scores itself."""
+    origin_model = _origin_model(origin)
+    if origin_model is None or origin_model is sender:
+        return False
+    return origin_model in (Student, Signoff) or origin_model in STRUCTURE_MODELS
+
+
+@receiver(post_save, sender=Signoff)
+@receiver(post_delete, sender=Signoff)
+def refresh_signoff_student(sender, instance, origin=None, **kwargs):
+    if _covered_by_origin(sender, origin):
+        return
+    request_refresh([instance.student_id], [instance.part_id])
+
+
+def refresh_score_student(sender, instance, origin=None, **kwargs):
+    if _covered_by_origin(sender, origin):
+        return
+    signoff = Signoff.objects.filter(pk=instance.signoff_id).values_list('student_id', 'part_id').first()
+    if signoff is not None:
+        request_refresh([signoff[0]], [signoff[1]])
+
+
+def remember_score_fields(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Load the stored values of the fields the scores use before an update."""
+    fields = SCORE_FIELDS[sender]
+    instance._stored_score_fields = None
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    if update_fields is not None and not {field.removesuffix('_id') for field in fields} & set(update_fields):
+        # Nothing the scores use is being saved
+        instance._stored_score_fields = {}
+        return
+    instance._stored_score_fields = sender.objects.filter(pk=instance.pk).values(*fields).first()
+
+
+def _score_fields_changed(sender, instance):
+    stored = getattr(instance, '_stored_score_fields', None)
+    if stored is None:
+        # New, or not loaded
+        return True
+    return any(getattr(instance, field) != value for field, value in stored.items())
+
+
+def refresh_all_students(sender, instance, origin=None, **kwargs):
+    if _covered_by_origin(sender, origin):
+        return
+    if kwargs.get('signal') is post_save and not _score_fields_changed(sender, instance):
+        return
+    request_refresh()
+
+
+for model in SCORE_MODELS:
+    post_save.connect(refresh_score_student, sender=model, dispatch_uid=f'scores_{model.__name__}_save')
+    post_delete.connect(refresh_score_student, sender=model, dispatch_uid=f'scores_{model.__name__}_delete')
+
+for model in STRUCTURE_MODELS:
+    pre_save.connect(remember_score_fields, sender=model, dispatch_uid=f'scores_{model.__name__}_pre_save')
+    post_save.connect(refresh_all_students, sender=model, dispatch_uid=f'scores_{model.__name__}_save')
+    post_delete.connect(refresh_all_students, sender=model, dispatch_uid=f'scores_{model.__name__}_delete')
+
+
+@receiver(post_save, sender=Student)
+def create_student_scores(sender, instance, created, **kwargs):
+    """Give new students their (empty) score rows."""
+    if created:
+        # No signoffs yet, so no part's max score can move
+        request_refresh([instance.id], [])
+
+
+# Student search index
+
+@receiver(post_migrate)
+def create_search_index(sender, using, **kwargs):
+    # Also restores the SQLite triggers after a migration rebuilt the table
+    if sender.label == 'labs':
+        ensure_search_index(using)
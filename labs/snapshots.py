@@ -0,0 +1,136 @@
+"""
+Columnar gradebook snapshots for analysis.
+
+``snapshot_frame`` turns a ``Gradebook`` into a long-format pandas DataFrame
+with one row per student x part x criterion (quality criteria, challenges and
+rubric criteria) and typed columns: numeric earned/max marks, status,
+timestamps and grader.  ``write_snapshot`` writes it to Parquet one chunk of
+students at a time, so
+
+    pandas.read_parquet('gradebook.parquet')
+
+gets the dtypes back without re-parsing "12/20" strings from the CSVs.
+
+``earned`` is what the score methods count: a signoff's missing quality
+scores count as the criterion's default and a missing evaluation sheet as the
+default rubric at 'MR'; ``scored`` is False for those rows.  Students with no
+signoff on a part get rows with a null ``earned``.
+
+Parquet support needs pyarrow, which is imported only when a snapshot is
+written.
+"""
+from decimal import Decimal
+
+import pandas as pd
+
+from .exports import active_students, student_chunks
+from .gradebook import Gradebook, criterion_earned_marks, default_quality_score
+
+COLUMNS = [
+    'student_pk', 'student_id', 'student_name', 'student_active',
+    'lab_id', 'lab', 'part_id', 'part', 'part_required',
+    'status', 'is_late', 'submitted_at', 'updated_at', 'due_date', 'graded_by',
+    'criterion_type', 'criterion_key', 'criterion', 'evaluation',
+    'earned', 'max', 'scored',
+]
+DTYPES = {
+    'student_pk': 'int64', 'student_id': 'string', 'student_name': 'string', 'student_active': 'bool',
+    'lab_id': 'int64', 'lab': 'string', 'part_id': 'int64', 'part': 'string', 'part_required': 'bool',
+    'status': 'string', 'is_late': 'boolean', 'graded_by': 'string',
+    'criterion_type': 'string', 'criterion_key': 'string', 'criterion': 'string', 'evaluation': 'string',
+    'earned': 'float64', 'max': 'float64', 'scored': 'boolean',
+}
+DATETIME_COLUMNS = ['submitted_at', 'updated_at', 'due_date']
+
+
+def _number(value):
+    return float(value) if isinstance(value, Decimal) else value
+
+
+def _criterion_rows(gradebook, part, signoff):
+    """(type, key, name, evaluation, earned, max, scored) for each criterion of a part."""
+    for criterion in gradebook.criteria(part):
+        if signoff is None:
+            yield 'quality', str(criterion.id), criterion.name, None, None, criterion.max_points, None
+            continue
+        score = gradebook.quality_score(signoff, criterion)
+        earned = score.score if score else default_quality_score(criterion)
+        yield 'quality', str(criterion.id), criterion.name, None, earned, criterion.max_points, score is not None
+
+    if part.has_challenges:
+        for challenge in gradebook.challenges(part):
+            if signoff is None:
+                yield 'challenge', str(challenge.id), challenge.name, None, None, challenge.max_points, None
+                continue
+            score = gradebook.challenge_score(signoff, challenge)
+            earned = score.score if score else 0
+            yield 'challenge', str(challenge.id), challenge.name, None, earned, challenge.max_points, score is not None
+
+    sheet = gradebook.evaluation_sheet(signoff) if signoff else None
+    if sheet is not None:
+        if not sheet.rubric:
+            return
+        criteria_data, evaluations, scored = sheet.rubric.criteria_data, sheet.evaluations, True
+    else:
+        criteria_data = gradebook.default_rubric.criteria_data
+        evaluations = {key: 'MR' for key in criteria_data}
+        scored = False if signoff else None
+    for key, criterion in criteria_data.items():
+        if signoff is None:
+            yield 'rubric', key, criterion['name'], None, None, criterion['max_marks'], None
+            continue
+        earned = criterion_earned_marks(criteria_data, evaluations, key)
+        yield 'rubric', key, criterion['name'], evaluations.get(key, 'ND'), earned, criterion['max_marks'], scored
+
+
+def snapshot_frame(gradebook):
+    """Long-format DataFrame of the gradebook's students."""
+    data = {column: [] for column in COLUMNS}
+    for student in gradebook.students:
+        for lab in gradebook.labs:
+            for part in gradebook.parts(lab):
+                signoff = gradebook.signoff(student, part)
+                signoff_values = (
+                    signoff.status if signoff else 'not_started',
+                    part.is_signoff_late(signoff) if signoff else None,
+                    signoff.date_submitted if signoff else None,
+                    signoff.date_updated if signoff else None,
+                    part.due_date,
+                    signoff.instructor.username if signoff else None,
+                )
+                for criterion_values in _criterion_rows(gradebook, part, signoff):
+                    row = (
+                        student.id, student.student_id, student.name, student.active,
+                        lab.id, lab.name, part.id, part.name, part.is_required,
+                    ) + signoff_values + criterion_values
+                    for column, value in zip(COLUMNS, row):
+                        data[column].append(_number(value))
+
+    frame = pd.DataFrame(data, columns=COLUMNS)
+    for column in DATETIME_COLUMNS:
+        frame[column] = pd.to_datetime(frame[column], utc=True)
+    return frame.astype(DTYPES)
+
+
+def write_snapshot(destination, students=None):
+    """
+    Write the snapshot of ``students`` (active students by default) to a
+    Parquet file path or binary file object.  Returns the number of rows.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    gradebook = Gradebook(students=[])
+    if students is None:
+        students = active_students()
+
+    # One row group per chunk of students; the schema comes from an empty
+    # frame so every chunk is written with the same types
+    schema = pa.Schema.from_pandas(snapshot_frame(gradebook), preserve_index=False)
+    row_count = 0
+    with pq.ParquetWriter(destination, schema, compression='snappy') as writer:
+        for chunk in student_chunks(gradebook, students):
+            frame = snapshot_frame(chunk)
+            writer.write_table(pa.Table.from_pandas(frame, schema=schema, preserve_index=False))
+            row_count += len(frame)
+    return row_count
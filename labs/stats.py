@@ -0,0 +1,184 @@
+"""
+The reports dashboard's quick stats.
+
+Building them means grading every active student, so they are kept in
+Django's cache together with the per-student figures they are summed from.
+For ``settings.QUICK_STATS_TTL`` seconds after a build the cached payload is
+served as is; after that only the students whose materialized scores
+(``labs.scores``) were refreshed since the last build, and those added,
+removed or (de)activated, are recomputed before summing again.  Every
+signoff, score and structure change refreshes the students it affects, so
+that covers all of them.  ``computed_at`` in the payload says how old the
+figures are.
+"""
+import datetime
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+from django.utils import timezone
+
+from .gradebook import Gradebook
+from .models import Challenge, ChallengeScore, EvaluationSheet, GradeScale, Lab, Signoff, Student, StudentCourseScore
+
+STATE_KEY = 'labs:quick_stats'
+STATE_TIMEOUT = 60 * 60 * 24
+# A transaction still open during a build commits scores with an earlier
+# updated_at, so each refresh looks back this far
+OVERLAP = datetime.timedelta(minutes=5)
+# Rebuild everything this often anyway
+FULL_BUILD_INTERVAL = datetime.timedelta(hours=1)
+
+GRADES = ['A+', 'A', 'A-', 'B+', 'B', 'B-', 'C+', 'C', 'C-', 'D+', 'D', 'D-', 'F']
+
+
+def _student_rows(roster, student_ids=None):
+    """Per-student figures of ``student_ids`` (every student when None)."""
+    students = Student.objects.all()
+    signoffs = Signoff.objects.filter(status='approved')
+    challenge_scores = ChallengeScore.objects.filter(score__gt=0)
+    sheets = EvaluationSheet.objects.all()
+    if student_ids is not None:
+        student_ids = list(student_ids)
+        students = students.filter(id__in=student_ids)
+        signoffs = signoffs.filter(student_id__in=student_ids)
+        challenge_scores = challenge_scores.filter(signoff__student_id__in=student_ids)
+        sheets = sheets.filter(signoff__student_id__in=student_ids)
+
+    approved = dict(signoffs.values_list('student_id').annotate(count=Count('id')).order_by())
+    challenges = dict(
+        challenge_scores.values_list('signoff__student_id').annotate(count=Count('challenge', distinct=True))
+        .order_by()
+    )
+    # Sheets with an 'ER' (Exceeds Requirements) anywhere
+    exceeds = Counter(
+        student_id for student_id, evaluations in sheets.values_list('signoff__student_id', 'evaluations')
+        if 'ER' in evaluations.values()
+    )
+
+    # Only active students are graded
+    gradebook = Gradebook(students=students.filter(active=True))
+    grades = {
+        student.id: (gradebook.completion_status(student), gradebook.overall_grade(student))
+        for student in gradebook.students
+    }
+
+    rows = {}
+    for student_id in (roster if student_ids is None else student_ids):
+        completion, overall_grade = grades.get(student_id, (None, None))
+        rows[student_id] = {
+            'active': roster[student_id],
+            'approved': approved.get(student_id, 0),
+            'challenges': challenges.get(student_id, 0),
+            'exceeds': exceeds.get(student_id, 0),
+            'completion': completion,
+            'overall_grade': overall_grade,
+        }
+    return rows
+
+
+def _payload(rows):
+    """Sum the per-student figures into the dashboard payload."""
+    active = [row for row in rows.values() if row['active']]
+    total_challenges = Challenge.objects.count()
+    completed_challenges = sum(row['challenges'] for row in rows.values())
+
+    if active:
+        avg_completion = round(sum(row['completion'] for row in active) / len(active), 1)
+    else:
+        avg_completion = 0
+    if active and total_challenges:
+        challenge_completion = round(completed_challenges / (len(active) * total_challenges) * 100, 1)
+    else:
+        challenge_completion = 0
+
+    # Graded with the first lab's scale, or the default
+    first_lab = Lab.objects.select_related('grade_scale').first()
+    grade_scale = first_lab.grade_scale if first_lab and first_lab.grade_scale else GradeScale.get_default_scale()
+    grade_distribution = dict.fromkeys(GRADES, 0)
+    for letter_grade in grade_scale.get_letter_grades([row['overall_grade'] for row in active]):
+        grade_distribution[letter_grade] = grade_distribution.get(letter_grade, 0) + 1
+
+    challenge_completion_by_student = dict.fromkeys(['not_attempted', 'low', 'medium', 'high', 'complete'], 0)
+    for row in active:
+        if not row['challenges'] or not total_challenges:
+            bucket = 'not_attempted'
+        else:
+            completion_pct = row['challenges'] / total_challenges * 100
+            if completion_pct >= 90:
+                bucket = 'complete'
+            elif completion_pct >= 75:
+                bucket = 'high'
+            elif completion_pct >= 50:
+                bucket = 'medium'
+            else:
+                bucket = 'low'
+        challenge_completion_by_student[bucket] += 1
+
+    return {
+        'total_signoffs': sum(row['approved'] for row in rows.values()),
+        'avg_completion': avg_completion,
+        'total_challenges': total_challenges,
+        'completed_challenges': completed_challenges,
+        'challenge_completion': challenge_completion,
+        'exceeds_requirements': sum(row['exceeds'] for row in rows.values()),
+        'grade_distribution': grade_distribution,
+        'challenge_completion_by_student': challenge_completion_by_student,
+    }
+
+
+def _build(state, now):
+    """A fresh state, recomputing only what changed since ``state`` where possible."""
+    roster = dict(Student.objects.values_list('id', 'active'))
+    changed = None
+    if state is not None and now - state['full_build_at'] <= FULL_BUILD_INTERVAL:
+        rows = state['rows']
+        changed = set(
+            StudentCourseScore.objects.filter(updated_at__gte=state['built_at'] - OVERLAP)
+            .values_list('student_id', flat=True)
+        )
+        changed.update(student_id for student_id, active in roster.items()
+                       if student_id not in rows or rows[student_id]['active'] != active)
+        changed &= roster.keys()
+
+    # After a course structure change nearly everyone has changed
+    if changed is None or len(changed) > len(roster) // 2:
+        rows = _student_rows(roster)
+        full_build_at = now
+    else:
+        for student_id in rows.keys() - roster.keys():
+            del rows[student_id]
+        if changed:
+            rows.update(_student_rows(roster, changed))
+        full_build_at = state['full_build_at']
+
+    return {
+        'rows': rows,
+        'payload': _payload(rows),
+        'built_at': now,
+        'full_build_at': full_build_at,
+    }
+
+
+def _current_state():
+    state = cache.get(STATE_KEY)
+    now = timezone.now()
+    if state is None or now - state['built_at'] > datetime.timedelta(seconds=settings.QUICK_STATS_TTL):
+        state = _build(state, now)
+        cache.set(STATE_KEY, state, STATE_TIMEOUT)
+    return state
+
+
+def get_quick_stats():
+    """The dashboard payload, at most ``QUICK_STATS_TTL`` seconds old."""
+    state = _current_state()
+    return {**state['payload'], 'computed_at': state['built_at'].isoformat()}
+
+
+def quick_stats_version():
+    """
+    Changes whenever what ``get_quick_stats`` returns does: on every build,
+    since ``computed_at`` moves even when the figures don't.
+    """
+    return _current_state()['built_at'].isoformat()
@@ -0,0 +1,202 @@
+"""
+Synthetic course data for benchmarks.
+
+``generate_synthetic_course`` fills the database with a course of any size:
+students, labs, parts, quality criteria, challenges, rubrics, TA users and
+signoffs with their quality scores, challenge scores and evaluation sheets.
+Rows are written with ``bulk_create``, so a 500-student, 40-part course takes
+seconds; the materialized scores are refreshed once at the end.
+
+Everything it creates is named with the ``SYN-`` / "Synthetic" prefixes so
+``clear_synthetic_course`` can remove it again.
+"""
+import datetime
+import random
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import invalidate_all_part_max
+from .models import (
+    UserRole, GradeScale, Lab, Part, QualityCriteria, Challenge, Student, Signoff,
+    QualityScore, ChallengeScore, EvaluationRubric, EvaluationSheet,
+)
+from .scores import deferred_refresh, request_refresh
+
+STUDENT_PREFIX = 'SYN-'
+TA_PREFIX = 'synthetic_ta_'
+LAB_PREFIX = 'Synthetic Lab'
+RUBRIC_PREFIX = 'Synthetic Rubric'
+SCALE_NAME = 'Synthetic Scale'
+
+STATUSES = ['approved', 'pending', 'rejected']
+STATUS_WEIGHTS = [0.7, 0.2, 0.1]
+EVALUATIONS = ['ER', 'MR', 'MM', 'IR', 'ND']
+
+RUBRIC_CRITERIA = {
+    'preparation': {'name': 'Preparation', 'max_marks': 10.0},
+    'hardware': {'name': 'Hardware', 'max_marks': 10.0},
+    'code': {'name': 'Code', 'max_marks': 15.0},
+    'schematic': {'name': 'Schematic', 'max_marks': 10.0},
+    'demo': {'name': 'Demo', 'max_marks': 5.0},
+}
+
+
+def clear_synthetic_course():
+    """Delete everything ``generate_synthetic_course`` created."""
+    with transaction.atomic(), deferred_refresh():
+        Student.objects.filter(student_id__startswith=STUDENT_PREFIX).delete()
+        Lab.objects.filter(name__startswith=LAB_PREFIX).delete()
+        User.objects.filter(username__startswith=TA_PREFIX).delete()
+        EvaluationRubric.objects.filter(name__startswith=RUBRIC_PREFIX).delete()
+        GradeScale.objects.filter(name=SCALE_NAME).delete()
+
+
+def generate_synthetic_course(students=500, labs=8, parts_per_lab=5, criteria_per_part=3,
+                              challenges_per_part=2, rubrics=2, tas=5, fill_ratio=0.7, seed=0,
+                              batch_size=1000):
+    """
+    Create a synthetic course and return the number of rows of each kind.
+
+    ``fill_ratio`` is the share of student x part pairs that get a signoff.
+    Every other part has challenges (when ``challenges_per_part`` > 0), and
+    each part's evaluation sheets use one of ``rubrics`` rubrics.
+    """
+    rnd = random.Random(seed)
+    now = timezone.now()
+
+    with transaction.atomic(), deferred_refresh():
+        scale = GradeScale.objects.create(name=SCALE_NAME, description='Generated for benchmarks')
+        # Rubrics alternate between all five criteria and the first four
+        rubric_rows = []
+        for i in range(max(rubrics, 1)):
+            keys = list(RUBRIC_CRITERIA)[:len(RUBRIC_CRITERIA) - i % 2]
+            rubric_rows.append(EvaluationRubric.objects.create(
+                name=f'{RUBRIC_PREFIX} {i + 1}',
+                description='Generated for benchmarks',
+                criteria_data={key: RUBRIC_CRITERIA[key] for key in keys}
+            ))
+
+        # TA users
+        ta_users = User.objects.bulk_create([
+            User(username=f'{TA_PREFIX}{i + 1:02d}', password='!')
+            for i in range(tas)
+        ])
+        UserRole.objects.bulk_create([UserRole(user=user, role='ta') for user in ta_users])
+
+        # Roster; about one student in twenty is inactive
+        student_rows = Student.objects.bulk_create([
+            Student(
+                student_id=f'{STUDENT_PREFIX}{i + 1:05d}',
+                name=f'Synthetic Student {i + 1:05d}',
+                email=f'synthetic{i + 1:05d}@example.com',
+                batch=datetime.date(2025, 1, 1),
+                active=rnd.random() >= 0.05
+            )
+            for i in range(students)
+        ], batch_size=batch_size)
+
+        # Course structure
+        lab_rows = Lab.objects.bulk_create([
+            Lab(
+                name=f'{LAB_PREFIX} {l + 1:02d}',
+                description='Generated for benchmarks',
+                due_date=now - datetime.timedelta(days=7 * (labs - l)),
+                total_points=100,
+                grade_scale=scale if l % 2 == 0 else None
+            )
+            for l in range(labs)
+        ])
+        part_rows = Part.objects.bulk_create([
+            Part(
+                lab=lab,
+                name=f'Part {p + 1}',
+                order=p,
+                is_required=p < parts_per_lab - 1 or parts_per_lab == 1,
+                has_challenges=challenges_per_part > 0 and p % 2 == 1,
+                due_date=lab.due_date - datetime.timedelta(days=parts_per_lab - p)
+            )
+            for lab in lab_rows
+            for p in range(parts_per_lab)
+        ], batch_size=batch_size)
+        criteria_rows = QualityCriteria.objects.bulk_create([
+            QualityCriteria(part=part, name=f'Criterion {c + 1}', max_points=rnd.choice([5, 10, 15]))
+            for part in part_rows
+            for c in range(criteria_per_part)
+        ], batch_size=batch_size)
+        challenge_rows = Challenge.objects.bulk_create([
+            Challenge(part=part, name=f'Challenge {c + 1}', max_points=rnd.choice([5, 10]), order=c)
+            for part in part_rows if part.has_challenges
+            for c in range(challenges_per_part)
+        ], batch_size=batch_size)
+
+        criteria_by_part = {}
+        for criterion in criteria_rows:
+            criteria_by_part.setdefault(criterion.part_id, []).append(criterion)
+        challenges_by_part = {}
+        for challenge in challenge_rows:
+            challenges_by_part.setdefault(challenge.part_id, []).append(challenge)
+        rubric_by_part = {part.id: rnd.choice(rubric_rows) for part in part_rows}
+
+        # Signoffs for a fill_ratio share of student x part pairs
+        signoffs = []
+        for student in student_rows:
+            for part in part_rows:
+                if rnd.random() < fill_ratio:
+                    signoffs.append(Signoff(
+                        student=student,
+                        part=part,
+                        instructor=rnd.choice(ta_users),
+                        status=rnd.choices(STATUSES, STATUS_WEIGHTS)[0]
+                    ))
+        signoffs = Signoff.objects.bulk_create(signoffs, batch_size=batch_size)
+
+        # bulk_create stamps every signoff with now; spread them around the due dates
+        for signoff in signoffs:
+            signoff.date_submitted = signoff.part.due_date + datetime.timedelta(hours=rnd.uniform(-96, 48))
+            signoff.date_updated = signoff.date_submitted + datetime.timedelta(hours=rnd.uniform(0, 24))
+        Signoff.objects.bulk_update(signoffs, ['date_submitted', 'date_updated'], batch_size=batch_size)
+
+        quality_scores = []
+        challenge_scores = []
+        sheets = []
+        for signoff in signoffs:
+            for criterion in criteria_by_part.get(signoff.part_id, []):
+                quality_scores.append(QualityScore(
+                    signoff=signoff, criteria=criterion, score=rnd.randint(0, criterion.max_points)
+                ))
+            for challenge in challenges_by_part.get(signoff.part_id, []):
+                challenge_scores.append(ChallengeScore(
+                    signoff=signoff, challenge=challenge, score=rnd.randint(0, challenge.max_points)
+                ))
+            rubric = rubric_by_part[signoff.part_id]
+            sheet = EvaluationSheet(
+                signoff=signoff,
+                rubric=rubric,
+                evaluations={key: rnd.choice(EVALUATIONS) for key in rubric.criteria_data}
+            )
+            # bulk_create skips save(), which fills the stored marks
+            sheet.update_marks()
+            sheets.append(sheet)
+        QualityScore.objects.bulk_create(quality_scores, batch_size=batch_size)
+        ChallengeScore.objects.bulk_create(challenge_scores, batch_size=batch_size)
+        EvaluationSheet.objects.bulk_create(sheets, batch_size=batch_size)
+
+        # bulk_create skips the signals: drop cached max scores and refresh
+        # every student once when the block exits
+        invalidate_all_part_max()
+        request_refresh()
+
+    return {
+        'students': len(student_rows),
+        'labs': len(lab_rows),
+        'parts': len(part_rows),
+        'quality_criteria': len(criteria_rows),
+        'challenges': len(challenge_rows),
+        'rubrics': len(rubric_rows),
+        'signoffs': len(signoffs),
+        'quality_scores': len(quality_scores),
+        'challenge_scores': len(challenge_scores),
+        'evaluation_sheets': len(sheets),
+    }
@@ -1,5 +1,7 @@
 from django import template
 
+from labs.roles import user_role
+
 register = template.Library()
 
 @register.filter
@@ -15,11 +17,8 @@ def has_role(user, role_name):
     if user.is_staff:
         return True
     
-    # Check if user has the role object
-    try:
-        return hasattr(user, 'role') and user.role.role == role_name
-    except:
-        return False
+    # The role RoleMiddleware resolved for this request
+    return user_role(user) == role_name
         
 @register.filter(name='get_lab_completion')
 def get_lab_completion(lab, student):
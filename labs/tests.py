@@ -1,3 +1,424 @@
+import json
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import F
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import defaults
+from .gradebook import Gradebook
+from .models import (
+    UserRole, CacheVersion, GradeScale, Lab, Part, QualityCriteria, Student, Signoff, QualityScore,
+    EvaluationRubric, EvaluationSheet, StudentPartScore, StudentLabScore, StudentCourseScore,
+)
+from .scores import _quantize, rebuild_scores
+from .synthetic import generate_synthetic_course
+
+
+class SyntheticCourseTestCase(TestCase):
+    """A small synthetic course plus an instructor and a TA to log in as."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cache.clear()
+        generate_synthetic_course(students=8, labs=2, parts_per_lab=3, criteria_per_part=2,
+                                  challenges_per_part=2, rubrics=2, tas=1, fill_ratio=0.7, seed=1)
+        cls.instructor = User.objects.create_user('instructor', password='pw')
+        UserRole.objects.create(user=cls.instructor, role='instructor')
+        cls.ta = User.objects.create_user('ta', password='pw')
+        UserRole.objects.create(user=cls.ta, role='ta')
+
+    def setUp(self):
+        # Ids are reused between tests, cached max scores must not be
+        cache.clear()
+        self.client.force_login(self.ta)
+
+    def assertScoresMatchModels(self):
+        """The materialized tables hold what the model methods compute."""
+        for row in StudentPartScore.objects.select_related('student', 'part'):
+            self.assertEqual(row.earned_score, _quantize(row.part.get_student_score(row.student)), row)
+            self.assertEqual(row.max_score, _quantize(row.part.get_max_score()), row)
+            self.assertEqual(row.status, row.part.get_part_status(row.student), row)
+        for row in StudentLabScore.objects.select_related('student', 'lab'):
+            self.assertEqual(row.earned_score, _quantize(row.lab.get_student_score(row.student)), row)
+            self.assertEqual(row.max_score, _quantize(row.lab.get_max_score()), row)
+            self.assertEqual(row.percentage, _quantize(row.lab.get_student_percentage(row.student)), row)
+            self.assertEqual(row.letter_grade, row.lab.get_grade_letter(row.student), row)
+        for row in StudentCourseScore.objects.select_related('student'):
+            self.assertEqual(row.overall_grade, _quantize(row.student.get_overall_grade()), row)
+            self.assertEqual(row.letter_grade, row.student.get_course_letter_grade(), row)
+            self.assertEqual(row.completion, _quantize(row.student.get_completion_status), row)
+
+    def add_lab(self, parts=5):
+        """Grow the course by a lab with ``parts`` parts."""
+        lab = Lab.objects.create(name='Extra lab', due_date=timezone.now(), total_points=100)
+        for order in range(parts):
+            Part.objects.create(lab=lab, name=f'Extra part {order}', order=order)
+
+    def post_json(self, name, data):
+        return self.client.post(reverse(f'labs:{name}'), json.dumps(data), content_type='application/json')
+
+
+class MaterializedScoresTests(SyntheticCourseTestCase):
+
+    def test_tables_cover_every_student(self):
+        students, labs, parts = Student.objects.count(), Lab.objects.count(), Part.objects.count()
+        self.assertEqual(StudentPartScore.objects.count(), students * parts)
+        self.assertEqual(StudentLabScore.objects.count(), students * labs)
+        self.assertEqual(StudentCourseScore.objects.count(), students)
+
+    def test_tables_match_model_methods(self):
+        self.assertScoresMatchModels()
+
+    def test_gradebook_matches_model_methods(self):
+        gradebook = Gradebook()
+        for student in gradebook.students:
+            for lab in gradebook.labs:
+                self.assertEqual(gradebook.lab_max_score(lab), lab.get_max_score())
+                self.assertEqual(gradebook.lab_student_score(lab, student), lab.get_student_score(student))
+                self.assertEqual(gradebook.lab_grade_letter(lab, student), lab.get_grade_letter(student))
+                for part in gradebook.parts(lab):
+                    self.assertEqual(gradebook.part_max_score(part), part.get_max_score())
+                    self.assertEqual(gradebook.part_student_score(part, student), part.get_student_score(student))
+            self.assertEqual(_quantize(gradebook.overall_grade(student)), _quantize(student.get_overall_grade()))
+            self.assertEqual(gradebook.course_letter_grade(student), student.get_course_letter_grade())
+
+    def test_gradebook_queries_do_not_grow_with_the_course(self):
+        Gradebook()
+        defaults.check_on_next_use()
+        with CaptureQueriesContext(connection) as queries:
+            Gradebook()
+
+        self.add_lab()
+        Gradebook()
+        defaults.check_on_next_use()
+        with self.assertNumQueries(len(queries)):
+            gradebook = Gradebook()
+            for part in gradebook.part_by_id.values():
+                part.lab.name
+
+    def test_rebuild_changes_nothing(self):
+        def snapshot():
+            return sorted(StudentPartScore.objects.values_list('student_id', 'part_id', 'earned_score', 'max_score', 'status'))
+
+        before = snapshot()
+        rebuild_scores()
+        self.assertEqual(snapshot(), before)
+
+
+class ScoreRefreshTests(SyntheticCourseTestCase):
+
+    def test_score_edit_refreshes_student(self):
+        score = QualityScore.objects.filter(signoff__status='approved', score__gt=0).select_related('signoff').first()
+        row = StudentPartScore.objects.get(student=score.signoff.student_id, part=score.signoff.part_id)
+        score.score = 0
+        score.save()
+        row.refresh_from_db()
+        self.assertEqual(row.earned_score, _quantize(score.signoff.part.get_student_score(score.signoff.student)))
+        self.assertScoresMatchModels()
+
+    def test_signoff_delete_refreshes_student(self):
+        signoff = Signoff.objects.filter(status='approved').first()
+        signoff.delete()
+        row = StudentPartScore.objects.get(student=signoff.student_id, part=signoff.part_id)
+        self.assertEqual(row.status, 'not_started')
+        self.assertEqual(row.earned_score, 0)
+        self.assertScoresMatchModels()
+
+    def test_criteria_max_change_moves_every_max_score(self):
+        criterion = QualityCriteria.objects.first()
+        before = criterion.part.get_max_score()
+        criterion.max_points += 5
+        criterion.save()
+        part = Part.objects.get(pk=criterion.part_id)
+        self.assertEqual(part.get_max_score(), before + 5)
+        self.assertEqual(part.get_max_score(), part._compute_max_score())
+        self.assertEqual(set(part.student_scores.values_list('max_score', flat=True)), {_quantize(before + 5)})
+        self.assertScoresMatchModels()
+
+    def test_max_score_bumps_reach_other_workers(self):
+        criterion = QualityCriteria.objects.first()
+        part = Part.objects.get(pk=criterion.part_id)
+        before = part.get_max_score()
+        # As written by another process: its bump is only visible in the database
+        QualityCriteria.objects.filter(pk=criterion.pk).update(max_points=F('max_points') + 5)
+        CacheVersion.objects.filter(key=f'labs:part_max:version:{part.id}').update(value=F('value') + 1)
+        self.assertEqual(part.get_max_score(), before + 5)
+        self.assertEqual(Gradebook().part_max_score(part), before + 5)
+
+    def test_rubric_edit_moves_max_scores(self):
+        sheet = EvaluationSheet.objects.select_related('rubric').first()
+        rubric = sheet.rubric
+        rubric.criteria_data = dict(rubric.criteria_data, extra={'name': 'Extra', 'max_marks': 7.0})
+        rubric.save()
+        part = Part.objects.get(pk=sheet.signoff.part_id)
+        self.assertEqual(part.get_max_score(), part._compute_max_score())
+        self.assertScoresMatchModels()
+
+    def test_cosmetic_edit_skips_refresh(self):
+        stamps = dict(StudentCourseScore.objects.values_list('student_id', 'updated_at'))
+        lab = Lab.objects.first()
+        lab.name = 'Renamed lab'
+        lab.save()
+        part = lab.parts.first()
+        part.description = 'New description'
+        part.save()
+        self.assertEqual(dict(StudentCourseScore.objects.values_list('student_id', 'updated_at')), stamps)
+
+    def test_scoring_edit_refreshes_everyone(self):
+        stamps = dict(StudentCourseScore.objects.values_list('student_id', 'updated_at'))
+        part = Part.objects.filter(is_required=True).first()
+        part.is_required = False
+        part.save()
+        refreshed = dict(StudentCourseScore.objects.values_list('student_id', 'updated_at'))
+        self.assertTrue(all(refreshed[student_id] != stamp for student_id, stamp in stamps.items()))
+        self.assertScoresMatchModels()
+
+    def test_new_student_gets_rows(self):
+        student = Student.objects.create(student_id='NEW-1', name='New Student', email='new@example.com',
+                                         batch='2025-01-01')
+        self.assertEqual(student.part_scores.count(), Part.objects.count())
+        self.assertEqual(student.course_score.earned_score, 0)
+
+    def test_default_changes_reach_other_workers(self):
+        rubric = EvaluationRubric.get_default_rubric()
+        before = defaults.get_default_rubric_max_marks()
+        # As written by another process: no signals reach this one
+        criteria = dict(rubric.criteria_data, extra={'name': 'Extra', 'max_marks': 7.0})
+        EvaluationRubric.objects.filter(pk=rubric.pk).update(criteria_data=criteria, updated_at=timezone.now())
+        GradeScale.objects.filter(is_default=True).update(a_plus_threshold=50, updated_at=timezone.now())
+
+        self.client.get(reverse('labs:get_parts'))
+        self.assertEqual(defaults.get_default_rubric_max_marks(), before + Decimal('7'))
+        self.assertIn('extra', defaults.get_default_evaluations())
+        self.assertEqual(GradeScale.get_default_scale().a_plus_threshold, 50)
+
+    def test_backfill_drops_cached_max_scores(self):
+        part = Part.objects.filter(signoffs__isnull=False).first()
+        EvaluationSheet.objects.filter(signoff__part=part).delete()
+        rebuild_scores()
+        self.assertEqual(part.get_max_score(), part._compute_max_score())
+        call_command('backfill_signoff_defaults', stdout=StringIO())
+        self.assertEqual(Part.objects.get(pk=part.pk).get_max_score(), part._compute_max_score())
+        self.assertScoresMatchModels()
+
+    def test_role_change_applies_on_next_request(self):
+        url = reverse('labs:get_parts') + f'?lab_id={Lab.objects.first().id}'
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+        self.ta.role.delete()
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        # Changes that skip the signals are seen too, by every worker
+        self.client.force_login(self.instructor)
+        metrics = reverse('labs:request_metrics')
+        self.assertEqual(self.client.get(metrics).status_code, 200)
+        UserRole.objects.filter(user=self.instructor).update(role='ta')
+        cache.clear()
+        self.assertEqual(self.client.get(metrics).status_code, 403)
+
+
+class SignoffSubmitTests(SyntheticCourseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.part = Part.objects.filter(has_challenges=True).first()
+        self.criteria = list(self.part.quality_criteria.all())
+        self.challenges = list(self.part.challenges.all())
+
+    def test_quick_signoff(self):
+        student = Student.objects.exclude(signoffs__part=self.part).first()
+        response = self.post_json('quick_signoff_submit', {
+            'student_id': student.id,
+            'part_id': self.part.id,
+            'criteria_scores': {str(criterion.id): 1 for criterion in self.criteria},
+            'challenge_scores': {str(self.challenges[0].id): 3},
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['success'])
+
+        signoff = Signoff.objects.get(student=student, part=self.part)
+        self.assertEqual(signoff.status, 'approved')
+        self.assertEqual(signoff.instructor, self.ta)
+        self.assertEqual(signoff.evaluation_sheet.count(), 1)
+        row = StudentPartScore.objects.get(student=student, part=self.part)
+        self.assertEqual(row.status, 'approved')
+        self.assertEqual(row.earned_score, _quantize(self.part.get_student_score(student)))
+        self.assertScoresMatchModels()
+
+    def test_quick_signoff_queries_do_not_grow_with_the_course(self):
+        warm_up, first, second = Student.objects.exclude(signoffs__part=self.part)[:3]
+        payload = {'part_id': self.part.id, 'criteria_scores': {str(criterion.id): 1 for criterion in self.criteria}}
+        self.post_json('quick_signoff_submit', {'student_id': warm_up.id, **payload})
+        with CaptureQueriesContext(connection) as queries:
+            self.post_json('quick_signoff_submit', {'student_id': first.id, **payload})
+
+        self.add_lab()
+        with self.assertNumQueries(len(queries)):
+            response = self.post_json('quick_signoff_submit', {'student_id': second.id, **payload})
+        self.assertTrue(response.json()['success'])
+
+    def test_quick_signoff_unknown_student(self):
+        response = self.post_json('quick_signoff_submit', {'student_id': 999999, 'part_id': self.part.id})
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.json()['success'])
+
+    def test_bulk_signoff_results(self):
+        new = Student.objects.exclude(signoffs__part=self.part).first()
+        existing = Student.objects.filter(signoffs__part=self.part).first()
+        response = self.post_json('bulk_signoff_submit', {
+            'part_id': self.part.id,
+            'student_ids': [new.id, existing.id, 999999],
+            'shared': {'comments': 'bulk', 'criteria_scores': {str(self.criteria[0].id): 2, 'nope': 1}},
+            'students': {str(existing.id): {'comments': 'own'}},
+        })
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertTrue(data['success'])
+        self.assertEqual(data['signed_off'], 2)
+        results = {result['student_id']: result for result in data['results']}
+        self.assertTrue(results[new.id]['created'])
+        self.assertFalse(results[existing.id]['created'])
+        self.assertEqual(results[new.id]['errors'], ['Quality criteria with ID nope not found for this part'])
+        self.assertFalse(results[999999]['success'])
+        self.assertEqual(results[999999]['errors'], ['Student with ID 999999 not found'])
+
+        # Late signoffs get a note appended to their comments
+        self.assertTrue(Signoff.objects.get(student=new, part=self.part).comments.startswith('bulk'))
+        self.assertTrue(Signoff.objects.get(student=existing, part=self.part).comments.startswith('own'))
+        self.assertEqual(QualityScore.objects.get(signoff__student=new, criteria=self.criteria[0]).score, 2)
+        self.assertScoresMatchModels()
+
+    def test_bulk_signoff_queries_do_not_grow_with_the_course(self):
+        warm_up, first, second = [[student.id] for student in Student.objects.exclude(signoffs__part=self.part)[:3]]
+        payload = {'part_id': self.part.id, 'shared': {'criteria_scores': {str(self.criteria[0].id): 1}}}
+        self.post_json('bulk_signoff_submit', {'student_ids': warm_up, **payload})
+        with CaptureQueriesContext(connection) as queries:
+            self.post_json('bulk_signoff_submit', {'student_ids': first, **payload})
+
+        self.add_lab()
+        with self.assertNumQueries(len(queries)):
+            response = self.post_json('bulk_signoff_submit', {'student_ids': second, **payload})
+        self.assertEqual(response.json()['signed_off'], 1)
+
+    def test_bulk_signoff_matches_quick_signoff(self):
+        first, second = Student.objects.exclude(signoffs__part=self.part)[:2]
+        shared = {
+            'criteria_scores': {str(criterion.id): 1 for criterion in self.criteria},
+            'rubric_evaluations': {'preparation': 'ER'},
+            'challenge_scores': {str(self.challenges[0].id): 2},
+        }
+        self.post_json('quick_signoff_submit', {'student_id': first.id, 'part_id': self.part.id, **shared})
+        self.post_json('bulk_signoff_submit', {'part_id': self.part.id, 'student_ids': [second.id], 'shared': shared})
+        self.assertEqual(StudentPartScore.objects.get(student=first, part=self.part).earned_score,
+                         StudentPartScore.objects.get(student=second, part=self.part).earned_score)
+
+    def test_bulk_signoff_malformed_shared_payload(self):
+        student = Student.objects.first()
+        for shared, error in [('nope', 'Payload must be an object'),
+                              ({'criteria_scores': [1, 2]}, 'criteria_scores must be an object'),
+                              ({'comments': 5}, 'comments must be a string')]:
+            response = self.post_json('bulk_signoff_submit', {
+                'part_id': self.part.id, 'student_ids': [student.id], 'shared': shared,
+            })
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json()['errors'], [error])
+
+    def test_bulk_signoff_malformed_student_payload(self):
+        first, second = Student.objects.exclude(signoffs__part=self.part)[:2]
+        response = self.post_json('bulk_signoff_submit', {
+            'part_id': self.part.id,
+            'student_ids': [first.id, second.id],
+            'students': {str(first.id): {'challenge_scores': 'abc'}},
+        })
+        self.assertEqual(response.status_code, 200)
+        results = {result['student_id']: result for result in response.json()['results']}
+        self.assertFalse(results[first.id]['success'])
+        self.assertEqual(results[first.id]['errors'], ['challenge_scores must be an object'])
+        self.assertTrue(results[second.id]['success'])
+        self.assertFalse(Signoff.objects.filter(student=first, part=self.part).exists())
+
+        response = self.post_json('bulk_signoff_submit', {
+            'part_id': self.part.id, 'student_ids': [first.id], 'students': {str(first.id): 3},
+        })
+        self.assertEqual(response.status_code, 400)
+
+    def test_bulk_signoff_unknown_students(self):
+        response = self.post_json('bulk_signoff_submit', {'part_id': self.part.id, 'student_ids': [999999]})
+        self.assertEqual(response.status_code, 404)
+
+
+class ConditionalGetTests(SyntheticCourseTestCase):
+
+    def get(self, url, etag=None):
+        if etag:
+            return self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        return self.client.get(url)
+
+    def test_lab_bundle_revalidates(self):
+        lab = Lab.objects.first()
+        url = reverse('labs:lab_bundle', args=[lab.id])
+        response = self.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        self.assertEqual(self.get(url, etag).status_code, 304)
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304)
+
+        # Another lab's edit leaves this bundle alone
+        other = Lab.objects.exclude(pk=lab.pk).first()
+        other.name = 'Renamed lab'
+        other.save()
+        self.assertEqual(self.get(url, etag).status_code, 304)
+
+        # Edits are seen without the cache, as on another worker
+        criterion = QualityCriteria.objects.filter(part__lab=lab).first()
+        criterion.name = 'Renamed criterion'
+        criterion.save()
+        cache.clear()
+        response = self.get(url, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+        etag = response['ETag']
+        criterion.delete()
+        self.assertEqual(self.get(url, etag).status_code, 200)
+
+    def test_existing_signoff_revalidates(self):
+        signoff = Signoff.objects.select_related('part').first()
+        url = reverse('labs:get_existing_signoff') + f'?student_id={signoff.student_id}&lab_id={signoff.part.lab_id}'
+        etag = self.get(url)['ETag']
+        self.assertEqual(self.get(url, etag).status_code, 304)
+
+        signoff.status = 'rejected' if signoff.status == 'approved' else 'approved'
+        signoff.save()
+        response = self.get(url, etag)
+        self.assertEqual(response.status_code, 200)
+        statuses = {row['id']: row['status'] for row in response.json()}
+        self.assertEqual(statuses[signoff.id], signoff.status)
+
+    def test_quick_stats_revalidates(self):
+        self.client.force_login(self.instructor)
+        url = reverse('labs:quick_stats')
+        response = self.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.get(url, response['ETag']).status_code, 304)
+
+    def test_roster_revalidates(self):
+        url = reverse('labs:student_roster')
+        etag = self.get(url)['ETag']
+        self.assertEqual(self.get(url, etag).status_code, 304)
 
-# Create your tests here.
+        student = Student.objects.first()
+        student.name = 'Renamed Student'
+        student.save()
+        cache.clear()
+        response = self.get(url, etag)
+        self.assertEqual(response.status_code, 200)
@@ -60,10 +60,13 @@ urlpatterns = [
     
     # AJAX endpoints
     path('api/student-name-search/', views.student_name_search, name='student_name_search'),
+    path('api/students/roster/', views.student_roster, name='student_roster'),
     path('api/get-signoffs/', views.get_existing_signoff, name='get_existing_signoff'),
     path('api/get-parts/', views.get_parts, name='get_parts'),
     path('api/get-criteria/', views.get_criteria, name='get_criteria'),
+    path('api/labs/<int:lab_id>/bundle/', views.lab_bundle, name='lab_bundle'),
     path('api/quick-signoff/', views.quick_signoff_submit, name='quick_signoff_submit'),
+    path('api/bulk-signoff/', views.bulk_signoff_submit, name='bulk_signoff_submit'),
     path('api/get-signoff-details/', views.get_signoff_details, name='get_signoff_details'),
     
     # Reports
@@ -80,4 +83,15 @@ urlpatterns = [
     path('export/lab/<int:lab_id>/csv/', views.export_lab_csv, name='export_lab_csv'),
     path('export/part/<int:part_id>/csv/', views.export_part_csv, name='export_part_csv'),
     path('export/all/csv/', views.export_all_data_csv, name='export_all_data'),
+    path('export/all/parquet/', views.export_gradebook_parquet, name='export_gradebook_parquet'),
+    path('export/grades/csv/', views.export_student_grade_csv, name='export_student_grades'),
+    path('export/grades/<int:student_id>/csv/', views.export_student_grade_csv, name='export_student_grades'),
+    
+    # Background export jobs
+    path('api/exports/', views.export_job_create, name='export_job_create'),
+    path('api/exports/<int:job_id>/', views.export_job_status, name='export_job_status'),
+    path('api/exports/<int:job_id>/download/', views.export_job_download, name='export_job_download'),
+    
+    # Request metrics (labs.middleware.RequestMetricsMiddleware)
+    path('api/metrics/', views.request_metrics, name='request_metrics'),
 ]
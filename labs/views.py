@@ -1,5 +1,5 @@
 from django.shortcuts import render, get_object_or_404
-from django.http import JsonResponse, HttpResponseForbidden, HttpResponseRedirect, HttpResponse
+from django.http import JsonResponse, HttpResponseForbidden, HttpResponseRedirect, HttpResponse, FileResponse
 from .models import *
 from .forms import (
     StudentUploadForm, UserRoleForm, LabForm, PartForm, 
@@ -8,30 +8,45 @@ from .forms import (
 from django.shortcuts import render, redirect, reverse
 from django.contrib import messages
 from django.contrib.auth.decorators import user_passes_test, login_required
-from django.db.models import Count, Avg, Sum, F, Q, Case, When, Value, IntegerField
+from django.db.models import Count, Avg, Sum, Max, F, Q, Case, When, Value, IntegerField, Prefetch
+from collections import defaultdict
 import datetime
+import os
+import tempfile
 from django.utils import timezone
 from decimal import Decimal
 import pandas as pd
 import csv
 import json
+import logging
 from io import BytesIO, StringIO
 from django.contrib.auth.models import User
 from django.core.exceptions import PermissionDenied
 from django.urls import reverse
+from django.db import transaction
+from django.conf import settings
 from django.db.models.functions import Coalesce
+from django.utils.cache import quote_etag
+from django.utils.http import http_date
+from django.views.decorators.cache import cache_control
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import condition
+from . import exports, jobs, logcontext, metrics, roles, search, snapshots, stats, xlsx_exports
+from .cache import invalidate_part_max
+from .conditional import etag_for, versioned
+from .defaults import get_default_evaluations
+from .gradebook import Gradebook, earned_marks, rubric_max_marks
+from .scores import deferred_refresh, request_refresh
+
+logger = logging.getLogger(__name__)
 
 # Define role check decorators
 def instructor_required(function):
     """Decorator to check if user is an instructor."""
     def wrap(request, *args, **kwargs):
-        try:
-            if hasattr(request.user, 'role') and request.user.role.role in ['instructor']:
-                return function(request, *args, **kwargs)
-            else:
-                raise PermissionDenied("You must be an instructor to access this page.")
-        except (AttributeError, UserRole.DoesNotExist):
-            raise PermissionDenied("You must be an instructor to access this page.")
+        if roles.request_role(request) in ['instructor']:
+            return function(request, *args, **kwargs)
+        raise PermissionDenied("You must be an instructor to access this page.")
     wrap.__doc__ = function.__doc__
     wrap.__name__ = function.__name__
     return wrap
@@ -39,13 +54,9 @@ def instructor_required(function):
 def ta_required(function):
     """Decorator to check if user is a teaching assistant or instructor."""
     def wrap(request, *args, **kwargs):
-        try:
-            if hasattr(request.user, 'role') and request.user.role.role in ['ta', 'instructor']:
-                return function(request, *args, **kwargs)
-            else:
-                raise PermissionDenied("You must be a teaching assistant or instructor to access this page.")
-        except (AttributeError, UserRole.DoesNotExist):
-            raise PermissionDenied("You must be a teaching assistant or instructor to access this page.")
+        if roles.request_role(request) in ['ta', 'instructor']:
+            return function(request, *args, **kwargs)
+        raise PermissionDenied("You must be a teaching assistant or instructor to access this page.")
     wrap.__doc__ = function.__doc__
     wrap.__name__ = function.__name__
     return wrap
@@ -58,16 +69,6 @@ def home_view(request):
     # Get all labs
     labs = Lab.objects.all().order_by('name')
     
-    # Log the found labs for debugging
-    print(f"Found {labs.count()} labs in home_view")
-    for lab in labs:
-        print(f"Lab: {lab.id} - {lab.name}")
-        parts_count = lab.parts.count()
-        print(f"  - Parts count: {parts_count}")
-        if parts_count > 0:
-            for part in lab.parts.all():
-                print(f"    - Part: {part.id} - {part.name}")
-    
     # Get pre-selected lab and part from query parameters (if any)
     selected_lab_id = request.GET.get('lab_id')
     selected_part_id = request.GET.get('part_id')
@@ -488,50 +489,52 @@ def student_upload(request):
                 updated_count = 0
                 error_count = 0
                 
-                for _, row in df.iterrows():
-                    try:
-                        # Clean the data
-                        student_id = str(row['student_id']).strip()
-                        name = str(row['name']).strip()
-                        email = str(row['email']).strip()
-                        
-                        # Handle batch date - could be string, datetime, or NaT
-                        if pd.isna(row['batch']):
-                            batch = datetime.date.today()
-                        elif isinstance(row['batch'], str):
-                            try:
-                                batch = datetime.datetime.strptime(row['batch'], '%Y-%m-%d').date()
-                            except ValueError:
+                # One transaction; new students' score rows are written once at the end
+                with transaction.atomic(), deferred_refresh():
+                    for _, row in df.iterrows():
+                        try:
+                            # Clean the data
+                            student_id = str(row['student_id']).strip()
+                            name = str(row['name']).strip()
+                            email = str(row['email']).strip()
+                            
+                            # Handle batch date - could be string, datetime, or NaT
+                            if pd.isna(row['batch']):
                                 batch = datetime.date.today()
-                        elif isinstance(row['batch'], datetime.datetime):
-                            batch = row['batch'].date()
-                        else:
-                            batch = datetime.date.today()
-                        
-                        # Skip empty rows
-                        if not student_id or not name:
-                            continue
-                        
-                        # Create or update student
-                        student, created = Student.objects.update_or_create(
-                            student_id=student_id,
-                            defaults={
-                                'name': name,
-                                'email': email,
-                                'batch': batch,
-                                'active': True
-                            }
-                        )
-                        
-                        if created:
-                            created_count += 1
-                        else:
-                            updated_count += 1
+                            elif isinstance(row['batch'], str):
+                                try:
+                                    batch = datetime.datetime.strptime(row['batch'], '%Y-%m-%d').date()
+                                except ValueError:
+                                    batch = datetime.date.today()
+                            elif isinstance(row['batch'], datetime.datetime):
+                                batch = row['batch'].date()
+                            else:
+                                batch = datetime.date.today()
+                            
+                            # Skip empty rows
+                            if not student_id or not name:
+                                continue
+                            
+                            # Create or update student
+                            student, created = Student.objects.update_or_create(
+                                student_id=student_id,
+                                defaults={
+                                    'name': name,
+                                    'email': email,
+                                    'batch': batch,
+                                    'active': True
+                                }
+                            )
                             
-                    except Exception as e:
-                        error_count += 1
-                        print(f"Error processing row: {e}")
-                        continue
+                            if created:
+                                created_count += 1
+                            else:
+                                updated_count += 1
+                                
+                        except Exception as e:
+                            error_count += 1
+                            logger.warning("Error processing student upload row: %s", e)
+                            continue
                 
                 # Show success message
                 message = f"Successfully processed {created_count + updated_count} students "
@@ -632,31 +635,22 @@ def student_detail(request, student_id):
     """View details for a student."""
     student = get_object_or_404(Student, pk=student_id)
     
+    # Load all of this student's scores in one pass
+    gradebook = Gradebook(students=[student])
+    
     # Get all labs
-    labs = Lab.objects.all().order_by('name')
+    labs = gradebook.labs
     
     # Calculate completion statistics
-    total_parts = Part.objects.filter(is_required=True).count()
-    completed_parts = Signoff.objects.filter(
-        student=student, 
-        status='approved',
-        part__is_required=True
-    ).values('part').distinct().count()
+    completed_parts, total_parts = gradebook.required_part_counts(student)
     
     # Calculate points
-    earned_points = Decimal('0')
-    total_points = Decimal('0')
-    
-    for lab in labs:
-        lab_max = lab.get_max_score()
-        lab_earned = lab.get_student_score(student)
-        earned_points += lab_earned
-        total_points += lab_max
+    earned_points, total_points = gradebook.student_points(student)
     
     # Get recent signoffs
     recent_signoffs = Signoff.objects.filter(
         student=student
-    ).order_by('-date_updated')[:5]
+    ).select_related('part__lab').order_by('-date_updated')[:5]
     
     # Categorize labs by completion status
     completed_labs = []
@@ -664,13 +658,13 @@ def student_detail(request, student_id):
     not_started_labs = []
     
     for lab in labs:
-        parts = lab.parts.all()
-        total_parts_count = parts.count()
+        parts = gradebook.parts(lab)
+        total_parts_count = len(parts)
         completed_parts_count = 0
         has_any_started = False
         
         for part in parts:
-            status = part.get_part_status(student)
+            status = gradebook.part_status(student, part)
             if status == 'approved':
                 completed_parts_count += 1
             elif status in ['pending', 'rejected']:
@@ -694,7 +688,10 @@ def student_detail(request, student_id):
         'labs': labs,
         'completed_labs': completed_labs,
         'in_progress_labs': in_progress_labs,
-        'not_started_labs': not_started_labs
+        'not_started_labs': not_started_labs,
+        'completion_status': gradebook.completion_status(student),
+        'overall_grade': gradebook.overall_grade(student),
+        'letter_grade': gradebook.course_letter_grade(student)
     }
     
     return render(request, 'labs/student_detail.html', context)
@@ -866,16 +863,15 @@ def signoff_edit(request, signoff_id):
 @login_required
 @ta_required
 def student_name_search(request):
-    """Search for students by name or ID."""
+    """Search for students by name or ID (active ones unless include_inactive is set)."""
     query = request.GET.get('query', '').strip()
+    include_inactive = request.GET.get('include_inactive') == '1'
     results = []
     
     if query:
-        # Search for students whose name or ID contains the query
-        students = Student.objects.filter(
-            Q(name__icontains=query) | Q(student_id__icontains=query),
-            active=True
-        )[:10]  # Limit to 10 results
+        # Students whose name or ID contains the query, ID prefix matches
+        # first (indexed, see labs.search)
+        students = search.search_students(query, limit=10, include_inactive=include_inactive)
         
         # Format results for autocomplete
         for student in students:
@@ -884,6 +880,7 @@ def student_name_search(request):
                 'student_id': student.student_id,
                 'name': student.name,
                 'email': student.email,
+                'active': student.active,
                 'display': f"{student.name} ({student.student_id})"
             })
     
@@ -893,8 +890,97 @@ def student_name_search(request):
         'students': results
     })
 
+# Columns of the roster rows
+ROSTER_FIELDS = ['id', 'student_id', 'name', 'email']
+
+def _roster_version(request=None):
+    # From the database, so every worker agrees: an added student moves the
+    # count and the last id, an edited one the latest updated_at
+    figures = Student.objects.aggregate(count=Count('id'), last_id=Max('id'), updated=Max('updated_at'))
+    return f"{figures['count']}-{figures['last_id']}-{figures['updated'].timestamp() if figures['updated'] else 0}"
+
+@login_required
+@ta_required
+@versioned(_roster_version)
+@gzip_page
+def student_roster(request):
+    """
+    Every active student as compact rows for the autocomplete to search
+    locally, with the roster version it was read at.
+    """
+    version = _roster_version()
+    students = Student.objects.filter(active=True).order_by('name').values_list(*ROSTER_FIELDS)
+    return JsonResponse({
+        'version': version,
+        'fields': ROSTER_FIELDS,
+        'students': list(students),
+    })
+
+# Version fingerprints of the read-only APIs (see labs.conditional).  Every
+# signoff, score or course structure change refreshes the materialized scores
+# of the students it affects (labs.scores), so their updated_at follows the
+# signoff data; lab content stamps (labs.cache) follow parts and criteria.
+
+def _student_scores_version(request):
+    """When the requested student's scores were last refreshed."""
+    student_key = request.GET.get('student_id')
+    if not student_key:
+        return None
+    # Same lookup as the views: primary key first, then student ID
+    scores = StudentCourseScore.objects.values_list('updated_at', flat=True)
+    if student_key.isdigit() and Student.objects.filter(pk=student_key).exists():
+        return scores.filter(student_id=student_key).first()
+    return scores.filter(student__student_id=student_key).first()
+
+def _lab_content(request, lab_id):
+    """
+    ``(fingerprint, last modified)`` of what a lab's bundle holds: the lab,
+    its parts, criteria and challenges, and the rubrics.  Read from the
+    database so every worker agrees; row counts catch deletions and the
+    latest ``updated_at`` everything else.  Kept on the request, which asks
+    for it twice.
+    """
+    memo = request.__dict__.setdefault('_lab_content', {})
+    if lab_id not in memo:
+        lab = Lab.objects.filter(pk=lab_id).aggregate(
+            lab_at=Max('updated_at'),
+            part_count=Count('parts', distinct=True),
+            parts_at=Max('parts__updated_at'),
+            criteria_count=Count('parts__quality_criteria', distinct=True),
+            criteria_at=Max('parts__quality_criteria__updated_at'),
+            challenge_count=Count('parts__challenges', distinct=True),
+            challenges_at=Max('parts__challenges__updated_at'),
+        )
+        rubrics = EvaluationRubric.objects.aggregate(rubric_count=Count('id'), rubrics_at=Max('updated_at'))
+        figures = {**lab, **rubrics}
+        stamps = [value for value in figures.values() if isinstance(value, datetime.datetime)]
+        memo[lab_id] = (sorted(figures.items()), max(stamps) if stamps else None)
+    return memo[lab_id]
+
+def _lab_content_version(request):
+    lab_id = request.GET.get('lab_id')
+    if not lab_id or not lab_id.isdigit():
+        return None
+    return _lab_content(request, int(lab_id))[0]
+
+def _part_content_version(request):
+    part_id = request.GET.get('part_id')
+    if not part_id or not part_id.isdigit():
+        return None
+    lab_id = Part.objects.filter(pk=part_id).values_list('lab_id', flat=True).first()
+    if lab_id is None:
+        return None
+    return _lab_content(request, lab_id)[0]
+
+def _signoff_details_version(request):
+    return _student_scores_version(request), _part_content_version(request)
+
+def _quick_stats_version(request):
+    return stats.quick_stats_version()
+
 @login_required
 @ta_required
+@versioned(_student_scores_version)
 def get_existing_signoff(request):
     """Get existing signoff data for a student and lab."""
     student_id = request.GET.get('student_id')
@@ -938,6 +1024,7 @@ def get_existing_signoff(request):
 
 @login_required
 @ta_required
+@versioned(_lab_content_version)
 def get_parts(request):
     """Get parts for a lab."""
     lab_id = request.GET.get('lab_id')
@@ -964,8 +1051,87 @@ def get_parts(request):
     except Lab.DoesNotExist:
         return JsonResponse([], safe=False)
 
+def _lab_bundle_etag(request, lab_id):
+    return etag_for(request, _lab_content(request, lab_id)[0])
+
+def _lab_bundle_last_modified(request, lab_id):
+    return _lab_content(request, lab_id)[1]
+
+@login_required
+@ta_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_lab_bundle_etag, last_modified_func=_lab_bundle_last_modified)
+def lab_bundle(request, lab_id):
+    """
+    Everything the signoff page needs to grade a lab: its parts with their
+    criteria and challenges, and the default rubric.
+
+    The ETag and Last-Modified come from the lab's content (see
+    ``_lab_content``), so the page can keep the bundle and revalidate it.
+    """
+    lab = get_object_or_404(Lab, pk=lab_id)
+    parts = list(lab.parts.order_by('order').prefetch_related(
+        'quality_criteria', Prefetch('challenges', queryset=Challenge.objects.order_by('order'))
+    ))
+    
+    # Parts without criteria get the defaults, as in get_criteria
+    criteria_by_part = {}
+    created_defaults = False
+    for part in parts:
+        criteria_by_part[part.id] = part.quality_criteria.all()
+        if not criteria_by_part[part.id]:
+            logger.info("No criteria found for part %s, creating defaults", part.id)
+            part.create_default_criteria()
+            criteria_by_part[part.id] = QualityCriteria.objects.filter(part=part)
+            created_defaults = True
+    
+    evaluation_rubric = EvaluationRubric.get_default_rubric()
+    rubric_criteria = [
+        {'key': key, 'name': criterion['name'], 'max_marks': criterion['max_marks']}
+        for key, criterion in evaluation_rubric.criteria_data.items()
+    ]
+    
+    parts_data = []
+    for part in parts:
+        parts_data.append({
+            'id': part.id,
+            'name': part.name,
+            'description': part.description,
+            'required': part.is_required,
+            'order': part.order,
+            'has_challenges': part.has_challenges,
+            'criteria': [{
+                'id': criterion.id,
+                'name': criterion.name,
+                'description': criterion.description,
+                'max_points': criterion.max_points,
+                'weight': criterion.weight
+            } for criterion in criteria_by_part[part.id]],
+            'challenges': [{
+                'id': challenge.id,
+                'name': challenge.name,
+                'description': challenge.description,
+                'max_points': challenge.max_points,
+                'difficulty': challenge.difficulty,
+                'order': challenge.order
+            } for challenge in part.challenges.all()] if part.has_challenges else []
+        })
+    
+    response = JsonResponse({
+        'lab': {'id': lab.id, 'name': lab.name},
+        'parts': parts_data,
+        'rubric_criteria': rubric_criteria,
+    })
+    if created_defaults:
+        # The new criteria moved the version on; send the new one
+        request._lab_content.pop(lab_id, None)
+        response['ETag'] = quote_etag(_lab_bundle_etag(request, lab_id))
+        response['Last-Modified'] = http_date(_lab_bundle_last_modified(request, lab_id).timestamp())
+    return response
+
 @login_required
 @ta_required
+@versioned(_part_content_version)
 def get_criteria(request):
     """Get criteria for a part."""
     part_id = request.GET.get('part_id')
@@ -979,7 +1145,7 @@ def get_criteria(request):
         
         # If no criteria exist, create default criteria
         if not criteria.exists():
-            print(f"No criteria found for part {part_id}, creating defaults...")
+            logger.info("No criteria found for part %s, creating defaults", part_id)
             part.create_default_criteria()
             # Refresh the criteria after creating defaults
             criteria = part.quality_criteria.all()
@@ -1027,16 +1193,94 @@ def get_criteria(request):
             'challenges': challenges_data
         }
         
-        # Log the response data for debugging
-        print(f"Response data for part {part_id}: {response_data}")
+        logger.debug("Criteria for part %s: %d quality, %d rubric, %d challenges",
+                     part_id, len(criteria_data), len(rubric_criteria), len(challenges_data))
         
         return JsonResponse(response_data)
     except Part.DoesNotExist:
         return JsonResponse({'criteria': [], 'error': 'Part not found'}, status=404)
     except Exception as e:
-        print(f"Error in get_criteria: {str(e)}")
+        logger.exception("Error in get_criteria for part %s", part_id)
         return JsonResponse({'criteria': [], 'error': str(e)}, status=500)
 
+def _quality_points(criteria_by_id, criteria_scores):
+    """
+    Convert submitted quality levels into points.
+
+    Returns ``[(criteria, points)]`` and error messages for the scores that
+    were skipped.
+    """
+    quality_points = []
+    error_messages = []
+    for criteria_id, score in criteria_scores.items():
+        criteria = criteria_by_id.get(str(criteria_id))
+        if criteria is None:
+            error_messages.append(f"Quality criteria with ID {criteria_id} not found for this part")
+            continue
+        
+        # Convert score to integer if it's a string
+        try:
+            score = int(score)
+        except (TypeError, ValueError):
+            error_messages.append(f"Invalid score {score!r} for criteria {criteria_id}")
+            continue
+        
+        # The score is a quality level (0-4), convert it to actual points
+        # 0 = Not Applicable (0%)
+        # 1 = Poor/Not Complete (25%)
+        # 2 = Meets Requirements (50%)
+        # 3 = Exceeds Requirements (75%)
+        # 4 = Outstanding (100%)
+        actual_score = 0
+        if score == 1:
+            actual_score = int(criteria.max_points * 0.25)  # Poor/Not Complete
+        elif score == 2:
+            actual_score = int(criteria.max_points * 0.5)   # Meets Requirements
+        elif score == 3:
+            actual_score = int(criteria.max_points * 0.75)  # Exceeds Requirements
+        elif score == 4:
+            actual_score = criteria.max_points  # Outstanding
+        
+        logger.debug("Converting quality level %s to actual score %s (max: %s)",
+                     score, actual_score, criteria.max_points)
+        quality_points.append((criteria, actual_score))
+    return quality_points, error_messages
+
+def _challenge_points(challenges_by_id, challenge_scores):
+    """Submitted challenge scores as ``[(challenge, points)]``, capped at the max points."""
+    challenge_points = []
+    for challenge_id, score in challenge_scores.items():
+        challenge = challenges_by_id.get(str(challenge_id))
+        if challenge is None:
+            logger.warning("Challenge with ID %s not found", challenge_id)
+            continue
+        try:
+            score = int(score)
+        except (TypeError, ValueError):
+            logger.warning("Invalid score %r for challenge %s", score, challenge_id)
+            continue
+        if score < 0:
+            logger.warning("Negative score %s for challenge %s", score, challenge_id)
+            continue
+        # Make sure score doesn't exceed max points
+        challenge_points.append((challenge, min(score, challenge.max_points)))
+    return challenge_points
+
+def _scoring_items(part, with_challenges):
+    """
+    The part's criteria and (if asked for and enabled) challenges by string id,
+    creating default criteria for a part that has none.
+    """
+    criteria_by_id = {str(criteria.id): criteria for criteria in part.quality_criteria.all()}
+    if not criteria_by_id:
+        logger.info("Part %s has no quality criteria, creating defaults", part.id)
+        part.create_default_criteria()
+        criteria_by_id = {str(criteria.id): criteria for criteria in part.quality_criteria.all()}
+    challenges_by_id = {}
+    if part.has_challenges and with_challenges:
+        challenges_by_id = {str(challenge.id): challenge for challenge in part.challenges.all()}
+    return criteria_by_id, challenges_by_id
+
 @login_required
 @ta_required
 def quick_signoff_submit(request):
@@ -1046,9 +1290,6 @@ def quick_signoff_submit(request):
     
     # Get form data
     try:
-        # Log the raw request body for debugging
-        print(f"Raw request body: {request.body}")
-        
         data = json.loads(request.body)
         student_id = data.get('student_id')
         part_id = data.get('part_id')
@@ -1058,11 +1299,9 @@ def quick_signoff_submit(request):
         rubric_evaluations = data.get('rubric_evaluations', {})
         challenge_scores = data.get('challenge_scores', {})
         
-        # Log the parsed data for debugging
-        print(f"Parsed data: student_id={student_id}, part_id={part_id}")
-        print(f"criteria_scores: {criteria_scores}")
-        print(f"rubric_evaluations: {rubric_evaluations}")
-        print(f"challenge_scores: {challenge_scores}")
+        logger.debug("Quick signoff for student %s, part %s: criteria_scores=%s rubric_evaluations=%s "
+                     "challenge_scores=%s", student_id, part_id, criteria_scores, rubric_evaluations,
+                     challenge_scores)
         
         # Validate required fields
         if not student_id or not part_id:
@@ -1072,13 +1311,11 @@ def quick_signoff_submit(request):
         try:
             student = Student.objects.get(pk=student_id)
         except Student.DoesNotExist:
-            print(f"Student with ID {student_id} not found")
             return JsonResponse({'success': False, 'error': f'Student with ID {student_id} not found'}, status=404)
             
         try:
             part = Part.objects.get(pk=part_id)
         except Part.DoesNotExist:
-            print(f"Part with ID {part_id} not found")
             return JsonResponse({'success': False, 'error': f'Part with ID {part_id} not found'}, status=404)
             
         # Check if submission is late
@@ -1086,132 +1323,78 @@ def quick_signoff_submit(request):
         if part.due_date and timezone.now() > part.due_date:
             is_late = True
         
-        # Check if part has quality criteria, create if not
-        if not part.quality_criteria.exists():
-            print(f"Part {part_id} has no quality criteria, creating defaults...")
-            part.create_default_criteria()
-        
-        # Check if a signoff already exists for this student and part
-        signoff, created = Signoff.objects.get_or_create(
-            student=student,
-            part=part,
-            defaults={
-                'instructor': request.user,
-                'status': 'approved',
-                'comments': comments
-            }
-        )
-        
-        if not created:
-            # Update existing signoff
-            signoff.instructor = request.user
-            signoff.status = 'approved'
-            signoff.comments = comments
-            # Add info about lateness if applicable
-            if is_late:
-                signoff.comments += "\n[Late submission: submitted after due date]"
-            signoff.save()
+        # Write the signoff and its scores as one unit and refresh the
+        # materialized scores once at the end instead of on every row
+        with transaction.atomic(), deferred_refresh():
+            criteria_by_id, challenges_by_id = _scoring_items(part, bool(challenge_scores))
+        
+            # Check and convert the submitted scores before writing anything
+            quality_points, error_messages = _quality_points(criteria_by_id, criteria_scores)
+            challenge_points = _challenge_points(challenges_by_id, challenge_scores) if challenges_by_id else []
+        
+            # Check if a signoff already exists for this student and part
+            signoff, created = Signoff.objects.get_or_create(
+                student=student,
+                part=part,
+                defaults={
+                    'instructor': request.user,
+                    'status': 'approved',
+                    'comments': comments
+                }
+            )
         
-        # Save quality criteria scores
-        error_messages = []
-        for criteria_id, score in criteria_scores.items():
-            try:
-                criteria = QualityCriteria.objects.get(pk=criteria_id)
-                
-                # Verify criteria belongs to this part
-                if criteria.part.id != part.id:
-                    error_messages.append(f"Criteria '{criteria.name}' does not belong to this part")
-                    continue
-                    
-                # Convert score to integer if it's a string
-                if isinstance(score, str):
-                    score = int(score)
-                
-                # The score is a quality level (0-4), convert it to actual points
-                # 0 = Not Applicable (0%)
-                # 1 = Poor/Not Complete (25%)
-                # 2 = Meets Requirements (50%)
-                # 3 = Exceeds Requirements (75%)
-                # 4 = Outstanding (100%)
-                actual_score = 0
-                if score == 0:
-                    actual_score = 0  # Not Applicable
-                elif score == 1:
-                    actual_score = int(criteria.max_points * 0.25)  # Poor/Not Complete
-                elif score == 2:
-                    actual_score = int(criteria.max_points * 0.5)   # Meets Requirements
-                elif score == 3:
-                    actual_score = int(criteria.max_points * 0.75)  # Exceeds Requirements
-                elif score == 4:
-                    actual_score = criteria.max_points  # Outstanding
-                
-                print(f"Converting quality level {score} to actual score {actual_score} (max: {criteria.max_points})")
-                
-                quality_score, _ = QualityScore.objects.update_or_create(
-                    signoff=signoff,
-                    criteria=criteria,
-                    defaults={'score': actual_score}
-                )
-            except QualityCriteria.DoesNotExist:
-                error_message = f"Quality criteria with ID {criteria_id} not found"
-                print(error_message)
-                error_messages.append(error_message)
-                continue
-            except Exception as e:
-                error_message = f"Error saving quality score for criteria {criteria_id}: {str(e)}"
-                print(error_message)
-                error_messages.append(error_message)
-                continue
+            if not created:
+                # Update existing signoff
+                signoff.instructor = request.user
+                signoff.status = 'approved'
+                signoff.comments = comments
+                # Add info about lateness if applicable
+                if is_late:
+                    signoff.comments += "\n[Late submission: submitted after due date]"
+                signoff.save()
+            logcontext.bind(signoff_id=signoff.id)
+        
+            # Save quality criteria scores, replacing earlier ones
+            QualityScore.objects.bulk_create(
+                [QualityScore(signoff=signoff, criteria=criteria, score=points) for criteria, points in quality_points],
+                update_conflicts=True, unique_fields=['signoff', 'criteria'], update_fields=['score']
+            )
         
-        # If there were errors, include them in the response but don't fail the request
-        if error_messages:
-            print(f"Errors during quality criteria processing: {error_messages}")
+            # Invalid scores are skipped; the rest of the signoff is saved
+            if error_messages:
+                logger.warning("Errors during quality criteria processing: %s", error_messages)
         
-        # Create or update evaluation sheet with the fixed rubric
-        rubric = EvaluationRubric.get_default_rubric()
+            # Create or update evaluation sheet with the fixed rubric
+            rubric = EvaluationRubric.get_default_rubric()
         
-        # If no rubric evaluations provided, create default ones
-        if not rubric_evaluations:
-            rubric_evaluations = {key: 'MR' for key in rubric.criteria_data.keys()}
+            # If no rubric evaluations provided, create default ones
+            if not rubric_evaluations:
+                rubric_evaluations = get_default_evaluations()
         
-        eval_sheet, _ = EvaluationSheet.objects.get_or_create(
-            signoff=signoff,
-            defaults={
-                'rubric': rubric,
-                'evaluations': rubric_evaluations
-            }
-        )
+            eval_sheet, _ = EvaluationSheet.objects.get_or_create(
+                signoff=signoff,
+                defaults={
+                    'rubric': rubric,
+                    'evaluations': rubric_evaluations
+                }
+            )
         
-        if not _:
-            # Update existing evaluation sheet
-            eval_sheet.rubric = rubric
-            eval_sheet.evaluations = rubric_evaluations
-            eval_sheet.save()
+            if not _:
+                # Update existing evaluation sheet
+                eval_sheet.rubric = rubric
+                eval_sheet.evaluations = rubric_evaluations
+                eval_sheet.save()
             
-        # If part has challenges, save challenge scores
-        if part.has_challenges and challenge_scores:
-            for challenge_id, score in challenge_scores.items():
-                try:
-                    challenge = Challenge.objects.get(pk=challenge_id)
-                    # Convert score to integer if it's a string
-                    if isinstance(score, str):
-                        score = int(score)
-                    # Make sure score doesn't exceed max points
-                    score = min(score, challenge.max_points)
-                    
-                    challenge_score, _ = ChallengeScore.objects.update_or_create(
-                        signoff=signoff,
-                        challenge=challenge,
-                        defaults={'score': score}
-                    )
-                except Challenge.DoesNotExist:
-                    print(f"Challenge with ID {challenge_id} not found")
-                    # Skip invalid challenge IDs
-                    continue
-                except Exception as e:
-                    print(f"Error saving challenge score for challenge {challenge_id}: {str(e)}")
-                    # Skip errors and continue
-                    continue
+            # If part has challenges, save challenge scores
+            if challenge_points:
+                ChallengeScore.objects.bulk_create(
+                    [ChallengeScore(signoff=signoff, challenge=challenge, score=points)
+                     for challenge, points in challenge_points],
+                    update_conflicts=True, unique_fields=['signoff', 'challenge'], update_fields=['score']
+                )
+        
+            # bulk_create skips the signals that refresh the student's scores
+            request_refresh([student.id], [part.id])
         
         return JsonResponse({
             'success': True,
@@ -1221,16 +1404,206 @@ def quick_signoff_submit(request):
         })
         
     except json.JSONDecodeError as e:
-        print(f"JSON Decode Error: {str(e)}")
+        logger.warning("Invalid JSON in quick signoff: %s", e)
+        return JsonResponse({'success': False, 'error': 'Invalid JSON data'}, status=400)
+    except Exception as e:
+        logger.exception("Error in signoff submission")
+        return JsonResponse({'success': False, 'error': str(e)}, status=500)
+
+# Payload fields a per-student entry can override; the score dicts are merged
+# with the shared ones key by key, comments replace the shared comments
+BULK_SCORE_FIELDS = ('criteria_scores', 'rubric_evaluations', 'challenge_scores')
+
+def _bulk_payload_errors(payload):
+    """What is wrong with the shape of a shared or per-student payload."""
+    if not isinstance(payload, dict):
+        return ['Payload must be an object']
+    errors = [f'{field} must be an object' for field in BULK_SCORE_FIELDS
+              if payload.get(field) is not None and not isinstance(payload[field], dict)]
+    if not isinstance(payload.get('comments', ''), str):
+        errors.append('comments must be a string')
+    return errors
+
+def _bulk_payload(shared, own):
+    """One student's payload: the shared one with the student's own entries on top."""
+    payload = {'comments': own.get('comments', shared.get('comments', ''))}
+    for field in BULK_SCORE_FIELDS:
+        payload[field] = {**(shared.get(field) or {}), **(own.get(field) or {})}
+    return payload
+
+@login_required
+@ta_required
+def bulk_signoff_submit(request):
+    """
+    Sign off one part for several students in a single transaction.
+
+    Takes ``part_id``, ``student_ids``, a ``shared`` payload (``comments``,
+    ``criteria_scores``, ``rubric_evaluations``, ``challenge_scores``, as for
+    the quick signoff) and optional per-student overrides in ``students``,
+    keyed by student id.  Returns one result per requested student.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Invalid request method'}, status=400)
+    
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError as e:
+        logger.warning("Invalid JSON in bulk signoff: %s", e)
         return JsonResponse({'success': False, 'error': 'Invalid JSON data'}, status=400)
+    
+    part_id = data.get('part_id')
+    student_ids = data.get('student_ids')
+    shared = data.get('shared') or {}
+    overrides = data.get('students') or {}
+    if not part_id or not student_ids or not isinstance(student_ids, list):
+        return JsonResponse({'success': False, 'error': 'Missing required fields'}, status=400)
+    if not isinstance(overrides, dict):
+        return JsonResponse({'success': False, 'error': 'Invalid payload'}, status=400)
+    shared_errors = _bulk_payload_errors(shared)
+    if shared_errors:
+        return JsonResponse({'success': False, 'error': 'Invalid shared payload', 'errors': shared_errors},
+                            status=400)
+    
+    try:
+        part = Part.objects.get(pk=part_id)
+    except (Part.DoesNotExist, ValueError, TypeError):
+        return JsonResponse({'success': False, 'error': f'Part with ID {part_id} not found'}, status=404)
+    
+    # One result per requested id, in request order; duplicates are dropped
+    results = {}
+    for raw_id in student_ids:
+        try:
+            student_id = int(raw_id)
+        except (TypeError, ValueError):
+            results[str(raw_id)] = {'student_id': raw_id, 'success': False,
+                                    'errors': [f'Invalid student ID {raw_id!r}']}
+            continue
+        results.setdefault(student_id, {'student_id': student_id, 'success': False, 'errors': []})
+    requested = [key for key in results if isinstance(key, int)]
+    
+    is_late = bool(part.due_date and timezone.now() > part.due_date)
+    
+    students = Student.objects.in_bulk(requested)
+    for student_id in requested:
+        if student_id not in students:
+            results[student_id]['errors'].append(f'Student with ID {student_id} not found')
+    payloads = {}
+    for student_id in requested:
+        if student_id not in students:
+            continue
+        own = overrides.get(str(student_id)) or {}
+        own_errors = _bulk_payload_errors(own)
+        if own_errors:
+            results[student_id]['errors'].extend(own_errors)
+            continue
+        payloads[student_id] = _bulk_payload(shared, own)
+    if not payloads:
+        # 404 when none of the students exist, 400 when their payloads are bad
+        return JsonResponse({'success': False, 'error': 'No valid students selected',
+                             'results': list(results.values())}, status=400 if students else 404)
+    
+    try:
+        with transaction.atomic(), deferred_refresh():
+            criteria_by_id, challenges_by_id = _scoring_items(
+                part, any(payload['challenge_scores'] for payload in payloads.values())
+            )
+            
+            # Create or update the signoffs: one query to find the existing
+            # ones, then one insert and one update
+            signoffs = {signoff.student_id: signoff
+                        for signoff in Signoff.objects.filter(part=part, student_id__in=payloads)}
+            now = timezone.now()
+            new_signoffs = []
+            updated_signoffs = []
+            for student_id, payload in payloads.items():
+                signoff = signoffs.get(student_id)
+                if signoff is None:
+                    signoff = Signoff(student=students[student_id], part=part, instructor=request.user,
+                                      status='approved', comments=payload['comments'])
+                    signoffs[student_id] = signoff
+                    new_signoffs.append(signoff)
+                    results[student_id]['created'] = True
+                else:
+                    signoff.instructor = request.user
+                    signoff.status = 'approved'
+                    signoff.comments = payload['comments']
+                    # Add info about lateness if applicable
+                    if is_late:
+                        signoff.comments += "\n[Late submission: submitted after due date]"
+                    # bulk_update doesn't apply auto_now
+                    signoff.date_updated = now
+                    updated_signoffs.append(signoff)
+                    results[student_id]['created'] = False
+            Signoff.objects.bulk_create(new_signoffs)
+            Signoff.objects.bulk_update(updated_signoffs, ['instructor', 'status', 'comments', 'date_updated'])
+            
+            # Scores of every student, replacing earlier ones
+            quality_scores = []
+            challenge_scores = []
+            for student_id, payload in payloads.items():
+                signoff = signoffs[student_id]
+                quality_points, error_messages = _quality_points(criteria_by_id, payload['criteria_scores'])
+                results[student_id]['errors'].extend(error_messages)
+                quality_scores.extend(QualityScore(signoff=signoff, criteria=criteria, score=points)
+                                      for criteria, points in quality_points)
+                if challenges_by_id:
+                    challenge_scores.extend(
+                        ChallengeScore(signoff=signoff, challenge=challenge, score=points)
+                        for challenge, points in _challenge_points(challenges_by_id, payload['challenge_scores'])
+                    )
+            QualityScore.objects.bulk_create(
+                quality_scores,
+                update_conflicts=True, unique_fields=['signoff', 'criteria'], update_fields=['score']
+            )
+            if challenge_scores:
+                ChallengeScore.objects.bulk_create(
+                    challenge_scores,
+                    update_conflicts=True, unique_fields=['signoff', 'challenge'], update_fields=['score']
+                )
+            
+            # Evaluation sheets with the fixed rubric, defaults where none were given
+            rubric = EvaluationRubric.get_default_rubric()
+            sheets = {}
+            for sheet in EvaluationSheet.objects.filter(signoff__in=signoffs.values()).order_by('-id'):
+                sheets[sheet.signoff_id] = sheet
+            new_sheets = []
+            for student_id, payload in payloads.items():
+                signoff = signoffs[student_id]
+                sheet = sheets.get(signoff.id)
+                if sheet is None:
+                    sheet = EvaluationSheet(signoff=signoff)
+                    new_sheets.append(sheet)
+                sheet.rubric = rubric
+                sheet.evaluations = payload['rubric_evaluations'] or get_default_evaluations()
+                sheet.update_marks()
+            EvaluationSheet.objects.bulk_create(new_sheets)
+            EvaluationSheet.objects.bulk_update(
+                list(sheets.values()), ['rubric', 'evaluations', 'earned_marks', 'max_marks']
+            )
+            
+            # The bulk writes skip the signals that invalidate the part's max
+            # score and refresh the students' scores
+            invalidate_part_max(part.id)
+            request_refresh(list(payloads), [part.id])
     except Exception as e:
-        print(f"Error in signoff submission: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in bulk signoff submission for part %s", part_id)
         return JsonResponse({'success': False, 'error': str(e)}, status=500)
+    
+    for student_id, signoff in signoffs.items():
+        results[student_id].update({'success': True, 'signoff_id': signoff.id, 'status': 'approved'})
+    results = list(results.values())
+    succeeded = sum(result['success'] for result in results)
+    logger.info("Bulk signoff of part %s: %d of %d students signed off", part.id, succeeded, len(results))
+    return JsonResponse({
+        'success': succeeded > 0,
+        'signed_off': succeeded,
+        'results': results,
+        'message': f'{succeeded} of {len(results)} signoffs submitted'
+    })
 
 @login_required
 @ta_required
+@versioned(_signoff_details_version)
 def get_signoff_details(request):
     """Get details for a signoff."""
     student_id = request.GET.get('student_id')
@@ -1256,7 +1629,7 @@ def get_signoff_details(request):
             
             # Get quality scores
             quality_scores = []
-            for score in signoff.quality_scores.all():
+            for score in signoff.quality_scores.select_related('criteria'):
                 # For consistency, make sure to include both raw score and quality level
                 quality_level = 0  # Default: Not Applicable
                 if score.score > 0:
@@ -1339,9 +1712,10 @@ def get_signoff_details(request):
             
             if has_challenges:
                 challenges = part.challenges.all().order_by('order')
+                scores_by_challenge = {score.challenge_id: score for score in signoff.challenge_scores.all()}
                 for challenge in challenges:
-                    try:
-                        score = ChallengeScore.objects.get(signoff=signoff, challenge=challenge)
+                    score = scores_by_challenge.get(challenge.id)
+                    if score is not None:
                         challenge_scores.append({
                             'challenge_id': challenge.id,
                             'name': challenge.name,
@@ -1350,7 +1724,7 @@ def get_signoff_details(request):
                             'difficulty': challenge.difficulty,
                             'comments': score.comments
                         })
-                    except ChallengeScore.DoesNotExist:
+                    else:
                         challenge_scores.append({
                             'challenge_id': challenge.id,
                             'name': challenge.name,
@@ -1439,15 +1813,23 @@ def lab_report(request, lab_id=None):
     if lab_id:
         lab = get_object_or_404(Lab, pk=lab_id)
         # Get all parts for this lab
-        parts = lab.parts.all().order_by('order')
+        parts = list(lab.parts.all().order_by('order'))
         # Get all students
-        students = Student.objects.filter(active=True).order_by('name')
+        students = list(Student.objects.filter(active=True).order_by('name'))
         
         # Create a list of other labs (excluding current)
         other_labs = all_labs.exclude(pk=lab_id)
         
+        # Load every status for the lab in one scan
+        lab_signoffs = Signoff.objects.filter(part__lab=lab, student__active=True)
+        statuses = {
+            (signoff['student_id'], signoff['part_id']): signoff['status']
+            for signoff in lab_signoffs.values('student_id', 'part_id', 'status')
+        }
+        
         # Build data matrix for the report
         matrix = []
+        total_parts = len(parts)
         
         for student in students:
             row = {
@@ -1457,10 +1839,9 @@ def lab_report(request, lab_id=None):
             }
             
             completed_parts = 0
-            total_parts = parts.count()
             
             for part in parts:
-                status = part.get_part_status(student)
+                status = statuses.get((student.id, part.id), 'not_started')
                 
                 # Calculate CSS class based on status
                 if status == 'approved':
@@ -1485,29 +1866,13 @@ def lab_report(request, lab_id=None):
             
             matrix.append(row)
         
-        # Calculate overall stats
-        completed_signoffs = Signoff.objects.filter(
-            student__in=students,
-            part__in=parts,
-            status='approved'
-        ).count()
-        
-        total_signoffs = students.count() * parts.count()
+        # Count signoffs by status in one GROUP BY query
+        signoffs_by_status = {'approved': 0, 'pending': 0, 'rejected': 0}
+        for entry in lab_signoffs.order_by().values('status').annotate(count=Count('id')):
+            signoffs_by_status[entry['status']] = entry['count']
+        completed_signoffs = signoffs_by_status['approved']
         
-        # Count signoffs by status
-        signoffs_by_status = {
-            'approved': completed_signoffs,
-            'pending': Signoff.objects.filter(
-                student__in=students,
-                part__in=parts,
-                status='pending'
-            ).count(),
-            'rejected': Signoff.objects.filter(
-                student__in=students,
-                part__in=parts,
-                status='rejected'
-            ).count()
-        }
+        total_signoffs = len(students) * total_parts
         
         not_started = total_signoffs - (
             signoffs_by_status['approved'] + 
@@ -1551,24 +1916,37 @@ def lab_report(request, lab_id=None):
 def student_progress_report(request):
     """View progress report for all students across all labs."""
     # Get all active students
-    students = Student.objects.filter(active=True).order_by('name')
+    students = list(Student.objects.filter(active=True).order_by('name'))
     
     # Get all labs
-    labs = Lab.objects.all().order_by('name')
+    labs = list(Lab.objects.order_by('name'))
+    
+    # Read the materialized scores kept current by labs.scores
+    lab_scores = {
+        (score.student_id, score.lab_id): score
+        for score in StudentLabScore.objects.filter(student__active=True)
+    }
+    course_scores = {
+        score.student_id: score
+        for score in StudentCourseScore.objects.filter(student__active=True)
+    }
     
     # Build data matrix for the report
     matrix = []
     
     for student in students:
+        course_score = course_scores.get(student.id) or StudentCourseScore(student=student)
         row = {
             'student': student,
             'labs': [],
-            'overall_completion': student.get_completion_status
+            'overall_completion': course_score.completion
         }
         
         for lab in labs:
+            lab_score = lab_scores.get((student.id, lab.id)) or StudentLabScore(student=student, lab=lab)
+            
             # Calculate completion percentage for this lab
-            completion = lab.get_student_percentage(student)
+            completion = lab_score.percentage
             
             # Determine CSS class based on completion
             if completion >= 90:
@@ -1586,21 +1964,21 @@ def student_progress_report(request):
                 'lab': lab,
                 'completion': completion,
                 'css_class': css_class,
-                'grade': lab.get_grade_letter(student)
+                'grade': lab_score.letter_grade
             })
         
         matrix.append(row)
     
     # Calculate overall statistics
-    total_students = students.count()
-    total_labs = labs.count()
+    total_students = len(students)
+    total_labs = len(labs)
     
     # Count students with 100% completion
     fully_completed = 0
     total_completion = 0
     
-    for student in students:
-        completion = student.get_completion_status
+    for row in matrix:
+        completion = row['overall_completion']
         total_completion += completion
         if completion == 100:
             fully_completed += 1
@@ -1633,76 +2011,74 @@ def ta_report(request):
         Q(groups__name='Instructor') | Q(groups__name='Admin') | Q(is_superuser=True)
     ).distinct()
     
-    # Get all signoffs
-    all_signoffs = Signoff.objects.all()
-    approved_signoffs = all_signoffs.filter(status='approved')
-    
-    # Get signoffs for today
+    # Get signoffs for today and in total
     today = timezone.now().date()
-    signoffs_today = all_signoffs.filter(date_updated__date=today).count()
+    totals = Signoff.objects.aggregate(
+        total=Count('id'),
+        today=Count('id', filter=Q(date_updated__date=today))
+    )
+    signoffs_today = totals['today']
+    total_signoffs = totals['total']
+    
+    # Signoff counts per instructor, one GROUP BY instructor query
+    signoff_counts = {
+        row['instructor_id']: row
+        for row in Signoff.objects.order_by().values('instructor_id').annotate(
+            total=Count('id'),
+            approved=Count('id', filter=Q(status='approved')),
+            rejected=Count('id', filter=Q(status='rejected')),
+            pending=Count('id', filter=Q(status='pending')),
+            today=Count('id', filter=Q(date_updated__date=today)),
+            last_signoff_at=Max('date_updated'),
+            part_count=Count('part', distinct=True),
+            lab_count=Count('part__lab', distinct=True),
+        )
+    }
     
-    # Get total signoffs
-    total_signoffs = all_signoffs.count()
+    # Points given per instructor: quality scores against their criteria...
+    points = defaultdict(lambda: [Decimal('0'), Decimal('0')])
+    quality_totals = QualityScore.objects.order_by().values('signoff__instructor_id').annotate(
+        earned=Sum('score'),
+        max_points=Sum('criteria__max_points'),
+    )
+    for row in quality_totals:
+        entry = points[row['signoff__instructor_id']]
+        entry[0] += Decimal(str(row['earned'] or 0))
+        entry[1] += Decimal(str(row['max_points'] or 0))
+    
+    # ...plus the stored evaluation sheet marks
+    sheet_totals = EvaluationSheet.objects.order_by().values('signoff__instructor_id').annotate(
+        earned=Sum('earned_marks'),
+        max_points=Sum('max_marks'),
+    )
+    for row in sheet_totals:
+        entry = points[row['signoff__instructor_id']]
+        entry[0] += Decimal(str(row['earned'] or 0))
+        entry[1] += Decimal(str(row['max_points'] or 0))
     
     # Build instructor stats
     instructor_stats = []
     
     for instructor in instructors:
-        # Get all signoffs by this instructor
-        instructor_signoffs = all_signoffs.filter(instructor=instructor)
-        total_signoffs_count = instructor_signoffs.count()
-        
-        # Get counts by status
-        approved_count = instructor_signoffs.filter(status='approved').count()
-        rejected_count = instructor_signoffs.filter(status='rejected').count()
-        pending_count = instructor_signoffs.filter(status='pending').count()
-        
-        # Get signoffs by this instructor today
-        instructor_signoffs_today = instructor_signoffs.filter(date_updated__date=today).count()
-        
-        # Calculate average score given by instructor
-        avg_score = 0
-        total_points = 0
-        max_points = 0
-        
-        # Calculate average from quality scores
-        quality_scores = QualityScore.objects.filter(signoff__instructor=instructor)
-        for score in quality_scores:
-            total_points += score.score
-            max_points += score.criteria.max_points
-        
-        # Add evaluation sheet scores
-        eval_sheets = EvaluationSheet.objects.filter(signoff__instructor=instructor)
-        for sheet in eval_sheets:
-            total_points += sheet.get_earned_marks()
-            max_points += sheet.get_total_max_marks()
+        counts = signoff_counts.get(instructor.id, {})
         
         # Calculate average score as percentage
+        avg_score = 0
+        total_points, max_points = points.get(instructor.id, (0, 0))
         if max_points > 0:
             avg_score = (total_points / max_points) * 100
         
-        # Get the last signoff
-        last_signoff = instructor_signoffs.order_by('-date_updated').first()
-        
-        # Get parts this instructor has signed off on
-        signed_parts = Part.objects.filter(signoffs__instructor=instructor).distinct()
-        signed_part_count = signed_parts.count()
-        
-        # Get labs this instructor has signed off parts for
-        signed_labs = Lab.objects.filter(parts__in=signed_parts).distinct()
-        signed_lab_count = signed_labs.count()
-        
         stats = {
             'instructor': instructor,
-            'total_signoffs': total_signoffs_count,
-            'approved': approved_count,
-            'rejected': rejected_count,
-            'pending': pending_count,
-            'signoffs_today': instructor_signoffs_today,
+            'total_signoffs': counts.get('total', 0),
+            'approved': counts.get('approved', 0),
+            'rejected': counts.get('rejected', 0),
+            'pending': counts.get('pending', 0),
+            'signoffs_today': counts.get('today', 0),
             'avg_score': avg_score,
-            'last_signoff': last_signoff,
-            'signed_part_count': signed_part_count,
-            'signed_lab_count': signed_lab_count
+            'last_signoff_at': counts.get('last_signoff_at'),
+            'signed_part_count': counts.get('part_count', 0),
+            'signed_lab_count': counts.get('lab_count', 0)
         }
         
         instructor_stats.append(stats)
@@ -1732,48 +2108,74 @@ def student_grade_report(request, student_id=None):
     if student_id:
         students = students.filter(pk=student_id)
     
+    # Load the signoff details in a fixed number of queries
+    gradebook = Gradebook(students=students)
+    
     # Get all labs
-    labs = Lab.objects.all().order_by('name')
+    labs = gradebook.labs
+    
+    # Scores and grades come from the materialized tables kept by labs.scores
+    student_ids = [student.id for student in gradebook.students]
+    part_scores = {
+        (score.student_id, score.part_id): score
+        for score in StudentPartScore.objects.filter(student_id__in=student_ids)
+    }
+    lab_scores = {
+        (score.student_id, score.lab_id): score
+        for score in StudentLabScore.objects.filter(student_id__in=student_ids)
+    }
+    course_scores = {
+        score.student_id: score
+        for score in StudentCourseScore.objects.filter(student_id__in=student_ids)
+    }
     
     # Build report data
     report_data = []
     
-    for student in students:
+    for student in gradebook.students:
+        course_score = course_scores.get(student.id) or StudentCourseScore(student=student)
         student_data = {
             'student': student,
             'labs': [],
-            'earned_points': Decimal('0'),
-            'total_points': Decimal('0'),
+            'earned_points': course_score.earned_score,
+            'total_points': course_score.max_score,
+            'overall_grade': course_score.overall_grade,
+            'letter_grade': course_score.letter_grade,
             'exceeds_requirements_count': 0  # Add counter for ER statuses
         }
         
         # Process each lab
         for lab in labs:
-            lab_max_score = lab.get_max_score()
+            lab_score = lab_scores.get((student.id, lab.id)) or StudentLabScore(student=student, lab=lab)
+            lab_parts = gradebook.parts(lab)
             lab_data = {
                 'lab': lab,
                 'parts': [],
-                'earned_points': lab.get_student_score(student),
-                'max_points': lab_max_score,
-                'completion_percentage': lab.get_student_percentage(student),
-                'letter_grade': lab.get_grade_letter(student)
+                'earned_points': lab_score.earned_score,
+                'max_points': lab_score.max_score,
+                'completion_percentage': lab_score.percentage,
+                'letter_grade': lab_score.letter_grade
             }
             
-            # Add to student total
-            student_data['earned_points'] += lab_data['earned_points']
-            student_data['total_points'] += lab_max_score
-            
             # Process each part in the lab
-            for part in lab.parts.all().order_by('order'):
-                part_status = part.get_part_status(student)
+            for part in lab_parts:
+                signoff = gradebook.signoff(student, part)
+                part_score = part_scores.get((student.id, part.id)) or StudentPartScore(student=student, part=part)
+                part_status = part_score.status
+                
+                # Points this part contributes to the lab total
+                if lab_score.max_score:
+                    possible_points = (part_score.max_score / lab_score.max_score) * lab.total_points
+                else:
+                    possible_points = lab.total_points / len(lab_parts)
                 
                 part_data = {
                     'part': part,
                     'status': part_status,
                     'earned_points': Decimal('0'),
-                    'max_points': part.get_max_score(),
+                    'max_points': part_score.max_score,
                     'completion_percentage': Decimal('0'),
-                    'possible_points': part.get_contribution_to_lab(),
+                    'possible_points': possible_points,
                     'quality_scores': [],
                     'evaluation_sheet': None,
                     'quality_earned_points': Decimal('0'),
@@ -1784,107 +2186,94 @@ def student_grade_report(request, student_id=None):
                 }
                 
                 # Get signoff if it exists
-                if part_status != 'not_started':
-                    try:
-                        signoff = Signoff.objects.get(student=student, part=part)
-                        
-                        # Get quality scores
-                        quality_criteria = part.quality_criteria.all()
+                if signoff:
+                    # Get quality scores
+                    for criteria in gradebook.criteria(part):
+                        score = gradebook.quality_score(signoff, criteria)
+                        max_weighted = criteria.max_points * criteria.weight
+                        if score:
+                            score.criteria = criteria
+                            weighted_score = score.weighted_score
+                        else:
+                            weighted_score = Decimal('0')
                         
-                        for criteria in quality_criteria:
-                            try:
-                                score = QualityScore.objects.get(signoff=signoff, criteria=criteria)
-                                weighted_score = score.weighted_score
-                                max_weighted = criteria.max_points * criteria.weight
-                            except QualityScore.DoesNotExist:
-                                score = None
-                                weighted_score = Decimal('0')
-                                max_weighted = criteria.max_points * criteria.weight
-                            
-                            part_data['quality_scores'].append({
-                                'criteria': criteria,
-                                'score': score,
-                                'weighted_score': weighted_score,
-                                'max_weighted': Decimal(str(max_weighted))
-                            })
-                            
-                            if score:
-                                # Convert weighted_score to Decimal if it's a float
-                                if isinstance(weighted_score, float):
-                                    weighted_score = Decimal(str(weighted_score))
-                                part_data['quality_earned_points'] += weighted_score
-                            
-                            part_data['quality_max_points'] += Decimal(str(max_weighted))
+                        part_data['quality_scores'].append({
+                            'criteria': criteria,
+                            'score': score,
+                            'weighted_score': weighted_score,
+                            'max_weighted': Decimal(str(max_weighted))
+                        })
                         
-                        # Get challenge scores if applicable
-                        if part.has_challenges:
-                            challenges = part.challenges.all().order_by('order')
-                            
-                            for challenge in challenges:
-                                try:
-                                    score = ChallengeScore.objects.get(signoff=signoff, challenge=challenge)
-                                    part_data['challenge_scores'].append({
-                                        'challenge': challenge,
-                                        'score': score,
-                                        'percentage': score.percentage
-                                    })
-                                    
-                                    part_data['challenge_earned_points'] += Decimal(str(score.score))
-                                except ChallengeScore.DoesNotExist:
-                                    part_data['challenge_scores'].append({
-                                        'challenge': challenge,
-                                        'score': None,
-                                        'percentage': 0
-                                    })
-                                    
-                                # Add max points for this challenge
-                                part_data['challenge_max_points'] += Decimal(str(challenge.max_points))
+                        if score:
+                            # Convert weighted_score to Decimal if it's a float
+                            if isinstance(weighted_score, float):
+                                weighted_score = Decimal(str(weighted_score))
+                            part_data['quality_earned_points'] += weighted_score
                         
-                        # Get evaluation sheet if it exists
-                        try:
-                            eval_sheet = EvaluationSheet.objects.get(signoff=signoff)
-                            
-                            # Prepare evaluation data based on new rubric structure
-                            if hasattr(eval_sheet, 'rubric') and eval_sheet.rubric:
-                                eval_data = {}
-                                
-                                # Add data for each criterion in the rubric
-                                for key, criterion in eval_sheet.rubric.criteria_data.items():
-                                    status = eval_sheet.evaluations.get(key, 'ND')
-                                    # Count "Exceeds Requirements" statuses
-                                    if status == 'ER':
-                                        student_data['exceeds_requirements_count'] += 1
-                                    
-                                    max_marks = Decimal(str(criterion['max_marks']))
-                                    earned = max_marks * Decimal(str(EvaluationSheet.STATUS_TO_SCORE.get(status, 0)))
-                                    
-                                    eval_data[f"{key}_display"] = dict(EvaluationSheet.STATUS_CHOICES).get(status)
-                                    eval_data[f"{key}_max_marks"] = max_marks
-                                    eval_data[f"{key}_earned"] = earned
+                        part_data['quality_max_points'] += Decimal(str(max_weighted))
+                    
+                    # Get challenge scores if applicable
+                    if part.has_challenges:
+                        for challenge in gradebook.challenges(part):
+                            score = gradebook.challenge_score(signoff, challenge)
+                            if score:
+                                score.challenge = challenge
+                                part_data['challenge_scores'].append({
+                                    'challenge': challenge,
+                                    'score': score,
+                                    'percentage': score.percentage
+                                })
                                 
-                                # Add totals
-                                eval_data['total_max_marks'] = eval_sheet.get_total_max_marks()
-                                eval_data['total_earned_marks'] = eval_sheet.get_earned_marks()
+                                part_data['challenge_earned_points'] += Decimal(str(score.score))
                             else:
-                                # Legacy system (this shouldn't execute after migration but keeping as fallback)
-                                eval_data = {
-                                    'total_max_marks': Decimal('0'),
-                                    'total_earned_marks': Decimal('0')
-                                }
+                                part_data['challenge_scores'].append({
+                                    'challenge': challenge,
+                                    'score': None,
+                                    'percentage': 0
+                                })
+                                
+                            # Add max points for this challenge
+                            part_data['challenge_max_points'] += Decimal(str(challenge.max_points))
+                    
+                    # Get evaluation sheet if it exists
+                    eval_sheet = gradebook.evaluation_sheet(signoff)
+                    if eval_sheet:
+                        # Prepare evaluation data based on new rubric structure
+                        if eval_sheet.rubric:
+                            criteria_data = eval_sheet.rubric.criteria_data
+                            eval_data = {}
                             
-                            part_data['evaluation_sheet'] = eval_data
+                            # Add data for each criterion in the rubric
+                            for key, criterion in criteria_data.items():
+                                status = eval_sheet.evaluations.get(key, 'ND')
+                                # Count "Exceeds Requirements" statuses
+                                if status == 'ER':
+                                    student_data['exceeds_requirements_count'] += 1
+                                
+                                max_marks = Decimal(str(criterion['max_marks']))
+                                earned = max_marks * Decimal(str(EvaluationSheet.STATUS_TO_SCORE.get(status, 0)))
+                                
+                                eval_data[f"{key}_display"] = dict(EvaluationSheet.STATUS_CHOICES).get(status)
+                                eval_data[f"{key}_max_marks"] = max_marks
+                                eval_data[f"{key}_earned"] = earned
                             
-                        except EvaluationSheet.DoesNotExist:
-                            pass
+                            # Add totals
+                            eval_data['total_max_marks'] = rubric_max_marks(criteria_data)
+                            eval_data['total_earned_marks'] = earned_marks(criteria_data, eval_sheet.evaluations)
+                        else:
+                            # Legacy system (this shouldn't execute after migration but keeping as fallback)
+                            eval_data = {
+                                'total_max_marks': Decimal('0'),
+                                'total_earned_marks': Decimal('0')
+                            }
                         
-                        # Set earned points and completion percentage
-                        if part_status == 'approved':
-                            part_data['earned_points'] = signoff.get_total_quality_score()
-                            if part_data['max_points'] > 0:
-                                part_data['completion_percentage'] = (part_data['earned_points'] / part_data['max_points']) * 100
+                        part_data['evaluation_sheet'] = eval_data
                     
-                    except Signoff.DoesNotExist:
-                        pass
+                    # Set earned points and completion percentage
+                    if part_status == 'approved':
+                        part_data['earned_points'] = part_score.quality_earned + part_score.evaluation_earned
+                        if part_data['max_points'] > 0:
+                            part_data['completion_percentage'] = (part_data['earned_points'] / part_data['max_points']) * 100
                 
                 lab_data['parts'].append(part_data)
             
@@ -1900,1033 +2289,148 @@ def student_grade_report(request, student_id=None):
 
 @login_required
 @ta_required
+@versioned(_quick_stats_version)
 def quick_stats(request):
-    """Get quick stats data."""
-    # Count total approved signoffs
-    total_signoffs = Signoff.objects.filter(status='approved').count()
-    
-    # Calculate average completion rate across students
-    students = Student.objects.filter(active=True)
-    if students.exists():
-        completion_sum = 0
-        for student in students:
-            try:
-                completion_sum += student.get_completion_status
-            except Exception:
-                pass
-        avg_completion = round(completion_sum / students.count(), 1) if students.count() > 0 else 0
-    else:
-        avg_completion = 0
-        
-    # Count challenges and completed challenges
-    try:
-        total_challenges = Challenge.objects.count()
-        # Use a more compatible way to count unique challenge completions
-        challenge_scores = ChallengeScore.objects.filter(score__gt=0)
-        
-        # Create a set of unique (challenge_id, student_id) tuples for completed challenges
-        completed_challenge_tuples = []
-        for score in challenge_scores:
-            try:
-                completed_challenge_tuples.append((score.challenge_id, score.signoff.student_id))
-            except Exception as e:
-                print(f"Error processing challenge score: {e}")
-                continue
-                
-        completed_challenges = len(set(completed_challenge_tuples))
-        
-        # Calculate more accurate challenge completion rate
-        active_students = Student.objects.filter(active=True).count()
-        if active_students > 0 and total_challenges > 0:
-            # Total possible completions = active students * available challenges
-            total_possible = active_students * total_challenges
-            challenge_completion = round((completed_challenges / total_possible) * 100, 1)
-        else:
-            challenge_completion = 0
-    except Exception as e:
-        print(f"Error calculating challenge statistics: {e}")
-        total_challenges = 0
-        completed_challenges = 0
-        challenge_completion = 0
-    
-    # Count students who have status 'ER' in any evaluation
-    evaluation_sheets = EvaluationSheet.objects.all()
-    er_count = 0
-    
-    for sheet in evaluation_sheets:
-        for status in sheet.evaluations.values():
-            if status == 'ER':  # ER = Exceeds Requirements
-                er_count += 1
-                break
-    
-    # Calculate grade distribution
-    grade_distribution = {}
-    # Initialize all grades to 0
-    for grade in ['A+', 'A', 'A-', 'B+', 'B', 'B-', 'C+', 'C', 'C-', 'D+', 'D', 'D-', 'F']:
-        grade_distribution[grade] = 0
-    
-    try:
-        # Get all labs
-        labs = Lab.objects.all()
-        # Use the first lab's grade scale, or fall back to the default
-        lab_grade_scale = None
-        if labs.exists():
-            first_lab = labs.first()
-            lab_grade_scale = first_lab.grade_scale
-        
-        # If no lab has a grade scale, use the default
-        if not lab_grade_scale:
-            lab_grade_scale = GradeScale.get_default_scale()
-        
-        # Calculate actual grade distribution using the proper grade scale
-        for student in students:
-            try:
-                overall_grade = student.get_overall_grade()
-                letter_grade = lab_grade_scale.get_letter_grade(overall_grade)
-                grade_distribution[letter_grade] = grade_distribution.get(letter_grade, 0) + 1
-            except Exception as e:
-                print(f"Error calculating grade for student {student.id}: {e}")
-                # Default to F grade if calculation fails
-                grade_distribution['F'] = grade_distribution.get('F', 0) + 1
-    except Exception as e:
-        print(f"Error calculating grade distribution: {e}")
-    
-    # Calculate challenge completion by student
-    challenge_completion_by_student = {
-        'not_attempted': 0,  # 0%
-        'low': 0,           # <50%
-        'medium': 0,        # 50-75%
-        'high': 0,          # 75-90%
-        'complete': 0       # >90%
-    }
-    
-    try:
-        # Group students by challenge completion percentage
-        for student in students:
-            try:
-                # Count total completed challenges for this student
-                student_completed = ChallengeScore.objects.filter(score__gt=0, signoff__student=student).count()
-                
-                if student_completed == 0:
-                    challenge_completion_by_student['not_attempted'] += 1
-                else:
-                    # Calculate percentage of all challenges completed
-                    if total_challenges > 0:
-                        completion_pct = (student_completed / total_challenges) * 100
-                        
-                        if completion_pct >= 90:
-                            challenge_completion_by_student['complete'] += 1
-                        elif completion_pct >= 75:
-                            challenge_completion_by_student['high'] += 1
-                        elif completion_pct >= 50:
-                            challenge_completion_by_student['medium'] += 1
-                        else:
-                            challenge_completion_by_student['low'] += 1
-                    else:
-                        challenge_completion_by_student['not_attempted'] += 1
-            except Exception as e:
-                print(f"Error calculating challenge completion for student {student.id}: {e}")
-                challenge_completion_by_student['not_attempted'] += 1
-    except Exception as e:
-        print(f"Error calculating overall challenge completion: {e}")
-    
-    return JsonResponse({
-        'total_signoffs': total_signoffs,
-        'avg_completion': avg_completion,
-        'total_challenges': total_challenges,
-        'completed_challenges': completed_challenges,
-        'challenge_completion': challenge_completion,
-        'exceeds_requirements': er_count,
-        'grade_distribution': grade_distribution,
-        'challenge_completion_by_student': challenge_completion_by_student
-    })
+    """Get quick stats data (cached, see labs.stats)."""
+    return JsonResponse(stats.get_quick_stats())
 
 @login_required
 @ta_required
 def export_lab_csv(request, lab_id):
-    """Export all student data for a lab as CSV with linearized criteria columns."""
+    """Export all student data for a lab as CSV (or XLSX with ?format=xlsx)."""
     lab = get_object_or_404(Lab, pk=lab_id)
-    students = Student.objects.filter(active=True).order_by('name')
-    
-    # Get grade scale info
-    grade_scale = lab.grade_scale if lab.grade_scale else GradeScale.get_default_scale()
-    grade_scale_name = grade_scale.name
-    
-    # Create CSV response
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = f'attachment; filename="{lab.name}_grades.csv"'
-    
-    writer = csv.writer(response)
-    
-    # Write metadata header rows
-    writer.writerow(['Lab', lab.name])
-    writer.writerow(['Description', lab.description])
-    writer.writerow(['Due Date', lab.due_date.strftime('%Y-%m-%d %H:%M')])
-    writer.writerow(['Max Points (Calculated)', str(lab.get_max_score())])
-    writer.writerow(['Total Points (Configured)', str(lab.total_points)])
-    writer.writerow(['Grade Scale', grade_scale_name])
-    
-    # Add detailed grade scale information
-    writer.writerow([])  # Empty row as separator
-    writer.writerow(['Grade Scale Details', grade_scale.name])
-    writer.writerow(['Description', grade_scale.description])
-    writer.writerow(['Grade', 'Threshold (%)'])
-    writer.writerow(['A+', f">= {grade_scale.a_plus_threshold}"])
-    writer.writerow(['A', f">= {grade_scale.a_threshold}"])
-    writer.writerow(['A-', f">= {grade_scale.a_minus_threshold}"])
-    writer.writerow(['B+', f">= {grade_scale.b_plus_threshold}"])
-    writer.writerow(['B', f">= {grade_scale.b_threshold}"])
-    writer.writerow(['B-', f">= {grade_scale.b_minus_threshold}"])
-    writer.writerow(['C+', f">= {grade_scale.c_plus_threshold}"])
-    writer.writerow(['C', f">= {grade_scale.c_threshold}"])
-    writer.writerow(['C-', f">= {grade_scale.c_minus_threshold}"])
-    writer.writerow(['D+', f">= {grade_scale.d_plus_threshold}"])
-    writer.writerow(['D', f">= {grade_scale.d_threshold}"])
-    writer.writerow(['D-', f">= {grade_scale.d_minus_threshold}"])
-    writer.writerow(['F', f"< {grade_scale.d_minus_threshold}"])
-    writer.writerow([])  # Empty row as separator
-    
-    # Get all parts for this lab
-    parts = lab.parts.all().order_by('order')
-    
-    # Collect all unique evaluation criteria from all parts
-    all_criteria = set()
-    for part in parts:
-        # Get quality criteria for each part
-        quality_criteria = part.quality_criteria.all()
-        for criteria in quality_criteria:
-            all_criteria.add(f"{part.name}_Quality_{criteria.name}")
-        
-        # For each part, check if there are any evaluation sheets with rubrics
-        signoffs = Signoff.objects.filter(part=part)
-        for signoff in signoffs:
-            eval_sheets = signoff.evaluation_sheet.all()
-            for sheet in eval_sheets:
-                if hasattr(sheet, 'rubric') and sheet.rubric:
-                    for criterion_key, criterion in sheet.rubric.criteria_data.items():
-                        all_criteria.add(f"{part.name}_Eval_{criterion['name']}")
-    
-    # Create header row
-    header = ['Student ID', 'Student Name', 'Email', 'Batch']
-    
-    # Add each part's status and late submission info
-    for part in parts:
-        header.append(f"{part.name} Status")
-        header.append(f"{part.name} Submission")
-        header.append(f"{part.name} Signoff Date")
-        header.append(f"{part.name} Days Late")
-    
-    # Add each criteria
-    header.extend(sorted(all_criteria))
-    
-    # Add total scores
-    header.extend(['Total Score', 'Percentage', f'Letter Grade ({grade_scale_name})'])
-    
-    writer.writerow(header)
-    
-    # Write data for each student (only active students)
-    for student in students:
-        row = [
-            student.student_id,
-            student.name,
-            student.email,
-            student.batch.strftime('%Y-%m-%d')
-        ]
-        
-        # Add part status and late submission info
-        for part in parts:
-            status = part.get_part_status(student)
-            row.append(status)
-            
-            # Check if submission was late
-            submission_info = "N/A"
-            signoff_date = "N/A"
-            days_late = "N/A"
-            
-            if status != "not_started":
-                try:
-                    signoff = Signoff.objects.get(student=student, part=part)
-                    signoff_date = signoff.date_updated.strftime('%Y-%m-%d %H:%M')
-                    
-                    if part.due_date and signoff.date_updated > part.due_date:
-                        submission_info = "Late"
-                        # Calculate days late
-                        delta = signoff.date_updated - part.due_date
-                        days_late = str(delta.days)
-                        if delta.seconds > 0 and delta.days == 0:
-                            days_late = "<1"  # Less than a day late
-                    else:
-                        submission_info = "On Time" if part.due_date else "No Due Date"
-                        days_late = "0" if part.due_date else "N/A"
-                except Signoff.DoesNotExist:
-                    pass
-            
-            row.append(submission_info)
-            row.append(signoff_date)
-            row.append(days_late)
-        
-        # Add criteria scores
-        criteria_dict = {}
-        for part in parts:
-            # Get the student's signoff for this part
-            try:
-                signoff = Signoff.objects.get(student=student, part=part)
-                
-                # Add quality criteria scores
-                quality_scores = signoff.quality_scores.all()
-                for score in quality_scores:
-                    criteria_key = f"{part.name}_Quality_{score.criteria.name}"
-                    criteria_dict[criteria_key] = f"{score.score}/{score.criteria.max_points}"
-                
-                # Add evaluation rubric scores if available
-                try:
-                    eval_sheet = signoff.evaluation_sheet.first()
-                    if eval_sheet and hasattr(eval_sheet, 'rubric') and eval_sheet.rubric:
-                        for criterion_key, criterion in eval_sheet.rubric.criteria_data.items():
-                            criteria_name = criterion['name']
-                            key = f"{part.name}_Eval_{criteria_name}"
-                            earned = eval_sheet.get_criterion_earned_marks(criterion_key)
-                            max_marks = Decimal(str(criterion['max_marks']))
-                            criteria_dict[key] = f"{earned}/{max_marks}"
-                except:
-                    pass
-            except Signoff.DoesNotExist:
-                pass
-        
-        # Add criteria data in the correct order
-        for criteria_key in sorted(all_criteria):
-            row.append(criteria_dict.get(criteria_key, "N/A"))
-        
-        # Add total scores
-        max_score = lab.get_max_score()
-        student_score = lab.get_student_score(student)
-        row.append(f"{student_score}/{max_score}")
-        row.append(f"{lab.get_student_percentage(student):.2f}%")
-        row.append(lab.get_grade_letter(student))
-        
-        writer.writerow(row)
-    
-    # Add a separator row
-    writer.writerow([])
-    
-    # Add grade scale information
-    writer.writerow(['Grade Scale Information'])
-    
-    grade_scale = lab.grade_scale if lab.grade_scale else GradeScale.get_default_scale()
-    writer.writerow(['Scale Name', grade_scale.name])
-    writer.writerow(['Description', grade_scale.description])
-    writer.writerow([])
-    
-    # Add grading thresholds
-    writer.writerow(['Grade', 'Threshold (%)'])
-    writer.writerow(['A+', f">= {grade_scale.a_plus_threshold}"])
-    writer.writerow(['A', f">= {grade_scale.a_threshold}"])
-    writer.writerow(['A-', f">= {grade_scale.a_minus_threshold}"])
-    writer.writerow(['B+', f">= {grade_scale.b_plus_threshold}"])
-    writer.writerow(['B', f">= {grade_scale.b_threshold}"])
-    writer.writerow(['B-', f">= {grade_scale.b_minus_threshold}"])
-    writer.writerow(['C+', f">= {grade_scale.c_plus_threshold}"])
-    writer.writerow(['C', f">= {grade_scale.c_threshold}"])
-    writer.writerow(['C-', f">= {grade_scale.c_minus_threshold}"])
-    writer.writerow(['D+', f">= {grade_scale.d_plus_threshold}"])
-    writer.writerow(['D', f">= {grade_scale.d_threshold}"])
-    writer.writerow(['D-', f">= {grade_scale.d_minus_threshold}"])
-    writer.writerow(['F', f"< {grade_scale.d_minus_threshold}"])
-    
-    return response
+    if request.GET.get('format') == 'xlsx':
+        return xlsx_exports.xlsx_response(xlsx_exports.lab_workbook(lab.id), f"{lab.name}_grades.xlsx")
+    return exports.stream_csv(exports.lab_rows(lab.id), f"{lab.name}_grades.csv")
 
 
 @login_required
 @ta_required
 def export_part_csv(request, part_id):
-    """Export all student data for a specific part as CSV with linearized criteria columns."""
+    """Export all student data for a specific part as CSV (or XLSX with ?format=xlsx)."""
     part = get_object_or_404(Part, pk=part_id)
-    # Only get active students
-    students = Student.objects.filter(active=True).order_by('name')
-    
-    # Create CSV response
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = f'attachment; filename="{part.name}_grades.csv"'
-    
-    writer = csv.writer(response)
-    
-    # Write part metadata
-    writer.writerow(['Part', part.name])
-    writer.writerow(['Lab', part.lab.name])
-    writer.writerow(['Description', part.description])
-    if part.due_date:
-        writer.writerow(['Due Date', part.due_date.strftime('%Y-%m-%d %H:%M')])
-    else:
-        writer.writerow(['Due Date', 'Not set'])
-    writer.writerow([])  # Empty row as separator
-    
-    # Get quality criteria for this part
-    quality_criteria = part.quality_criteria.all()
-    
-    # Collect evaluation criteria from rubrics
-    rubric_criteria = set()
-    signoffs = Signoff.objects.filter(part=part)
-    for signoff in signoffs:
-        eval_sheets = signoff.evaluation_sheet.all()
-        for sheet in eval_sheets:
-            if hasattr(sheet, 'rubric') and sheet.rubric:
-                for criterion_key, criterion in sheet.rubric.criteria_data.items():
-                    rubric_criteria.add(criterion['name'])
-    
-    # Create header row
-    header = ['Student ID', 'Student Name', 'Email', 'Batch', 'Status', 'Submission', 'Signoff Date', 'Days Late']
-    
-    # Add quality criteria columns
-    for criteria in quality_criteria:
-        header.append(f"Quality: {criteria.name}")
-    
-    # Add rubric criteria columns
-    for criteria_name in sorted(rubric_criteria):
-        header.append(f"Rubric: {criteria_name}")
-    
-    # Add total scores
-    header.extend(['Quality Total', 'Evaluation Total', 'Combined Total', 'Percentage'])
-    
-    writer.writerow(header)
-    
-    # Write data for each student
-    for student in students:
-        status = part.get_part_status(student)
-        
-        # Check if submission was late
-        submission_info = "N/A"
-        signoff_date = "N/A"
-        days_late = "N/A"
-        
-        if status != "not_started":
-            try:
-                signoff = Signoff.objects.get(student=student, part=part)
-                signoff_date = signoff.date_updated.strftime('%Y-%m-%d %H:%M')
-                
-                if part.due_date and signoff.date_updated > part.due_date:
-                    submission_info = "Late"
-                    # Calculate days late
-                    delta = signoff.date_updated - part.due_date
-                    days_late = str(delta.days)
-                    if delta.seconds > 0 and delta.days == 0:
-                        days_late = "<1"  # Less than a day late
-                else:
-                    submission_info = "On Time" if part.due_date else "No Due Date"
-                    days_late = "0" if part.due_date else "N/A"
-            except Signoff.DoesNotExist:
-                pass
-        
-        row = [
-            student.student_id,
-            student.name,
-            student.email,
-            student.batch.strftime('%Y-%m-%d'),
-            status,
-            submission_info,
-            signoff_date,
-            days_late
-        ]
-        
-        # Initialize scores dictionaries
-        quality_scores_dict = {}
-        rubric_scores_dict = {}
-        
-        # Get the student's signoff for this part
-        try:
-            signoff = Signoff.objects.get(student=student, part=part)
-            
-            # Add quality criteria scores
-            quality_scores = signoff.quality_scores.all()
-            for score in quality_scores:
-                quality_scores_dict[score.criteria.name] = f"{score.score}/{score.criteria.max_points}"
-            
-            # Add evaluation rubric scores if available
-            try:
-                eval_sheet = signoff.evaluation_sheet.first()
-                if eval_sheet and hasattr(eval_sheet, 'rubric') and eval_sheet.rubric:
-                    for criterion_key, criterion in eval_sheet.rubric.criteria_data.items():
-                        criteria_name = criterion['name']
-                        earned = eval_sheet.get_criterion_earned_marks(criterion_key)
-                        max_marks = Decimal(str(criterion['max_marks']))
-                        rubric_scores_dict[criteria_name] = f"{earned}/{max_marks}"
-            except:
-                pass
-                
-            # Add quality criteria data in the correct order
-            for criteria in quality_criteria:
-                row.append(quality_scores_dict.get(criteria.name, "N/A"))
-            
-            # Add rubric criteria data in the correct order
-            for criteria_name in sorted(rubric_criteria):
-                row.append(rubric_scores_dict.get(criteria_name, "N/A"))
-            
-            # Calculate total scores
-            max_score = part.get_max_score()
-            student_score = part.get_student_score(student)
-            
-            # Calculate quality criteria total
-            quality_total = Decimal('0')
-            quality_max = Decimal('0')
-            for criteria in quality_criteria:
-                try:
-                    score = QualityScore.objects.get(signoff=signoff, criteria=criteria)
-                    quality_total += Decimal(str(score.score))
-                except QualityScore.DoesNotExist:
-                    pass
-                quality_max += Decimal(str(criteria.max_points))
-            
-            # Calculate evaluation total
-            eval_total = Decimal('0')
-            eval_max = Decimal('0')
-            try:
-                eval_sheet = signoff.evaluation_sheet.first()
-                if eval_sheet and hasattr(eval_sheet, 'rubric') and eval_sheet.rubric:
-                    eval_total = eval_sheet.get_earned_marks()
-                    for _, criterion in eval_sheet.rubric.criteria_data.items():
-                        eval_max += Decimal(str(criterion['max_marks']))
-            except:
-                pass
-                
-            # Add totals to row
-            row.append(f"{quality_total}/{quality_max}")
-            row.append(f"{eval_total}/{eval_max}")
-            row.append(f"{student_score}/{max_score}")
-            row.append(f"{part.get_student_percentage(student):.2f}%")
-            
-        except Signoff.DoesNotExist:
-            # If no signoff exists, add N/A for all criteria
-            for _ in range(len(quality_criteria) + len(rubric_criteria) + 4):  # +4 for the four total columns
-                row.append("N/A")
-        
-        writer.writerow(row)
-    
-    return response
+    if request.GET.get('format') == 'xlsx':
+        return xlsx_exports.xlsx_response(xlsx_exports.part_workbook(part.id), f"{part.name}_grades.xlsx")
+    return exports.stream_csv(exports.part_rows(part.id), f"{part.name}_grades.csv")
 
 
 @login_required
 @ta_required
 def export_student_grade_csv(request, student_id=None):
-    """Export comprehensive student grade data as CSV with linearized columns."""
+    """Export comprehensive student grade data as CSV (or XLSX with ?format=xlsx)."""
     # Get all active students
     students = Student.objects.filter(active=True).order_by('name')
     
     # Filter to specific student if provided
     if student_id:
         students = students.filter(pk=student_id)
+    students = list(students)
     
-    # Get all labs
-    labs = Lab.objects.all().order_by('name')
+    filename = "student_grades"
+    if student_id and students:
+        student = students[0]
+        filename = f"{student.name}_{student.student_id}_grades"
     
-    # Create CSV response
-    response = HttpResponse(content_type='text/csv')
-    filename = "student_grades.csv"
-    if student_id and students.exists():
-        student = students.first()
-        filename = f"{student.name}_{student.student_id}_grades.csv"
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-    
-    writer = csv.writer(response)
-    
-    # Write metadata header
-    writer.writerow(['Student Grade Report'])
-    writer.writerow(['Generated on', timezone.now().strftime('%Y-%m-%d %H:%M')])
-    writer.writerow(['Total Students', str(students.count())])
-    writer.writerow(['Total Labs', str(labs.count())])
-    
-    # Get appropriate grade scale
-    # Use the first lab's grade scale if available
-    grade_scale = None
-    if labs.exists():
-        for lab in labs:
-            if lab.grade_scale:
-                grade_scale = lab.grade_scale
-                break
-    
-    # If no lab has a grade scale, use the default
-    if not grade_scale:
-        grade_scale = GradeScale.get_default_scale()
-    
-    # Add grading scale information
-    writer.writerow([])  # Empty row as separator
-    writer.writerow(['Grading Scale Information'])
-    writer.writerow(['Scale Name', grade_scale.name])
-    writer.writerow(['Scale Description', grade_scale.description])
-    writer.writerow(['Grade', 'Threshold (%)'])
-    writer.writerow(['A+', f">= {grade_scale.a_plus_threshold}"])
-    writer.writerow(['A', f">= {grade_scale.a_threshold}"])
-    writer.writerow(['A-', f">= {grade_scale.a_minus_threshold}"])
-    writer.writerow(['B+', f">= {grade_scale.b_plus_threshold}"])
-    writer.writerow(['B', f">= {grade_scale.b_threshold}"])
-    writer.writerow(['B-', f">= {grade_scale.b_minus_threshold}"])
-    writer.writerow(['C+', f">= {grade_scale.c_plus_threshold}"])
-    writer.writerow(['C', f">= {grade_scale.c_threshold}"])
-    writer.writerow(['C-', f">= {grade_scale.c_minus_threshold}"])
-    writer.writerow(['D+', f">= {grade_scale.d_plus_threshold}"])
-    writer.writerow(['D', f">= {grade_scale.d_threshold}"])
-    writer.writerow(['D-', f">= {grade_scale.d_minus_threshold}"])
-    writer.writerow(['F', f"< {grade_scale.d_minus_threshold}"])
-    writer.writerow([])  # Empty row as separator
-    
-    # Build a comprehensive list of all criteria across all parts
-    all_quality_criteria = []
-    all_rubric_criteria = set()
-    all_challenges = []
-    
-    # Organize labs and parts data
-    lab_parts = {}
-    
-    for lab in labs:
-        parts = lab.parts.all().order_by('order')
-        lab_parts[lab.id] = parts
-        
-        for part in parts:
-            # Get quality criteria
-            quality_criteria = part.quality_criteria.all()
-            for criteria in quality_criteria:
-                all_quality_criteria.append((lab.name, part.name, criteria.name, criteria.id))
-            
-            # Get challenges if the part has them
-            if part.has_challenges:
-                challenges = part.challenges.all()
-                for challenge in challenges:
-                    all_challenges.append((lab.name, part.name, challenge.name, challenge.id))
-            
-            # Get rubric criteria
-            signoffs = Signoff.objects.filter(part=part)
-            for signoff in signoffs:
-                eval_sheets = signoff.evaluation_sheet.all()
-                for sheet in eval_sheets:
-                    if hasattr(sheet, 'rubric') and sheet.rubric:
-                        for criterion_key, criterion in sheet.rubric.criteria_data.items():
-                            all_rubric_criteria.add((lab.name, part.name, criterion['name'], criterion_key))
-    
-    # Sort criteria lists
-    all_quality_criteria.sort()
-    all_rubric_criteria = sorted(all_rubric_criteria)
-    all_challenges.sort()
-    
-    # Create header row
-    header = ['Student ID', 'Student Name', 'Email', 'Batch']
-    
-    # Add lab and part status columns
-    for lab in labs:
-        parts = lab_parts[lab.id]
-        # Get the lab's rubric info rather than hardcoded "grades range"
-        grade_scale = lab.grade_scale if lab.grade_scale else GradeScale.get_default_scale()
-        grade_scale_name = grade_scale.name
-        header.append(f"{lab.name} - Grade ({grade_scale_name})")
-        header.append(f"{lab.name} - Percentage")
-        
-        for part in parts:
-            header.append(f"{lab.name} - {part.name} - Status")
-            header.append(f"{lab.name} - {part.name} - Submission")
-            header.append(f"{lab.name} - {part.name} - Signoff Date")
-            header.append(f"{lab.name} - {part.name} - Days Late")
-    
-    # Add quality criteria columns
-    for lab_name, part_name, criteria_name, _ in all_quality_criteria:
-        header.append(f"{lab_name} - {part_name} - Quality: {criteria_name}")
-    
-    # Add challenge columns
-    for lab_name, part_name, challenge_name, _ in all_challenges:
-        header.append(f"{lab_name} - {part_name} - Challenge: {challenge_name}")
-    
-    # Add rubric criteria columns
-    for lab_name, part_name, criteria_name, _ in all_rubric_criteria:
-        header.append(f"{lab_name} - {part_name} - Rubric: {criteria_name}")
-    
-    # Add overall score
-    header.append('Overall Score')
-    header.append('Overall Percentage')
-    header.append(f'Overall Grade (with scale)')
-    
-    writer.writerow(header)
-    
-    # Write data for each student
-    for student in students:
-        row = [
-            student.student_id,
-            student.name,
-            student.email,
-            student.batch.strftime('%Y-%m-%d')
-        ]
-        
-        # Calculate student's overall points
-        earned_points = Decimal('0')
-        total_points = Decimal('0')        
-        for lab in labs:
-            earned_points += lab.get_student_score(student)
-            total_points += lab.get_max_score()
-        
-        # Collect all scores in dictionaries
-        lab_data = {}
-        part_status = {}
-        quality_scores = {}
-        challenge_scores = {}
-        rubric_scores = {}
-        
-        # Process each lab and its parts
-        for lab in labs:
-            parts = lab_parts[lab.id]
-            
-            # Add lab grade data
-            lab_data[lab.id] = {
-                'grade': lab.get_grade_letter(student),
-                'percentage': lab.get_student_percentage(student)
-            }
-            
-            # Process each part
-            for part in parts:
-                status = part.get_part_status(student)
-                part_status[(lab.id, part.id)] = status
-                
-                # If part has been started, collect score data
-                if status != 'not_started':
-                    try:
-                        signoff = Signoff.objects.get(student=student, part=part)
-                        
-                        # Collect quality scores
-                        quality_criteria = part.quality_criteria.all()
-                        for criteria in quality_criteria:
-                            try:
-                                score = QualityScore.objects.get(signoff=signoff, criteria=criteria)
-                                quality_scores[(lab.id, part.id, criteria.id)] = {
-                                    'score': score.score,
-                                    'max_points': criteria.max_points
-                                }
-                            except QualityScore.DoesNotExist:
-                                pass
-                        
-                        # Collect challenge scores if applicable
-                        if part.has_challenges:
-                            challenges = part.challenges.all()
-                            for challenge in challenges:
-                                try:
-                                    score = ChallengeScore.objects.get(signoff=signoff, challenge=challenge)
-                                    challenge_scores[(lab.id, part.id, challenge.id)] = {
-                                        'score': score.score,
-                                        'max_points': challenge.max_points
-                                    }
-                                except ChallengeScore.DoesNotExist:
-                                    pass
-                        
-                        # Collect rubric scores
-                        try:
-                            eval_sheet = signoff.evaluation_sheet.first()
-                            if eval_sheet and hasattr(eval_sheet, 'rubric') and eval_sheet.rubric:
-                                for criterion_key, criterion in eval_sheet.rubric.criteria_data.items():
-                                    status = eval_sheet.evaluations.get(criterion_key, 'ND')
-                                    earned = eval_sheet.get_criterion_earned_marks(criterion_key)
-                                    max_marks = Decimal(str(criterion['max_marks']))
-                                    
-                                    rubric_scores[(lab.id, part.id, criterion_key)] = {
-                                        'earned': earned,
-                                        'max_marks': max_marks,
-                                        'status': status
-                                    }
-                        except:
-                            pass
-                            
-                    except Signoff.DoesNotExist:
-                        pass
-        
-        # Add lab grades and part status to row
-        for lab in labs:
-            parts = lab_parts[lab.id]
-            
-            # Add lab grade
-            lab_grade_data = lab_data.get(lab.id, {'grade': 'F', 'percentage': 0})
-            row.append(lab_grade_data['grade'])
-            row.append(f"{lab_grade_data['percentage']:.2f}%")
-            
-            # Add part status and submission info
-            for part in parts:
-                status = part_status.get((lab.id, part.id), 'not_started')
-                row.append(status)
-                
-                # Add submission info, signoff date, and days late
-                submission_info = "N/A"
-                signoff_date = "N/A"
-                days_late = "N/A"
-                
-                if status != "not_started":
-                    try:
-                        signoff = Signoff.objects.get(student=student, part=part)
-                        signoff_date = signoff.date_updated.strftime('%Y-%m-%d %H:%M')
-                        
-                        if part.due_date and signoff.date_updated > part.due_date:
-                            submission_info = "Late"
-                            # Calculate days late
-                            delta = signoff.date_updated - part.due_date
-                            days_late = str(delta.days)
-                            if delta.seconds > 0 and delta.days == 0:
-                                days_late = "<1"  # Less than a day late
-                        else:
-                            submission_info = "On Time" if part.due_date else "No Due Date"
-                            days_late = "0" if part.due_date else "N/A"
-                    except Signoff.DoesNotExist:
-                        pass
-                
-                row.append(submission_info)
-                row.append(signoff_date)
-                row.append(days_late)
-        
-        # Add quality criteria scores
-        for lab_name, part_name, criteria_name, criteria_id in all_quality_criteria:
-            # Find the lab and part IDs
-            lab_id = next((lab.id for lab in labs if lab.name == lab_name), None)
-            if lab_id:
-                parts = lab_parts[lab_id]
-                part_id = next((part.id for part in parts if part.name == part_name), None)
-                
-                if part_id:
-                    score_data = quality_scores.get((lab_id, part_id, criteria_id), None)
-                    if score_data:
-                        row.append(f"{score_data['score']}/{score_data['max_points']}")
-                    else:
-                        row.append("N/A")
-                else:
-                    row.append("N/A")
-            else:
-                row.append("N/A")
-        
-        # Add challenge scores
-        for lab_name, part_name, challenge_name, challenge_id in all_challenges:
-            # Find the lab and part IDs
-            lab_id = next((lab.id for lab in labs if lab.name == lab_name), None)
-            if lab_id:
-                parts = lab_parts[lab_id]
-                part_id = next((part.id for part in parts if part.name == part_name), None)
-                
-                if part_id:
-                    score_data = challenge_scores.get((lab_id, part_id, challenge_id), None)
-                    if score_data:
-                        row.append(f"{score_data['score']}/{score_data['max_points']}")
-                    else:
-                        row.append("N/A")
-                else:
-                    row.append("N/A")
-            else:
-                row.append("N/A")
-        
-        # Add rubric criteria scores
-        for lab_name, part_name, criteria_name, criterion_key in all_rubric_criteria:
-            # Find the lab and part IDs
-            lab_id = next((lab.id for lab in labs if lab.name == lab_name), None)
-            if lab_id:
-                parts = lab_parts[lab_id]
-                part_id = next((part.id for part in parts if part.name == part_name), None)
-                
-                if part_id:
-                    score_data = rubric_scores.get((lab_id, part_id, criterion_key), None)
-                    if score_data:
-                        row.append(f"{score_data['earned']}/{score_data['max_marks']} ({dict(EvaluationSheet.STATUS_CHOICES).get(score_data['status'], 'ND')})")
-                    else:
-                        row.append("N/A")
-                else:
-                    row.append("N/A")
-            else:
-                row.append("N/A")
-        
-        # Add overall scores calculated from student model
-        overall_grade = student.get_overall_grade()
-        letter_grade = student.get_course_letter_grade()  # This now uses the lab's grade scale
-        
-        # Note in the CSV which grade scale was used
-        row.append(f"{earned_points}/{total_points}")  # Raw points
-        row.append(f"{overall_grade:.2f}%")  # Percentage 
-        row.append(f"{letter_grade} (Using {grade_scale.name})")  # Letter grade with scale info
-        
-        writer.writerow(row)
-    
-    return response
+    if request.GET.get('format') == 'xlsx':
+        return xlsx_exports.xlsx_response(xlsx_exports.student_grade_workbook(students), f"{filename}.xlsx")
+    return exports.stream_csv(exports.student_grade_rows(students), f"{filename}.csv")
 
 @login_required
 @ta_required
 def export_all_data_csv(request):
-    """Export all student data for all labs and all parts as a comprehensive CSV report."""
-    # Only get active students
-    students = Student.objects.filter(active=True).order_by("name")
-    
-    # Get all labs and parts
-    labs = Lab.objects.all().order_by("name")
-    
-    # Create CSV response
-    response = HttpResponse(content_type="text/csv")
-    response["Content-Disposition"] = f"attachment; filename=\"complete_lab_report.csv\""
-    
-    writer = csv.writer(response)
-    
-    # Write metadata header rows
-    writer.writerow(["Complete Lab Report"])
-    writer.writerow(["Generated on", timezone.now().strftime("%Y-%m-%d %H:%M")])
-    writer.writerow(["Total Students", str(students.count())])
-    writer.writerow(["Total Labs", str(labs.count())])
-    writer.writerow([])  # Empty row as separator
-    
-    # Build a comprehensive list of parts and rubrics
-    all_parts = []
-    for lab in labs:
-        parts = lab.parts.all().order_by("order")
-        for part in parts:
-            all_parts.append((lab.id, lab.name, part.id, part.name, part.due_date))
-    
-    # Get appropriate grade scale
-    # Use the first lab's grade scale if available
-    grade_scale = None
-    if labs.exists():
-        for lab in labs:
-            if lab.grade_scale:
-                grade_scale = lab.grade_scale
-                break
-    
-    # If no lab has a grade scale, use the default
-    if not grade_scale:
-        grade_scale = GradeScale.get_default_scale()
-    
-    # Create header row
-    header = ["Student ID", "Student Name", "Email", "Batch", "Status"]
-    
-    # Add overall grade columns
-    header.append(f"Overall Grade (out of 100%)")
-    header.append(f"Letter Grade ({grade_scale.name})")
+    """Export all student data for all labs and all parts as a comprehensive CSV (or XLSX) report."""
+    if request.GET.get('format') == 'xlsx':
+        return xlsx_exports.xlsx_response(xlsx_exports.all_data_workbook(), "complete_lab_report.xlsx")
+    return exports.stream_csv(exports.all_data_rows(), "complete_lab_report.csv")
+
+@login_required
+@ta_required
+def export_gradebook_parquet(request):
+    """Export a long-format, typed gradebook snapshot (student x part x criterion) as Parquet."""
+    output = tempfile.TemporaryFile()
+    snapshots.write_snapshot(output)
+    output.seek(0)
+    return FileResponse(output, as_attachment=True, filename="gradebook_snapshot.parquet",
+                        content_type='application/vnd.apache.parquet')
+
+def _export_job_data(job, cached=False):
+    data = {
+        'id': job.id,
+        'kind': job.kind,
+        'status': job.status,
+        'progress': job.progress,
+        'row_count': job.row_count,
+        'error': job.error,
+        'cached': cached,
+        'created_at': job.created_at.isoformat(),
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+        'status_url': reverse('labs:export_job_status', args=[job.id]),
+        'download_url': None,
+    }
+    if job.status == 'done':
+        data['download_url'] = reverse('labs:export_job_download', args=[job.id])
+    return data
+
+@login_required
+@ta_required
+def export_job_create(request):
+    """Queue a whole-course export, or return the finished one if the data hasn't changed."""
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Invalid request method'}, status=400)
     
-    # Add lab grade columns
-    for lab in labs:
-        # Get this lab"s grade scale
-        lab_grade_scale = lab.grade_scale.name if lab.grade_scale else grade_scale.name
-        header.append(f"{lab.name} - Grade (%)") 
-        header.append(f"{lab.name} - Letter ({lab_grade_scale})")
-    
-    # Add part status columns
-    for lab_id, lab_name, part_id, part_name, due_date in all_parts:
-        header.append(f"{lab_name} - {part_name} - Status")
-        header.append(f"{lab_name} - {part_name} - Submission")
-        header.append(f"{lab_name} - {part_name} - Signoff Date")
-        header.append(f"{lab_name} - {part_name} - Days Late")
-        header.append(f"{lab_name} - {part_name} - Quality Score")
-        header.append(f"{lab_name} - {part_name} - Evaluation Score")
-        header.append(f"{lab_name} - {part_name} - Total Score")
-    
-    writer.writerow(header)
-    
-    # Write data for each student
-    for student in students:
-        row = [
-            student.student_id,
-            student.name,
-            student.email,
-            student.batch.strftime("%Y-%m-%d"),
-            "Active" if student.active else "Inactive"
-        ]
-        
-        # Add overall grade
-        overall_grade = student.get_overall_grade()
-        row.append(f"{overall_grade:.2f}%")
-        row.append(student.get_course_letter_grade())
-        
-        # Add lab grades
-        for lab in labs:
-            percentage = lab.get_student_percentage(student)
-            letter = lab.get_grade_letter(student)
-            row.append(f"{percentage:.2f}%")
-            row.append(letter)
-        
-        # Add part statuses and scores
-        for lab_id, lab_name, part_id, part_name, due_date in all_parts:
-            part = Part.objects.get(pk=part_id)
-            status = part.get_part_status(student)
-            score = "-"
-            
-            # Check if submission was late
-            submission_info = "N/A"
-            signoff_date = "N/A"
-            days_late = "N/A"
-            
-            if status != "not_started":
-                try:
-                    signoff = Signoff.objects.get(student=student, part=part)
-                    signoff_date = signoff.date_updated.strftime("%Y-%m-%d %H:%M")
-                    
-                    if due_date and signoff.date_updated > due_date:
-                        submission_info = "Late"
-                        # Calculate days late
-                        delta = signoff.date_updated - due_date
-                        days_late = str(delta.days)
-                        if delta.seconds > 0 and delta.days == 0:
-                            days_late = "<1"  # Less than a day late
-                    else:
-                        submission_info = "On Time" if due_date else "No Due Date"
-                        days_late = "0" if due_date else "N/A"
-                        
-                    # Calculate quality criteria total
-                    quality_total = Decimal('0')
-                    quality_max = Decimal('0')
-                    for criteria in part.quality_criteria.all():
-                        quality_max += Decimal(str(criteria.max_points))
-                        try:
-                            score = QualityScore.objects.get(signoff=signoff, criteria=criteria)
-                            quality_total += Decimal(str(score.score))
-                        except QualityScore.DoesNotExist:
-                            pass
-                            
-                    # Calculate evaluation total
-                    eval_total = Decimal('0')
-                    eval_max = Decimal('0')
-                    try:
-                        eval_sheet = signoff.evaluation_sheet.first()
-                        if eval_sheet and hasattr(eval_sheet, 'rubric') and eval_sheet.rubric:
-                            eval_total = eval_sheet.get_earned_marks()
-                            for _, criterion in eval_sheet.rubric.criteria_data.items():
-                                eval_max += Decimal(str(criterion['max_marks']))
-                    except:
-                        pass
-                    
-                    quality_score = f"{quality_total}/{quality_max}"
-                    eval_score = f"{eval_total}/{eval_max}"
-                    
-                    if status == "approved":
-                        score = f"{part.get_student_score(student)} / {part.get_max_score()}"
-                    else:
-                        score = "-"
-                except Signoff.DoesNotExist:
-                    quality_score = "N/A"
-                    eval_score = "N/A"
-                    score = "Error: Approved but no signoff" if status == "approved" else "-"
-            else:
-                quality_score = "N/A"
-                eval_score = "N/A"
-            
-            row.append(status)
-            row.append(submission_info)
-            row.append(signoff_date)
-            row.append(days_late)
-            row.append(quality_score)
-            row.append(eval_score)
-            row.append(score)
-        
-        writer.writerow(row)
-    
-    # Add a separator row
-    writer.writerow([])
-    
-    # Add grading scale information
-    writer.writerow(["Grading Scale Information"])
-    writer.writerow(["Scale Name", grade_scale.name])
-    writer.writerow(["Description", grade_scale.description])
-    writer.writerow(["Grade", "Threshold (%)"])
-    writer.writerow(["A+", f">= {grade_scale.a_plus_threshold}"])
-    writer.writerow(["A", f">= {grade_scale.a_threshold}"])
-    writer.writerow(["A-", f">= {grade_scale.a_minus_threshold}"])
-    writer.writerow(["B+", f">= {grade_scale.b_plus_threshold}"])
-    writer.writerow(["B", f">= {grade_scale.b_threshold}"])
-    writer.writerow(["B-", f">= {grade_scale.b_minus_threshold}"])
-    writer.writerow(["C+", f">= {grade_scale.c_plus_threshold}"])
-    writer.writerow(["C", f">= {grade_scale.c_threshold}"])
-    writer.writerow(["C-", f">= {grade_scale.c_minus_threshold}"])
-    writer.writerow(["D+", f">= {grade_scale.d_plus_threshold}"])
-    writer.writerow(["D", f">= {grade_scale.d_threshold}"])
-    writer.writerow(["D-", f">= {grade_scale.d_minus_threshold}"])
-    writer.writerow(["F", f"< {grade_scale.d_minus_threshold}"])
+    kind = request.POST.get('kind')
+    if not kind and request.body:
+        try:
+            kind = json.loads(request.body).get('kind')
+        except (ValueError, AttributeError):
+            kind = None
+    if kind not in dict(ExportJob.KIND_CHOICES):
+        return JsonResponse({'success': False, 'error': 'Unknown export kind'}, status=400)
+    if roles.request_role(request) not in jobs.EXPORT_ROLES[kind]:
+        raise PermissionDenied("You are not allowed to run this export.")
+    
+    job, cached = jobs.enqueue_export(kind, request.user)
+    return JsonResponse({'success': True, 'job': _export_job_data(job, cached)},
+                        status=200 if cached else 202)
+
+def _get_export_job(request, job_id):
+    """
+    An export job the user may see.  Course-wide exports are shared between
+    everyone with the role the synchronous export of that kind requires.
+    """
+    job = get_object_or_404(ExportJob, pk=job_id)
+    if roles.request_role(request) not in jobs.EXPORT_ROLES[job.kind]:
+        raise PermissionDenied("You are not allowed to access this export.")
+    return job
+
+@login_required
+@ta_required
+def export_job_status(request, job_id):
+    """Poll the progress of an export job."""
+    job = _get_export_job(request, job_id)
+    return JsonResponse({'success': True, 'job': _export_job_data(job)})
+
+@login_required
+@ta_required
+def export_job_download(request, job_id):
+    """Download the file of a finished export job."""
+    job = _get_export_job(request, job_id)
+    if job.status != 'done' or not job.artifact_path or not os.path.exists(job.artifact_path):
+        return JsonResponse({'success': False, 'error': 'Export is not ready'}, status=409)
+    
+    return FileResponse(open(job.artifact_path, 'rb'), as_attachment=True,
+                        filename=jobs.EXPORT_FILENAMES[job.kind], content_type='text/csv')
+
+@login_required
+@instructor_required
+def request_metrics(request):
+    """Per-view request metrics of this worker process; POST clears them."""
+    if request.method == 'POST':
+        metrics.reset()
     
-    return response
+    return JsonResponse({
+        'success': True,
+        'since': datetime.datetime.fromtimestamp(metrics.started_at(), tz=datetime.timezone.utc).isoformat(),
+        'query_budget': getattr(settings, 'QUERY_BUDGET', 0),
+        'views': metrics.snapshot(),
+    })
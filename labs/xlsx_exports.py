@@ -0,0 +1,291 @@
+"""
+XLSX gradebook exports.
+
+The workbooks hold the same data as the CSV exports in ``labs.exports``, with
+typed cells: scores and percentages are numbers, dates are dates.  Every
+workbook has a Summary sheet (one row per student with lab and course
+totals), one sheet per lab (part status, criterion scores and part totals)
+and a Grade Scale sheet.
+
+The workbook is built in openpyxl's write-only mode, which streams each
+sheet's rows to a temporary file, and students are loaded in chunks through
+the same ``Gradebook`` as the CSV path, so memory stays bounded however large
+the cohort is.
+"""
+import re
+import tempfile
+
+from django.http import FileResponse
+from django.utils import timezone
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+
+from .exports import active_students, grade_scale_rows, student_chunks
+from .gradebook import Gradebook, criterion_earned_marks
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+PERCENT_FORMAT = '0.00'
+
+_INVALID_TITLE_CHARS = re.compile(r'[\[\]\*\?/\\:]')
+
+
+def sheet_title(name, used):
+    """A valid, unique sheet title (at most 31 characters) for ``name``."""
+    base = _INVALID_TITLE_CHARS.sub('-', name).strip("' ")[:31] or 'Sheet'
+    title = base
+    counter = 2
+    while title.lower() in used:
+        suffix = f' ({counter})'
+        title = base[:31 - len(suffix)] + suffix
+        counter += 1
+    used.add(title.lower())
+    return title
+
+
+def local_datetime(value):
+    """Excel has no time zones: convert to naive local time."""
+    if value is None:
+        return None
+    return timezone.localtime(value).replace(tzinfo=None)
+
+
+def days_late(signoff, due_date):
+    """Days between the due date and the signoff (0 when on time), or None."""
+    if not signoff or not due_date:
+        return None
+    if signoff.date_updated <= due_date:
+        return 0
+    return round((signoff.date_updated - due_date).total_seconds() / 86400, 2)
+
+
+class SheetWriter:
+    """Appends rows to a write-only sheet with bold headers and number formats."""
+
+    def __init__(self, workbook, title):
+        self.sheet = workbook.create_sheet(title)
+
+    def header(self, row):
+        cells = []
+        for value in row:
+            cell = WriteOnlyCell(self.sheet, value=value)
+            cell.font = Font(bold=True)
+            cells.append(cell)
+        self.sheet.append(cells)
+
+    def row(self, values, formats=None):
+        """Append a row; ``formats`` maps column index to a number format."""
+        if not formats:
+            self.sheet.append(values)
+            return
+        cells = []
+        for index, value in enumerate(values):
+            cell = WriteOnlyCell(self.sheet, value=value)
+            if index in formats and value is not None:
+                cell.number_format = formats[index]
+            cells.append(cell)
+        self.sheet.append(cells)
+
+
+# Summary sheet
+
+def summary_columns(labs, course):
+    header = ['Student ID', 'Student Name', 'Email', 'Batch', 'Active']
+    for lab in labs:
+        header.extend([f"{lab.name} - Score", f"{lab.name} - Max", f"{lab.name} - Percentage",
+                       f"{lab.name} - Letter Grade"])
+    if course:
+        header.extend(['Total Score', 'Total Max', 'Overall Percentage', 'Letter Grade', 'Completion (%)'])
+    return header
+
+
+def summary_row(gradebook, student, labs, course):
+    row = [student.student_id, student.name, student.email, student.batch, student.active]
+    percent_columns = []
+    for lab in labs:
+        percentage = gradebook.lab_student_percentage(lab, student)
+        percent_columns.append(len(row) + 2)
+        row.extend([
+            gradebook.lab_student_score(lab, student),
+            gradebook.lab_max_score(lab),
+            round(float(percentage), 2),
+            gradebook.lab_grade_letter(lab, student),
+        ])
+    if course:
+        earned, total = gradebook.student_points(student)
+        percent_columns.append(len(row) + 2)
+        row.extend([
+            earned,
+            total,
+            round(float(gradebook.overall_grade(student)), 2),
+            gradebook.course_letter_grade(student),
+            round(float(gradebook.completion_status(student)), 2),
+        ])
+    return row, {index: PERCENT_FORMAT for index in percent_columns}
+
+
+# Lab sheets
+
+def part_rubric_criteria(gradebook, part):
+    """Sorted names of the rubric criteria used by a part's evaluation sheets."""
+    names = set()
+    for rubric in gradebook.part_rubrics(part):
+        for criterion in rubric.criteria_data.values():
+            names.add(criterion['name'])
+    return sorted(names)
+
+
+def lab_sheet_columns(gradebook, lab, parts):
+    """Header of a lab sheet and the (part, quality criteria, rubric criteria) layout."""
+    header = ['Student ID', 'Student Name', 'Email']
+    layout = []
+    for part in parts:
+        quality_criteria = gradebook.criteria(part)
+        rubric_criteria = part_rubric_criteria(gradebook, part)
+        layout.append((part, quality_criteria, rubric_criteria))
+
+        header.extend([f"{part.name} - Status", f"{part.name} - Signoff Date", f"{part.name} - Days Late"])
+        for criteria in quality_criteria:
+            header.append(f"{part.name} - Quality: {criteria.name} (/{criteria.max_points})")
+        for criteria_name in rubric_criteria:
+            header.append(f"{part.name} - Rubric: {criteria_name}")
+        header.extend([f"{part.name} - Quality Total", f"{part.name} - Evaluation Total",
+                       f"{part.name} - Challenge Total", f"{part.name} - Score", f"{part.name} - Max"])
+    header.extend(['Lab Score', 'Lab Max', 'Percentage', 'Letter Grade'])
+    return header, layout
+
+
+def lab_sheet_row(gradebook, lab, student, layout):
+    row = [student.student_id, student.name, student.email]
+    formats = {}
+    for part, quality_criteria, rubric_criteria in layout:
+        signoff = gradebook.signoff(student, part)
+        formats[len(row) + 1] = 'yyyy-mm-dd hh:mm'
+        row.extend([
+            signoff.status if signoff else 'not_started',
+            local_datetime(signoff.date_updated) if signoff else None,
+            days_late(signoff, part.due_date),
+        ])
+
+        if not signoff:
+            row.extend([None] * (len(quality_criteria) + len(rubric_criteria) + 3))
+            row.extend([gradebook.part_student_score(part, student), gradebook.part_max_score(part)])
+            continue
+
+        # Stored quality scores; blank where the criterion wasn't scored
+        for criteria in quality_criteria:
+            score = gradebook.quality_score(signoff, criteria)
+            row.append(score.score if score else None)
+
+        # Earned marks per rubric criterion of the signoff's sheet
+        rubric_scores = {}
+        eval_sheet = gradebook.evaluation_sheet(signoff)
+        if eval_sheet and eval_sheet.rubric:
+            criteria_data = eval_sheet.rubric.criteria_data
+            for criterion_key, criterion in criteria_data.items():
+                rubric_scores[criterion['name']] = criterion_earned_marks(
+                    criteria_data, eval_sheet.evaluations, criterion_key
+                )
+        for criteria_name in rubric_criteria:
+            row.append(rubric_scores.get(criteria_name))
+
+        row.extend([
+            gradebook.signoff_criteria_score(signoff),
+            gradebook.evaluation_earned_marks(signoff),
+            gradebook.signoff_challenge_score(signoff),
+            gradebook.part_student_score(part, student),
+            gradebook.part_max_score(part),
+        ])
+
+    percentage = gradebook.lab_student_percentage(lab, student)
+    formats[len(row) + 2] = PERCENT_FORMAT
+    row.extend([
+        gradebook.lab_student_score(lab, student),
+        gradebook.lab_max_score(lab),
+        round(float(percentage), 2),
+        gradebook.lab_grade_letter(lab, student),
+    ])
+    return row, formats
+
+
+# Workbook
+
+def write_workbook(gradebook, title, students, labs, parts_by_lab=None, course=True, progress=None):
+    """
+    Write a gradebook workbook to a temporary file and return the open file.
+
+    ``parts_by_lab`` limits the parts shown on the lab sheets (all parts by
+    default); ``course`` adds the course totals to the Summary sheet.
+    """
+    workbook = Workbook(write_only=True)
+    used_titles = set()
+    grade_scale = gradebook.course_grade_scale() if course else gradebook.grade_scale(labs[0])
+
+    summary = SheetWriter(workbook, sheet_title('Summary', used_titles))
+    summary.header([title])
+    summary.row(['Generated on', local_datetime(timezone.now())], {1: 'yyyy-mm-dd hh:mm'})
+    summary.row(['Total Students', len(students)])
+    summary.row(['Total Labs', len(labs)])
+    summary.row(['Grade Scale', grade_scale.name])
+    summary.row([])
+    summary.header(summary_columns(labs, course))
+
+    lab_sheets = []
+    for lab in labs:
+        parts = (parts_by_lab or {}).get(lab.id) or gradebook.parts(lab)
+        header, layout = lab_sheet_columns(gradebook, lab, parts)
+        sheet = SheetWriter(workbook, sheet_title(lab.name, used_titles))
+        sheet.header(header)
+        lab_sheets.append((lab, layout, sheet))
+
+    # Write-only sheets each stream to their own file, so one pass over the
+    # students can fill all of them
+    done = 0
+    for chunk in student_chunks(gradebook, students):
+        for student in chunk.students:
+            summary.row(*summary_row(chunk, student, labs, course))
+            for lab, layout, sheet in lab_sheets:
+                sheet.row(*lab_sheet_row(chunk, lab, student, layout))
+        done += len(chunk.students)
+        if progress:
+            progress(done, len(students))
+
+    scale_sheet = SheetWriter(workbook, sheet_title('Grade Scale', used_titles))
+    scale_sheet.row(['Scale Name', grade_scale.name])
+    scale_sheet.row(['Description', grade_scale.description])
+    scale_sheet.row([])
+    for row in grade_scale_rows(grade_scale):
+        scale_sheet.row(row)
+
+    output = tempfile.TemporaryFile()
+    workbook.save(output)
+    output.seek(0)
+    return output
+
+
+def xlsx_response(output, filename):
+    return FileResponse(output, as_attachment=True, filename=filename, content_type=XLSX_CONTENT_TYPE)
+
+
+def lab_workbook(lab_id):
+    gradebook = Gradebook(students=[])
+    lab = gradebook.lab_by_id[lab_id]
+    return write_workbook(gradebook, f"Lab Report - {lab.name}", active_students(), [lab], course=False)
+
+
+def part_workbook(part_id):
+    gradebook = Gradebook(students=[])
+    part = gradebook.part_by_id[part_id]
+    lab = gradebook.lab_by_id[part.lab_id]
+    return write_workbook(gradebook, f"Part Report - {lab.name} - {part.name}", active_students(), [lab],
+                          parts_by_lab={lab.id: [part]}, course=False)
+
+
+def student_grade_workbook(students, progress=None):
+    gradebook = Gradebook(students=[])
+    return write_workbook(gradebook, 'Student Grade Report', students, gradebook.labs, progress=progress)
+
+
+def all_data_workbook(progress=None):
+    gradebook = Gradebook(students=[])
+    return write_workbook(gradebook, 'Complete Lab Report', active_students(), gradebook.labs, progress=progress)
@@ -2,6 +2,103 @@
  * Student Autocomplete Functionality
  */
 
+/**
+ * Searchable copy of the active roster: a sorted prefix index of student IDs
+ * and name words, and a trigram index for substring matches.
+ */
+class RosterIndex {
+    constructor(roster) {
+        const column = (field) => roster.fields.indexOf(field);
+        const [id, studentId, name, email] = ['id', 'student_id', 'name', 'email'].map(column);
+        
+        this.version = roster.version;
+        this.students = roster.students.map(row => ({
+            id: row[id],
+            student_id: row[studentId],
+            name: row[name],
+            email: row[email] || '',
+            active: true,
+            display: `${row[name]} (${row[studentId]})`
+        }));
+        this.keys = this.students.map(student => ({
+            studentId: String(student.student_id).toLowerCase(),
+            name: student.name.toLowerCase()
+        }));
+        
+        // [token, student index] pairs sorted by token
+        this.prefixes = [];
+        // trigram -> student indexes
+        this.trigrams = new Map();
+        this.keys.forEach((key, index) => {
+            this.prefixes.push([key.studentId, index]);
+            key.name.split(/\s+/).filter(Boolean).forEach(word => this.prefixes.push([word, index]));
+            
+            [key.studentId, key.name].forEach(text => {
+                for (let i = 0; i + 3 <= text.length; i++) {
+                    const trigram = text.slice(i, i + 3);
+                    if (!this.trigrams.has(trigram)) {
+                        this.trigrams.set(trigram, new Set());
+                    }
+                    this.trigrams.get(trigram).add(index);
+                }
+            });
+        });
+        this.prefixes.sort((a, b) => (a[0] < b[0] ? -1 : a[0] > b[0] ? 1 : 0));
+    }
+    
+    /**
+     * Students whose ID or name word starts with the query, or (3+ characters)
+     * whose ID or name contains it; ID prefix matches first, then name
+     * prefix matches, then by name
+     */
+    search(query, limit = 10) {
+        const q = query.toLowerCase();
+        const candidates = new Set();
+        
+        // Prefix index: binary search for the first token >= q
+        let low = 0;
+        let high = this.prefixes.length;
+        while (low < high) {
+            const mid = (low + high) >> 1;
+            if (this.prefixes[mid][0] < q) {
+                low = mid + 1;
+            } else {
+                high = mid;
+            }
+        }
+        for (let i = low; i < this.prefixes.length && this.prefixes[i][0].startsWith(q); i++) {
+            candidates.add(this.prefixes[i][1]);
+        }
+        
+        // Substring index: students having every trigram of the query,
+        // checked against the full text
+        if (q.length >= 3) {
+            const postings = [];
+            for (let i = 0; i + 3 <= q.length; i++) {
+                postings.push(this.trigrams.get(q.slice(i, i + 3)) || new Set());
+            }
+            postings.sort((a, b) => a.size - b.size);
+            postings[0].forEach(index => {
+                const key = this.keys[index];
+                if (key.studentId.includes(q) || key.name.includes(q)) {
+                    candidates.add(index);
+                }
+            });
+        }
+        
+        const rank = (index) => {
+            const key = this.keys[index];
+            if (key.studentId.startsWith(q)) return 0;
+            if (key.name.startsWith(q)) return 1;
+            return 2;
+        };
+        return Array.from(candidates)
+            .sort((a, b) => rank(a) - rank(b) || this.keys[a].name.localeCompare(this.keys[b].name))
+            .slice(0, limit)
+            .map(index => this.students[index]);
+    }
+}
+
 class StudentAutocomplete {
     constructor(inputField, options = {}) {
         // Default options
@@ -14,6 +111,10 @@ class StudentAutocomplete {
             noResultsText: 'No students found',
             loadingText: 'Searching...',
             searchEndpoint: '/api/student-name-search/',
+            rosterEndpoint: '/api/students/roster/',
+            rosterStorageKey: 'studentRoster',
+            // Revalidate the roster on focus at most this often
+            rosterCheckInterval: 60000,
             ...options
         };
 
@@ -40,9 +141,65 @@ class StudentAutocomplete {
         this.lastQuery = '';
         this.selectedIndex = -1;
         this.results = [];
+        this.roster = null;
+        this.rosterCheckedAt = 0;
         
         // Bind events
         this.bindEvents();
+        
+        // Search the active roster locally once it is loaded
+        this.loadRoster();
+    }
+    
+    /**
+     * Load the active roster, revalidating the copy kept in sessionStorage
+     * with its ETag, and index it
+     */
+    loadRoster() {
+        this.rosterCheckedAt = Date.now();
+        
+        let cached = null;
+        try {
+            cached = JSON.parse(sessionStorage.getItem(this.options.rosterStorageKey));
+        } catch (e) {
+            cached = null;
+        }
+        
+        const headers = { 'X-Requested-With': 'XMLHttpRequest' };
+        if (cached && cached.etag) {
+            headers['If-None-Match'] = cached.etag;
+        }
+        
+        return fetch(this.options.rosterEndpoint, { headers: headers })
+            .then(response => {
+                if (response.status === 304 && cached) {
+                    return cached.roster;
+                }
+                if (!response.ok) {
+                    throw new Error(`HTTP error! status: ${response.status}`);
+                }
+                return response.json().then(roster => {
+                    const etag = response.headers.get('ETag');
+                    if (etag) {
+                        try {
+                            sessionStorage.setItem(this.options.rosterStorageKey, JSON.stringify({ etag, roster }));
+                        } catch (e) {
+                            console.warn('Could not cache student roster:', e);
+                        }
+                    }
+                    return roster;
+                });
+            })
+            .then(roster => {
+                // Only rebuild the index when the roster changed
+                if (!this.roster || this.roster.version !== roster.version) {
+                    this.roster = new RosterIndex(roster);
+                }
+            })
+            .catch(error => {
+                // Searches keep going to the server
+                console.error('Error loading student roster:', error);
+            });
     }
     
     styleResultsContainer() {
@@ -106,15 +263,36 @@ class StudentAutocomplete {
         
         this.lastQuery = query;
         
+        if (this.searchRoster(query)) {
+            return;
+        }
+        
         // Show loading indicator
         this.showLoading();
         
         // Set timer to fetch results
         this.timer = setTimeout(() => {
-            this.fetchResults(query);
+            this.fetchResults(query, this.roster !== null);
         }, this.options.delay);
     }
     
+    /**
+     * Search the local roster; false if it isn't loaded or has no match,
+     * in which case the server is asked (for inactive students too)
+     */
+    searchRoster(query) {
+        if (!this.roster) {
+            return false;
+        }
+        const results = this.roster.search(query);
+        if (results.length === 0) {
+            return false;
+        }
+        this.results = results;
+        this.renderResults();
+        return true;
+    }
+    
     onKeyDown(e) {
         // Only handle key presses if results are visible
         if (this.resultsContainer.style.display !== 'block') {
@@ -147,15 +325,23 @@ class StudentAutocomplete {
     }
     
     onFocus(e) {
+        if (Date.now() - this.rosterCheckedAt > this.options.rosterCheckInterval) {
+            this.loadRoster();
+        }
+        
         const query = this.inputField.value.trim();
-        if (query.length >= this.options.minChars) {
-            this.fetchResults(query);
+        if (query.length >= this.options.minChars && !this.searchRoster(query)) {
+            this.fetchResults(query, this.roster !== null);
         }
     }
     
-    fetchResults(query) {
+    fetchResults(query, includeInactive = false) {
         // Fetch data from API
-        fetch(`${this.options.searchEndpoint}?query=${encodeURIComponent(query)}`)
+        let url = `${this.options.searchEndpoint}?query=${encodeURIComponent(query)}`;
+        if (includeInactive) {
+            url += '&include_inactive=1';
+        }
+        fetch(url)
             .then(response => response.json())
             .then(data => {
                 // Accept data.results or data.students for compatibility
@@ -208,7 +394,7 @@ class StudentAutocomplete {
             
             const idSpan = document.createElement('div');
             idSpan.className = 'student-id';
-            idSpan.textContent = `ID: ${student.student_id}`;
+            idSpan.textContent = `ID: ${student.student_id}` + (student.active === false ? ' (inactive)' : '');
             idSpan.style.fontSize = '0.85em';
             idSpan.style.color = '#6c757d';
             
@@ -29,11 +29,22 @@ document.addEventListener("DOMContentLoaded", function () {
   const newSignoffBtn = document.getElementById("new-signoff-btn");
   const historyCard = document.getElementById("history-card");
   const signoffHistory = document.getElementById("signoff-history");
+  const multiSelectToggle = document.getElementById("multi-select-toggle");
+  const selectedStudentsPanel = document.getElementById("selected-students");
+  const selectedStudentsList = document.getElementById("selected-students-list");
+  const selectedCount = document.getElementById("selected-count");
+  const clearSelectionBtn = document.getElementById("clear-selection-btn");
+  const successMessage = document.getElementById("success-message");
+  const bulkResults = document.getElementById("bulk-results");
 
   // State variables
   let currentStudent = null;
   let currentParts = [];
   let currentCriteria = [];
+  // Parts, criteria, challenges and rubric of the selected lab
+  let currentBundle = null;
+  // Students picked in multi-select mode, by primary key
+  let selectedStudents = new Map();
 
   // Event Listeners
   labSelect.addEventListener("change", loadParts);
@@ -41,6 +52,8 @@ document.addEventListener("DOMContentLoaded", function () {
   resetFormBtn.addEventListener("click", resetForm);
   printBtn.addEventListener("click", printSignoff);
   newSignoffBtn.addEventListener("click", newSignoff);
+  multiSelectToggle.addEventListener("change", toggleMultiSelect);
+  clearSelectionBtn.addEventListener("click", clearSelectedStudents);
 
   // Listen for student selection from autocomplete
   document.addEventListener("studentSelected", function (e) {
@@ -52,6 +65,11 @@ document.addEventListener("DOMContentLoaded", function () {
    * Handle when a student is selected from autocomplete
    */
   function handleStudentSelection(student) {
+    if (multiSelectToggle.checked) {
+      addSelectedStudent(student);
+      return;
+    }
+
     // Store student data
     currentStudent = {
       id: student.id,
@@ -72,6 +90,80 @@ document.addEventListener("DOMContentLoaded", function () {
     }
   }
 
+  /**
+   * Switch between signing off one student and several students at once
+   */
+  function toggleMultiSelect() {
+    if (multiSelectToggle.checked) {
+      // Carry over the student already selected
+      if (currentStudent) {
+        selectedStudents.set(String(currentStudent.id), currentStudent);
+      }
+      currentStudent = null;
+      studentIdInput.value = "";
+      studentInfo.style.display = "none";
+      historyCard.style.display = "none";
+      renderSelectedStudents();
+      selectedStudentsPanel.style.display = "block";
+    } else {
+      clearSelectedStudents();
+      selectedStudentsPanel.style.display = "none";
+    }
+  }
+
+  /**
+   * Add a student to the multi-select list
+   * @param {Object} student - Student from the autocomplete
+   */
+  function addSelectedStudent(student) {
+    selectedStudents.set(String(student.id), {
+      id: student.id,
+      studentId: student.student_id,
+      name: student.name,
+      email: student.email || "",
+    });
+    renderSelectedStudents();
+
+    // Ready for the next name
+    if (studentNameInput) {
+      studentNameInput.value = "";
+    }
+  }
+
+  /**
+   * Render the selected students as removable badges
+   */
+  function renderSelectedStudents() {
+    selectedStudentsList.innerHTML = "";
+    selectedStudents.forEach((student, id) => {
+      const badge = document.createElement("span");
+      badge.className = "badge bg-secondary d-inline-flex align-items-center";
+      badge.textContent = student.name;
+
+      const removeBtn = document.createElement("button");
+      removeBtn.type = "button";
+      removeBtn.className = "btn-close btn-close-white ms-1";
+      removeBtn.setAttribute("aria-label", `Remove ${student.name}`);
+      removeBtn.style.fontSize = "0.6rem";
+      removeBtn.addEventListener("click", function () {
+        selectedStudents.delete(id);
+        renderSelectedStudents();
+      });
+
+      badge.appendChild(removeBtn);
+      selectedStudentsList.appendChild(badge);
+    });
+    selectedCount.textContent = selectedStudents.size;
+  }
+
+  /**
+   * Empty the multi-select list
+   */
+  function clearSelectedStudents() {
+    selectedStudents.clear();
+    renderSelectedStudents();
+  }
+
   /**
    * Load parts for the selected lab
    */
@@ -88,26 +180,17 @@ document.addEventListener("DOMContentLoaded", function () {
     // Log for debugging
     console.log("Loading parts for lab ID:", labId);
 
-    // AJAX call to get parts for the selected lab
-    fetch(`/api/get-parts/?lab_id=${labId}`, {
-        headers: {
-          'X-Requested-With': 'XMLHttpRequest',
-          'X-CSRFToken': getCsrfToken(),
-        }
-      })
-      .then((response) => {
-        if (!response.ok) {
-          throw new Error(`HTTP error! status: ${response.status}`);
-        }
-        return response.json();
-      })
-      .then((data) => {
+    // Everything needed to grade the lab, so picking a part needs no request
+    loadLabBundle(labId)
+      .then((bundle) => {
         hideSpinner();
 
         // Log received data for debugging
-        console.log("Parts data received:", data);
+        console.log("Lab bundle received:", bundle);
 
         // Store the parts data
+        currentBundle = bundle;
+        const data = bundle.parts;
         currentParts = data;
 
         if (Array.isArray(data) && data.length > 0) {
@@ -132,6 +215,48 @@ document.addEventListener("DOMContentLoaded", function () {
       });
   }
 
+  /**
+   * Get a lab's bundle (parts, criteria, challenges and rubric), keeping a
+   * copy in sessionStorage and revalidating it with its ETag
+   * @param {string} labId - ID of the lab
+   * @returns {Promise<Object>} - The bundle
+   */
+  function loadLabBundle(labId) {
+    const storageKey = `labBundle:${labId}`;
+    let cached = null;
+    try {
+      cached = JSON.parse(sessionStorage.getItem(storageKey));
+    } catch (e) {
+      cached = null;
+    }
+
+    const headers = { "X-Requested-With": "XMLHttpRequest" };
+    if (cached && cached.etag) {
+      headers["If-None-Match"] = cached.etag;
+    }
+
+    return fetch(`/api/labs/${labId}/bundle/`, { headers: headers }).then((response) => {
+      if (response.status === 304 && cached) {
+        return cached.bundle;
+      }
+      if (!response.ok) {
+        throw new Error(`HTTP error! status: ${response.status}`);
+      }
+      return response.json().then((bundle) => {
+        const etag = response.headers.get("ETag");
+        if (etag) {
+          try {
+            sessionStorage.setItem(storageKey, JSON.stringify({ etag: etag, bundle: bundle }));
+          } catch (e) {
+            // Storage full or disabled; the bundle is just not kept
+            console.warn("Could not cache lab bundle:", e);
+          }
+        }
+        return bundle;
+      });
+    });
+  }
+
   /**
    * Render parts list
    * @param {Array} parts - Array of part objects
@@ -213,59 +338,46 @@ document.addEventListener("DOMContentLoaded", function () {
    * @param {string} partName - Name of the selected part
    */
   function loadCriteria(partId, partName) {
-    // Show loading indicator
-    showSpinner();
-
     // Log for debugging
     console.log("Loading criteria for part ID:", partId);
 
-    // AJAX call to get criteria for the selected part
-    fetch(`/api/get-criteria/?part_id=${partId}`, {
-        headers: {
-          'X-Requested-With': 'XMLHttpRequest',
-          'X-CSRFToken': getCsrfToken(),
-        }
-      })
-      .then((response) => {
-        if (!response.ok) {
-          throw new Error(`HTTP error! status: ${response.status}`);
-        }
-        return response.json();
-      })
-      .then((data) => {
-        hideSpinner();
-
-        // Log received data for debugging
-        console.log("Criteria data received:", data);
+    // The criteria come with the lab bundle, no request needed
+    const part = currentBundle
+      ? currentBundle.parts.find((p) => String(p.id) === String(partId))
+      : null;
+    if (!part) {
+      showAlert("Error loading criteria: part not found", "danger");
+      return;
+    }
 
-        currentCriteria = data;
+    const data = {
+      criteria: part.criteria,
+      rubric_criteria: currentBundle.rubric_criteria,
+      has_challenges: part.has_challenges,
+      challenges: part.challenges
+    };
+    currentCriteria = data;
 
-        // Always render the form, even if no criteria - backend will create default criteria if needed
-        // Update form headers
-        const selectedLab = labSelect.options[labSelect.selectedIndex].text;
-        gradingHeader.textContent = partName;
-        labBadge.textContent = selectedLab;
+    // Always render the form, even if no criteria - backend will create default criteria if needed
+    // Update form headers
+    const selectedLab = labSelect.options[labSelect.selectedIndex].text;
+    gradingHeader.textContent = partName;
+    labBadge.textContent = selectedLab;
 
-        // Set part ID in form
-        partIdInput.value = partId;
+    // Set part ID in form
+    partIdInput.value = partId;
 
-        // Render criteria - if no criteria data, default empty array will trigger default criteria rendering
-        renderCriteria(data && data.criteria ? data.criteria : []);
+    // Render criteria - if no criteria data, default empty array will trigger default criteria rendering
+    renderCriteria(data.criteria || []);
 
-        // Show the grading form, hide initial message
-        initialMessage.style.display = "none";
-        gradingForm.style.display = "block";
+    // Show the grading form, hide initial message
+    initialMessage.style.display = "none";
+    gradingForm.style.display = "block";
 
-        // Check for existing signoff for this student and part
-        if (currentStudent) {
-          checkExistingSignoff(partId);
-        }
-      })
-      .catch((error) => {
-        hideSpinner();
-        console.error("Error loading criteria:", error);
-        showAlert("Error loading criteria: " + error.message, "danger");
-      });
+    // Check for existing signoff for this student and part
+    if (currentStudent) {
+      checkExistingSignoff(partId);
+    }
   }
 
   /**
@@ -785,6 +897,11 @@ document.addEventListener("DOMContentLoaded", function () {
   function submitSignoff(e) {
     e.preventDefault();
 
+    if (multiSelectToggle.checked) {
+      submitBulkSignoff();
+      return;
+    }
+
     // Validate form
     if (!currentStudent) {
       showAlert("Please select a student first", "warning");
@@ -803,6 +920,83 @@ document.addEventListener("DOMContentLoaded", function () {
     const formData = {
       student_id: studentIdInput.value,
       part_id: partIdInput.value,
+      ...collectScores()
+    };
+
+    // Log form data for debugging
+    console.log("Submitting form data:", formData);
+    
+    // AJAX call to submit signoff
+    postJson("/api/quick-signoff/", formData)
+      .then((data) => {
+        hideSpinner();
+        console.log("Server response:", data);
+
+        if (data.success) {
+          // Show success modal
+          showSuccess("The student signoff has been recorded.");
+
+          // Update part status badge
+          const statusBadge = document.getElementById(
+            `status-${partIdInput.value}`
+          );
+          if (statusBadge) {
+            const status = "approved"; // Always approved on success
+            statusBadge.className = `status-badge ${status}`;
+            statusBadge.textContent =
+              status.charAt(0).toUpperCase() + status.slice(1);
+          }
+        } else {
+          showAlert(data.message || data.error || "Error submitting signoff", "danger");
+        }
+      })
+      .catch(handleSubmitError);
+  }
+
+  /**
+   * Submit the same grading for every selected student in one request
+   */
+  function submitBulkSignoff() {
+    if (selectedStudents.size === 0) {
+      showAlert("Please select at least one student", "warning");
+      return;
+    }
+
+    if (!partIdInput.value) {
+      showAlert("Please select a part to grade", "warning");
+      return;
+    }
+
+    showSpinner();
+
+    const formData = {
+      part_id: partIdInput.value,
+      student_ids: Array.from(selectedStudents.keys()),
+      shared: collectScores()
+    };
+
+    console.log("Submitting bulk signoff:", formData);
+
+    postJson("/api/bulk-signoff/", formData)
+      .then((data) => {
+        hideSpinner();
+        console.log("Server response:", data);
+
+        if (data.success) {
+          showSuccess(data.message, data.results);
+        } else {
+          showAlert(data.message || data.error || "Error submitting signoffs", "danger");
+        }
+      })
+      .catch(handleSubmitError);
+  }
+
+  /**
+   * Collect the comments and scores entered in the form
+   * @returns {Object} - Comments, overall score and score maps
+   */
+  function collectScores() {
+    const formData = {
       comments: document.getElementById("comments").value,
       overall_score: document.querySelector('input[name="overall_score"]:checked').value,
       criteria_scores: {},
@@ -830,13 +1024,19 @@ document.addEventListener("DOMContentLoaded", function () {
       formData.challenge_scores[challengeId] = input.value;
     });
 
-    // Log form data for debugging
-    console.log("Submitting form data:", formData);
-    
-    // AJAX call to submit signoff
-    fetch("/api/quick-signoff/", {
+    return formData;
+  }
+
+  /**
+   * POST a JSON body and parse the JSON response
+   * @param {string} url - Endpoint URL
+   * @param {Object} body - Request body
+   * @returns {Promise<Object>} - Parsed response; rejected on an error status
+   */
+  function postJson(url, body) {
+    return fetch(url, {
       method: "POST",
-      body: JSON.stringify(formData),
+      body: JSON.stringify(body),
       headers: {
         "X-CSRFToken": getCsrfToken(),
         "Content-Type": "application/json"
@@ -857,43 +1057,60 @@ document.addEventListener("DOMContentLoaded", function () {
           });
         }
         return response.json();
-      })
-      .then((data) => {
-        hideSpinner();
-        console.log("Server response:", data);
+      });
+  }
 
-        if (data.success) {
-          // Show success modal
-          successModal.show();
+  /**
+   * Show the success modal, with per-student results for a bulk signoff
+   * @param {string} message - Summary message
+   * @param {Array} results - Per-student results, if any
+   */
+  function showSuccess(message, results = null) {
+    successMessage.textContent = message;
+    bulkResults.innerHTML = "";
+    bulkResults.style.display = results ? "block" : "none";
+
+    (results || []).forEach((result) => {
+      const student = selectedStudents.get(String(result.student_id));
+      const item = document.createElement("li");
+      item.className = `list-group-item list-group-item-${result.success ? "success" : "danger"}`;
+
+      const name = document.createElement("strong");
+      name.textContent = student ? student.name : `Student ${result.student_id}`;
+      item.appendChild(name);
+
+      const detail = document.createElement("div");
+      detail.className = "small";
+      if (result.success) {
+        detail.textContent = result.created ? "Signed off" : "Signoff updated";
+      }
+      if (result.errors && result.errors.length) {
+        detail.textContent += (detail.textContent ? " - " : "") + result.errors.join("; ");
+      }
+      item.appendChild(detail);
+      bulkResults.appendChild(item);
+    });
 
-          // Update part status badge
-          const statusBadge = document.getElementById(
-            `status-${partIdInput.value}`
-          );
-          if (statusBadge) {
-            const status = "approved"; // Always approved on success
-            statusBadge.className = `status-badge ${status}`;
-            statusBadge.textContent =
-              status.charAt(0).toUpperCase() + status.slice(1);
-          }
-        } else {
-          showAlert(data.message || data.error || "Error submitting signoff", "danger");
-        }
-      })
-      .catch((error) => {
-        hideSpinner();
-        console.error("Error submitting signoff:", error);
-        
-        // Show a more detailed error message if available
-        let errorMessage = "Error submitting signoff";
-        if (error.error) {
-          errorMessage += ": " + error.error;
-        } else if (error.message) {
-          errorMessage += ": " + error.message;
-        }
-        
-        showAlert(errorMessage, "danger");
-      });
+    successModal.show();
+  }
+
+  /**
+   * Report a failed signoff submission
+   * @param {Object|Error} error - Parsed error response or exception
+   */
+  function handleSubmitError(error) {
+    hideSpinner();
+    console.error("Error submitting signoff:", error);
+    
+    // Show a more detailed error message if available
+    let errorMessage = "Error submitting signoff";
+    if (error.error) {
+      errorMessage += ": " + error.error;
+    } else if (error.message) {
+      errorMessage += ": " + error.message;
+    }
+    
+    showAlert(errorMessage, "danger");
   }
 
   /**
@@ -990,6 +1207,7 @@ document.addEventListener("DOMContentLoaded", function () {
     }
     studentInfo.style.display = "none";
     currentStudent = null;
+    clearSelectedStudents();
   }
 
   /**